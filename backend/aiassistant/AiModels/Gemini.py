@@ -1,5 +1,8 @@
+import asyncio
+import hashlib
 import os
-from typing import Dict, Any, Optional, List
+import threading
+from typing import AsyncIterator, Dict, Any, Optional, List
 import google.generativeai as genai
 from dotenv import load_dotenv
 from pathlib import Path
@@ -10,7 +13,12 @@ load_dotenv()
 class GeminiAIAssistant:
     """Simplified AI Assistant for Django views."""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, response_cache=None):
+        """
+        Args:
+            api_key: Gemini API key, defaults to GOOGLE_API_KEY
+            response_cache: Optional ``ResponseCache`` for repeated questions
+        """
         self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
         self.model_name = "gemini-1.5-flash"
 
@@ -67,10 +75,24 @@ Remember: You are a supportive educational resource, not a replacement for profe
         self.model = genai.GenerativeModel(
             self.model_name, system_instruction=self.system_prompt
         )
+        # Per-thread model for the thread's event loop (see _async_model)
+        self._async_local = threading.local()
         # Load HCV resource PDF if available
         self.hcv_resource_file = None
         self._load_hcv_resource()
 
+        # Cached answers are only valid for this model, system prompt and context
+        self.response_cache = response_cache
+        self.version = hashlib.sha256(
+            "\n".join(
+                [
+                    self.model_name,
+                    self.system_prompt,
+                    "hcv_resource" if self.hcv_resource_file else "",
+                ]
+            ).encode()
+        ).hexdigest()[:12]
+
     def _load_hcv_resource(self):
         """Load the HCV resource PDF file for enhanced AI responses."""
         try:
@@ -90,6 +112,59 @@ Remember: You are a supportive educational resource, not a replacement for profe
             print(f"❌ Error loading HCV resource PDF: {e}")
             self.hcv_resource_file = None
 
+    def _async_model(self) -> genai.GenerativeModel:
+        """
+        Return a model whose async client belongs to the running event loop.
+
+        gRPC asyncio channels are bound to the event loop that created them. An
+        ASGI worker has a single loop, but a WSGI worker runs every async request
+        in a fresh one. A loop only runs in one thread, so each thread keeps its
+        own model and builds a new one when its loop changes.
+        """
+        loop = asyncio.get_running_loop()
+        local = self._async_local
+        if getattr(local, "loop", None) is not loop:
+            local.model = genai.GenerativeModel(
+                self.model_name, system_instruction=self.system_prompt
+            )
+            local.loop = loop
+        return local.model
+
+    def _prepare_request(
+        self,
+        prompt: str,
+        chat_history: Optional[List[Dict[str, str]]] = None,
+        model: Optional[genai.GenerativeModel] = None,
+    ):
+        """
+        Build the request content and, when there is history, a chat session
+        on ``model`` (the shared model by default).
+
+        Returns:
+            tuple: (chat session or None, content to send)
+        """
+        content = prompt
+        # Add HCV resource PDF if available for enhanced context
+        if self.hcv_resource_file:
+            # Add instruction to reference the PDF when relevant
+            enhanced_prompt = f"""You have access to an HCV resource document. Only reference this document if the user's question is specifically related to Hepatitis C, liver disease, or medical topics that would benefit from the clinical information in the resource. For general questions or topics unrelated to HCV/liver health, respond normally without referencing the document.
+
+User question: {prompt}
+
+Please provide a helpful response. If this question relates to Hepatitis C or liver health, you may use information from the HCV resource document to enhance your answer."""
+            content = [enhanced_prompt, self.hcv_resource_file]
+
+        chat = None
+        if chat_history:
+            # Format history for Gemini API
+            formatted_history = []
+            for msg in chat_history:
+                role = "model" if msg["role"] == "assistant" else msg["role"]
+                formatted_history.append({"role": role, "parts": [msg["content"]]})
+            chat = (model or self.model).start_chat(history=formatted_history)
+
+        return chat, content
+
     def get_response(
         self, prompt: str, chat_history: Optional[List[Dict[str, str]]] = None
     ) -> Dict[str, Any]:
@@ -101,41 +176,24 @@ Remember: You are a supportive educational resource, not a replacement for profe
             chat_history (list): Previous messages [{"role": "user/assistant", "content": "..."}]
 
         Returns:
-            dict: {"success": bool, "response": str, "error": str}
+            dict: {"success": bool, "response": str, "error": str, "cache": str}
+            where "cache" is "hit", "miss" or None when the cache does not apply.
+            On a hit, the token counts are those of the original answer.
         """
-        try:
-            # Prepare the content for the request
-            content_parts = [
-                prompt
-            ]  # Add HCV resource PDF if available for enhanced context
-            if self.hcv_resource_file:
-                content_parts.append(self.hcv_resource_file)
-                # Add instruction to reference the PDF when relevant
-                enhanced_prompt = f"""You have access to an HCV resource document. Only reference this document if the user's question is specifically related to Hepatitis C, liver disease, or medical topics that would benefit from the clinical information in the resource. For general questions or topics unrelated to HCV/liver health, respond normally without referencing the document.
+        cache_key = self._cache_key(prompt, chat_history)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return {"success": True, "error": None, "cache": "hit", **cached}
 
-User question: {prompt}
-
-Please provide a helpful response. If this question relates to Hepatitis C or liver health, you may use information from the HCV resource document to enhance your answer."""
-                content_parts = [enhanced_prompt, self.hcv_resource_file]
-
-            if chat_history:
-                # Format history for Gemini API
-                formatted_history = []
-                for msg in chat_history:
-                    role = "model" if msg["role"] == "assistant" else msg["role"]
-                    formatted_history.append({"role": role, "parts": [msg["content"]]})
-                    chat = self.model.start_chat(history=formatted_history)
-                if self.hcv_resource_file:
-                    response = chat.send_message(content_parts)
-                else:
-                    response = chat.send_message(prompt)
+        try:
+            chat, content = self._prepare_request(prompt, chat_history)
+            if chat is not None:
+                response = chat.send_message(content)
             else:
-                if self.hcv_resource_file:
-                    response = self.model.generate_content(content_parts)
-                else:
-                    response = self.model.generate_content(prompt)
+                response = self.model.generate_content(content)
 
-            return {
+            result = {
                 "success": True,
                 "response": response.text,
                 "error": None,
@@ -149,6 +207,7 @@ Please provide a helpful response. If this question relates to Hepatitis C or li
                     if hasattr(response, "usage_metadata")
                     else None
                 ),
+                "cache": "miss" if cache_key else None,
             }
 
         except Exception as e:
@@ -158,11 +217,106 @@ Please provide a helpful response. If this question relates to Hepatitis C or li
                 "error": str(e),
                 "prompt_tokens": None,
                 "response_tokens": None,
+                "cache": None,
             }
 
+        if cache_key:
+            self.response_cache.set(cache_key, result)
+        return result
+
+    def _cache_key(
+        self, prompt: str, chat_history: Optional[List[Dict[str, str]]]
+    ) -> Optional[str]:
+        """Return the response cache key, or None if the answer is not cacheable."""
+        if self.response_cache is None:
+            return None
+        return self.response_cache.make_key(prompt, chat_history, self.version)
+
+    async def stream_response(
+        self, prompt: str, chat_history: Optional[List[Dict[str, str]]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream an AI response chunk by chunk with Gemini's async client.
+
+        Args:
+            prompt (str): User message
+            chat_history (list): Previous messages [{"role": "user/assistant", "content": "..."}]
+
+        Yields:
+            dict: {"text": str} for every chunk of the answer, followed by one
+            {"prompt_tokens": int, "response_tokens": int, "cache": str} usage
+            entry. A cached answer is sent as a single chunk.
+
+        Raises:
+            Exception: Any Gemini API error, so the caller can discard the answer
+        """
+        cache_key = self._cache_key(prompt, chat_history)
+        if cache_key:
+            cached = await self.response_cache.aget(cache_key)
+            if cached is not None:
+                yield {"text": cached["response"]}
+                yield {
+                    "prompt_tokens": cached["prompt_tokens"],
+                    "response_tokens": cached["response_tokens"],
+                    "cache": "hit",
+                }
+                return
+
+        model = self._async_model()
+        chat, content = self._prepare_request(prompt, chat_history, model)
+        if chat is not None:
+            response = await chat.send_message_async(content, stream=True)
+        else:
+            response = await model.generate_content_async(content, stream=True)
+
+        text_parts = []
+        async for chunk in response:
+            if not chunk.candidates:
+                if chunk.prompt_feedback.block_reason:
+                    raise ValueError(f"Prompt blocked: {chunk.prompt_feedback}")
+                continue
+            text = "".join(part.text for part in chunk.parts)
+            if text:
+                text_parts.append(text)
+                yield {"text": text}
+
+        usage = response.usage_metadata
+        result = {
+            "prompt_tokens": usage.prompt_token_count if usage else None,
+            "response_tokens": usage.candidates_token_count if usage else None,
+            "cache": "miss" if cache_key else None,
+        }
+        if cache_key:
+            await self.response_cache.aset(
+                cache_key, {"response": "".join(text_parts), **result}
+            )
+        yield result
+
+
+# For Django views - a lazily created, per-process singleton instance.
+# The Gemini client (gRPC channels, uploaded files) is not fork-safe, so it must
+# not be built at import time: with gunicorn's preload_app the import happens in
+# the master process, before the workers are forked.
+_gemini_assistant: Optional[GeminiAIAssistant] = None
+_gemini_assistant_pid: Optional[int] = None
+_gemini_assistant_lock = threading.Lock()
+
+
+def get_gemini_assistant() -> GeminiAIAssistant:
+    """Return this process's assistant, creating it on first use after a fork."""
+    global _gemini_assistant, _gemini_assistant_pid
+    pid = os.getpid()
+    if _gemini_assistant is None or _gemini_assistant_pid != pid:
+        with _gemini_assistant_lock:
+            if _gemini_assistant is None or _gemini_assistant_pid != pid:
+                from .response_cache import get_response_cache
+
+                _gemini_assistant = GeminiAIAssistant(
+                    response_cache=get_response_cache()
+                )
+                _gemini_assistant_pid = pid
+    return _gemini_assistant
 
-# For Django views - create a singleton instance
-gemini_assistant = GeminiAIAssistant()
 
 if __name__ == "__main__":
     # Example usage
@@ -176,5 +330,5 @@ if __name__ == "__main__":
             "content": "Tomorrow will be cloudy with a chance of rain.",
         },
     ]
-    response = gemini_assistant.get_response(prompt=promt)
+    response = get_gemini_assistant().get_response(prompt=promt)
     print(response)
@@ -0,0 +1,117 @@
+"""
+Response cache for repeated assistant questions.
+
+FAQ-style questions ("how many stages?", "what is ALT?") get the same answer
+for every user, so a completed Gemini answer is stored in a dedicated Django
+cache alias and reused instead of paying for another model call (plus the
+attached HCV resource PDF).
+
+Entries are keyed on a hash of the normalized prompt, the (short) chat history
+and the assistant version, so changing the model or system prompt never serves
+stale answers. Expiry is the cache TTL; eviction is LRU (``LocMemCache`` culls
+the least recently used entries once ``MAX_ENTRIES`` is reached, and the Redis
+backend relies on its ``volatile-lru`` policy, which applies because every
+entry has a TTL).
+"""
+
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+CACHE_KEY_PREFIX = "ai_response"
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case-fold, drop punctuation and collapse whitespace."""
+    text = unicodedata.normalize("NFKC", prompt).casefold()
+    return " ".join(_PUNCTUATION.sub(" ", text).split())
+
+
+class ResponseCache:
+    """Cache of complete assistant answers for prompts with little or no history."""
+
+    def __init__(
+        self,
+        alias: Optional[str] = None,
+        timeout: Optional[int] = None,
+        max_history: Optional[int] = None,
+    ):
+        self.alias = alias or getattr(settings, "AI_RESPONSE_CACHE_ALIAS", "default")
+        self.timeout = (
+            timeout
+            if timeout is not None
+            else getattr(settings, "AI_RESPONSE_CACHE_TTL", 86400)
+        )
+        self.max_history = (
+            max_history
+            if max_history is not None
+            else getattr(settings, "AI_RESPONSE_CACHE_MAX_HISTORY", 2)
+        )
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(
+        self,
+        prompt: str,
+        chat_history: Optional[List[Dict[str, str]]],
+        version: str,
+    ) -> Optional[str]:
+        """
+        Return the cache key for a request, or None if it must not be cached.
+
+        Only prompts without history, or with at most ``max_history`` previous
+        messages, are cached: longer conversations are too specific to repeat.
+        """
+        chat_history = chat_history or []
+        if len(chat_history) > self.max_history:
+            return None
+
+        payload = json.dumps(
+            [
+                normalize_prompt(prompt),
+                [
+                    [msg["role"], normalize_prompt(msg["content"])]
+                    for msg in chat_history
+                ],
+            ]
+        )
+        digest = hashlib.sha256(payload.encode()).hexdigest()
+        return f"{CACHE_KEY_PREFIX}:{version}:{digest}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached answer for ``key``, if any."""
+        return self.cache.get(key)
+
+    def set(self, key: str, response: Dict[str, Any]):
+        """Store a successful answer with its original token usage."""
+        self.cache.set(key, self._entry(response), self.timeout)
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        return await self.cache.aget(key)
+
+    async def aset(self, key: str, response: Dict[str, Any]):
+        await self.cache.aset(key, self._entry(response), self.timeout)
+
+    @staticmethod
+    def _entry(response: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "response": response["response"],
+            "prompt_tokens": response.get("prompt_tokens"),
+            "response_tokens": response.get("response_tokens"),
+        }
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the configured response cache, or None when it is disabled."""
+    if not getattr(settings, "AI_RESPONSE_CACHE_ENABLED", True):
+        return None
+    return ResponseCache()
@@ -9,11 +9,21 @@ class UserProfileAdmin(admin.ModelAdmin):
         "preferred_model",
         "total_tokens_used",
         "daily_message_count",
+        "cache_hits",
+        "cache_misses",
+        "tokens_saved",
         "last_activity",
     )
     list_filter = ("preferred_model", "last_activity")
     search_fields = ("user__username", "user__email")
-    readonly_fields = ("total_tokens_used", "daily_message_count", "last_activity")
+    readonly_fields = (
+        "total_tokens_used",
+        "daily_message_count",
+        "cache_hits",
+        "cache_misses",
+        "tokens_saved",
+        "last_activity",
+    )
 
 
 @admin.register(Chat)
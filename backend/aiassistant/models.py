@@ -46,6 +46,12 @@ class Chat(models.Model):
         ordering = ["-updated_at"]
         verbose_name = "Chat Conversation"
         verbose_name_plural = "Chat Conversations"
+        indexes = [
+            # Cursor pagination of a user's chat list (see ChatListView)
+            models.Index(
+                fields=["user", "-updated_at", "-id"], name="chat_user_updated_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.title or 'Untitled Chat'}"
@@ -101,6 +107,12 @@ class Message(models.Model):
         ordering = ["created_at"]
         verbose_name = "Chat Message"
         verbose_name_plural = "Chat Messages"
+        indexes = [
+            # Paging through a chat's messages (see ChatDetailView)
+            models.Index(
+                fields=["chat", "created_at", "id"], name="message_chat_created_idx"
+            ),
+        ]
 
     def __str__(self):
         sender = "User" if self.is_from_user else "AI"
@@ -138,6 +150,18 @@ class UserProfile(models.Model):
         default="gpt-3.5-turbo",
         help_text="User's preferred AI model for generating responses",
     )
+    cache_hits = models.IntegerField(
+        default=0,
+        help_text="Number of answers served from the response cache",
+    )
+    cache_misses = models.IntegerField(
+        default=0,
+        help_text="Number of cacheable questions that needed a new AI answer",
+    )
+    tokens_saved = models.IntegerField(
+        default=0,
+        help_text="AI tokens not consumed thanks to cached answers",
+    )
 
     class Meta:
         verbose_name = "AI User Profile"
@@ -16,6 +16,11 @@ urlpatterns = [
         views.ChatMessageView.as_view(),
         name="chat-message",
     ),  # POST: send message
+    path(
+        "chats/<uuid:chat_id>/messages/stream/",
+        views.chat_message_stream,
+        name="chat-message-stream",
+    ),  # POST: send message, stream the AI response (SSE, async)
     # User profile endpoint
     path(
         "profile/", views.UserProfileView.as_view(), name="user-profile"
@@ -1,17 +1,25 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.views import View
+from django.views.decorators.http import require_POST
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Substr
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from drf_spectacular.types import OpenApiTypes
 import json
+import uuid
 from .models import Chat, Message, UserProfile
 from .serializers import (
     ChatSerializer,
@@ -20,7 +28,9 @@ from .serializers import (
     ChatListSerializer,
     MessageCreateSerializer,
 )
-from .AiModels.Gemini import gemini_assistant
+from .AiModels.Gemini import get_gemini_assistant
+from utils.pagination import keyset_filter, paginate_keyset, parse_limit
+from users.authentication import CachedJWTAuthentication
 
 
 class ChatListView(APIView):
@@ -29,61 +39,75 @@ class ChatListView(APIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ChatListSerializer
 
+    # Cursor pagination for the sidebar, newest activity first
+    ordering = ("-updated_at", "-id")
+    page_size = 20
+    max_page_size = 100
+    preview_length = 100
+
     @extend_schema(
         operation_id="list_chats",
         summary="List user chats",
-        description="Retrieve all chat conversations for the authenticated user with message counts and last message previews.",
+        description="Retrieve the chat conversations of the authenticated user, most recently updated first, with message counts and last message previews. Results are cursor-paginated: pass the returned `next_cursor` as `cursor` to get the next page. The first page also returns `total`, the user's chat count.",
+        parameters=[
+            OpenApiParameter(
+                "cursor",
+                OpenApiTypes.STR,
+                OpenApiParameter.QUERY,
+                description="Opaque cursor from the previous page's `next_cursor`",
+            ),
+            OpenApiParameter(
+                "limit",
+                OpenApiTypes.INT,
+                OpenApiParameter.QUERY,
+                description="Number of chats per page (default 20, max 100)",
+            ),
+        ],
         responses={
             200: OpenApiResponse(
                 response=ChatListSerializer(many=True),
                 description="Chat list retrieved successfully",
             ),
+            400: OpenApiResponse(description="Invalid pagination parameters"),
             401: OpenApiResponse(description="Authentication required"),
             500: OpenApiResponse(description="Internal server error"),
         },
         tags=["AI Assistant", "Chats"],
     )
     def get(self, request):
-        """Get all chats for the user"""
+        """Get a page of chats for the user"""
         try:
-            chats = Chat.objects.filter(user=request.user)
-            chat_data = []
-
-            for chat in chats:
-                # Get the last message for preview
-                last_message = chat.messages.last()
-                chat_info = {
-                    "id": str(chat.id),
-                    "title": chat.title,
-                    "created_at": chat.created_at.isoformat(),
-                    "updated_at": chat.updated_at.isoformat(),
-                    "message_count": chat.messages.count(),
-                    "last_message": (
-                        {
-                            "content": (
-                                last_message.content[:100] + "..."
-                                if last_message and len(last_message.content) > 100
-                                else last_message.content if last_message else None
-                            ),
-                            "is_from_user": (
-                                last_message.is_from_user if last_message else None
-                            ),
-                            "created_at": (
-                                last_message.created_at.isoformat()
-                                if last_message
-                                else None
-                            ),
-                        }
-                        if last_message
-                        else None
-                    ),
-                }
-                chat_data.append(chat_info)
+            cursor = request.query_params.get("cursor")
+            try:
+                limit = parse_limit(
+                    request.query_params.get("limit"),
+                    self.page_size,
+                    self.max_page_size,
+                )
+                chats, next_cursor = paginate_keyset(
+                    self.get_queryset(request.user),
+                    self.ordering,
+                    cursor,
+                    limit,
+                )
+            except (ValueError, DjangoValidationError):
+                return Response(
+                    {"success": False, "error": "Invalid pagination parameters"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-            return Response(
-                {"success": True, "chats": chat_data, "total": len(chat_data)},
-                status=status.HTTP_200_OK,
-            )
+            data = {
+                "success": True,
+                "chats": [self.serialize_chat(chat) for chat in chats],
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None,
+            }
+            # Counting every chat is not bounded by the page, so only the
+            # first page pays for it; later pages cost one query
+            if not cursor:
+                data["total"] = Chat.objects.filter(user=request.user).count()
+
+            return Response(data, status=status.HTTP_200_OK)
 
         except Exception as e:
             return Response(
@@ -91,6 +115,59 @@ class ChatListView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    def get_queryset(self, user):
+        """
+        Chats of ``user`` with their message count and last message preview.
+
+        Everything is computed in one query (a COUNT plus correlated subqueries
+        for the last message) instead of two extra queries per chat.
+        """
+        last_message = Message.objects.filter(chat=OuterRef("pk")).order_by(
+            "-created_at"
+        )
+        return (
+            Chat.objects.filter(user=user)
+            .annotate(
+                message_count=Count("messages"),
+                # One character more than the preview to know if it was cut
+                last_message_preview=Subquery(
+                    last_message.annotate(
+                        preview=Substr("content", 1, self.preview_length + 1)
+                    ).values("preview")[:1]
+                ),
+                last_message_is_from_user=Subquery(
+                    last_message.values("is_from_user")[:1]
+                ),
+                last_message_created_at=Subquery(last_message.values("created_at")[:1]),
+            )
+            .only("id", "title", "created_at", "updated_at")
+        )
+
+    def serialize_chat(self, chat):
+        """Return the list entry for an annotated chat."""
+        if chat.last_message_created_at is None:
+            last_message = None
+        else:
+            preview = chat.last_message_preview
+            last_message = {
+                "content": (
+                    preview[: self.preview_length] + "..."
+                    if len(preview) > self.preview_length
+                    else preview
+                ),
+                "is_from_user": chat.last_message_is_from_user,
+                "created_at": chat.last_message_created_at.isoformat(),
+            }
+
+        return {
+            "id": str(chat.id),
+            "title": chat.title,
+            "created_at": chat.created_at.isoformat(),
+            "updated_at": chat.updated_at.isoformat(),
+            "message_count": chat.message_count,
+            "last_message": last_message,
+        }
+
     @extend_schema(
         operation_id="create_chat",
         summary="Create new chat",
@@ -136,11 +213,14 @@ class ChatDetailView(APIView):
 
     permission_classes = [IsAuthenticated]
     serializer_class = ChatSerializer
+    page_size = 50
+    max_page_size = 200
+    message_fields = ("id", "content", "is_from_user", "created_at")
 
     @extend_schema(
         operation_id="get_chat_detail",
         summary="Get chat details",
-        description="Retrieve complete chat conversation with all messages for the authenticated user.",
+        description="Retrieve a chat conversation with a page of its messages, oldest first. Without parameters the latest messages are returned; use `before` with the oldest message shown to load earlier history, or `after` with the newest message shown to fetch only new messages.",
         parameters=[
             OpenApiParameter(
                 "chat_id",
@@ -148,12 +228,31 @@ class ChatDetailView(APIView):
                 OpenApiParameter.PATH,
                 description="UUID of the chat to retrieve",
             ),
+            OpenApiParameter(
+                "before",
+                OpenApiTypes.UUID,
+                OpenApiParameter.QUERY,
+                description="Return the messages sent before this message",
+            ),
+            OpenApiParameter(
+                "after",
+                OpenApiTypes.UUID,
+                OpenApiParameter.QUERY,
+                description="Return the messages sent after this message",
+            ),
+            OpenApiParameter(
+                "limit",
+                OpenApiTypes.INT,
+                OpenApiParameter.QUERY,
+                description="Number of messages per page (default 50, max 200)",
+            ),
         ],
         responses={
             200: OpenApiResponse(
                 response=ChatSerializer,
                 description="Chat details retrieved successfully",
             ),
+            400: OpenApiResponse(description="Invalid pagination parameters"),
             401: OpenApiResponse(description="Authentication required"),
             404: OpenApiResponse(description="Chat not found"),
             500: OpenApiResponse(description="Internal server error"),
@@ -161,22 +260,32 @@ class ChatDetailView(APIView):
         tags=["AI Assistant", "Chats"],
     )
     def get(self, request, chat_id):
-        """Get chat details with all messages"""
+        """Get chat details with a page of messages"""
         try:
-            chat = get_object_or_404(Chat, id=chat_id, user=request.user)
-            messages = chat.messages.all()
+            chat = get_object_or_404(
+                Chat.objects.only("id", "title", "created_at", "updated_at"),
+                id=chat_id,
+                user=request.user,
+            )
 
-            message_data = []
-            for message in messages:
-                message_data.append(
-                    {
-                        "id": str(message.id),
-                        "content": message.content,
-                        "is_from_user": message.is_from_user,
-                        "created_at": message.created_at.isoformat(),
-                    }
+            try:
+                messages, has_more = self.get_messages(chat, request.query_params)
+            except (ValueError, DjangoValidationError):
+                return Response(
+                    {"success": False, "error": "Invalid pagination parameters"},
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
 
+            message_data = [
+                {
+                    "id": str(message["id"]),
+                    "content": message["content"],
+                    "is_from_user": message["is_from_user"],
+                    "created_at": message["created_at"].isoformat(),
+                }
+                for message in messages
+            ]
+
             return Response(
                 {
                     "success": True,
@@ -187,6 +296,7 @@ class ChatDetailView(APIView):
                         "updated_at": chat.updated_at.isoformat(),
                         "messages": message_data,
                     },
+                    "has_more": has_more,
                 },
                 status=status.HTTP_200_OK,
             )
@@ -202,6 +312,45 @@ class ChatDetailView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    def get_messages(self, chat, params):
+        """
+        Return a page of ``chat``'s messages, oldest first, and whether more exist.
+
+        Pages are keyset-paginated on ``(created_at, id)`` from an anchor
+        message, so each page is one indexed range scan. Without ``before`` the
+        page ends at the latest message and ``has_more`` tells whether older
+        ones exist; with ``after`` it tells whether newer ones remain.
+
+        Raises:
+            ValueError: If the parameters or the anchor message are invalid
+        """
+        before, after = params.get("before"), params.get("after")
+        if before and after:
+            raise ValueError("Use either before or after")
+        limit = parse_limit(params.get("limit"), self.page_size, self.max_page_size)
+
+        messages = chat.messages.all()
+        ordering = ("created_at", "id") if after else ("-created_at", "-id")
+        anchor_id = after or before
+        if anchor_id:
+            anchor = (
+                chat.messages.filter(id=uuid.UUID(anchor_id))
+                .values_list("created_at", "id")
+                .first()
+            )
+            if anchor is None:
+                raise ValueError("Unknown message")
+            messages = messages.filter(keyset_filter(ordering, anchor))
+
+        page = list(
+            messages.order_by(*ordering).values(*self.message_fields)[: limit + 1]
+        )
+        has_more = len(page) > limit
+        page = page[:limit]
+        if not after:
+            page.reverse()
+        return page, has_more
+
     @extend_schema(
         operation_id="update_chat",
         summary="Update chat details",
@@ -310,6 +459,90 @@ class ChatDetailView(APIView):
             )
 
 
+def get_chat_context(chat):
+    """
+    Return (is_first_exchange, chat_history) for the next message in ``chat``.
+
+    ``is_first_exchange`` tells whether the chat title should be generated once
+    the exchange is saved; ``chat_history`` is the context sent to the AI.
+    """
+    # Check if this is the first message exchange for title generation
+    is_first_exchange = chat.messages.count() == 0 and not chat.title
+
+    # Prepare context from previous messages
+    previous_messages = chat.messages.order_by("created_at")[
+        :10
+    ]  # Last 10 messages for context
+
+    chat_history = [
+        {
+            "role": "user" if msg.is_from_user else "assistant",
+            "content": msg.content,
+        }
+        for msg in previous_messages
+    ]
+    return is_first_exchange, chat_history
+
+
+def save_chat_exchange(
+    user, chat, user_message_content, ai_message_content, usage, is_first_exchange
+):
+    """
+    Save a completed user/AI exchange and update the user's usage statistics.
+
+    Called only once the AI answered successfully, so a failed request never
+    leaves an unanswered user message behind.
+
+    Returns:
+        dict: Serialized user message, AI message and chat title
+    """
+    with transaction.atomic():
+        user_message = Message.objects.create(
+            chat=chat, content=user_message_content, is_from_user=True
+        )
+        # Create AI message
+        ai_message = Message.objects.create(
+            chat=chat, content=ai_message_content, is_from_user=False
+        )
+
+        # Update chat title if it's the first message exchange
+        if is_first_exchange:
+            chat.save()  # This will trigger the auto-title generation
+
+    # Update user profile (optional)
+    try:
+        profile, created = UserProfile.objects.get_or_create(user=user)
+        tokens = (usage.get("prompt_tokens") or 0) + (usage.get("response_tokens") or 0)
+        if usage.get("cache") == "hit":
+            # Served from the response cache, no tokens were consumed
+            profile.cache_hits += 1
+            profile.tokens_saved += tokens
+        else:
+            profile.total_tokens_used += tokens
+            if usage.get("cache") == "miss":
+                profile.cache_misses += 1
+        profile.daily_message_count += 1
+        profile.save()
+    except Exception:
+        pass  # Don't fail if profile update fails
+
+    return {
+        "user_message": {
+            "id": str(user_message.id),
+            "content": user_message.content,
+            "is_from_user": True,
+            "created_at": user_message.created_at.isoformat(),
+        },
+        "ai_message": {
+            "id": str(ai_message.id),
+            "content": ai_message.content,
+            "is_from_user": False,
+            "created_at": ai_message.created_at.isoformat(),
+        },
+        "chat_title": chat.title,
+    }
+
+
 class ChatMessageView(APIView):
     """Send a message and get AI response"""
 
@@ -386,71 +619,26 @@ class ChatMessageView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Check if this is the first message exchange for title generation
-            is_first_exchange = chat.messages.count() == 0 and not chat.title
-
-            # Prepare context from previous messages
-            previous_messages = chat.messages.order_by("created_at")[
-                :10
-            ]  # Last 10 messages for context
-
-            chat_history = [
-                {
-                    "role": "user" if msg.is_from_user else "assistant",
-                    "content": msg.content,
-                }
-                for msg in previous_messages
-            ]
+            is_first_exchange, chat_history = get_chat_context(chat)
 
             # Get AI response FIRST - don't save user message until AI succeeds
-            ai_response = gemini_assistant.get_response(
+            ai_response = get_gemini_assistant().get_response(
                 prompt=user_message_content, chat_history=chat_history
             )
 
             if ai_response.get("success"):
                 # Only create messages if AI response is successful
-                user_message = Message.objects.create(
-                    chat=chat, content=user_message_content, is_from_user=True
-                )
-                # Create AI message
-                ai_message = Message.objects.create(
-                    chat=chat, content=ai_response["response"], is_from_user=False
+                exchange = save_chat_exchange(
+                    request.user,
+                    chat,
+                    user_message_content,
+                    ai_response["response"],
+                    ai_response,
+                    is_first_exchange,
                 )
 
-                # Update chat title if it's the first message exchange
-                if is_first_exchange:
-                    chat.save()  # This will trigger the auto-title generation
-
-                # Update user profile (optional)
-                try:
-                    profile, created = UserProfile.objects.get_or_create(
-                        user=request.user
-                    )
-                    profile.total_tokens_used += ai_response.get(
-                        "prompt_tokens", 0
-                    ) + ai_response.get("response_tokens", 0)
-                    profile.daily_message_count += 1
-                    profile.save()
-                except:
-                    pass  # Don't fail if profile update fails
-
                 return Response(
-                    {
-                        "success": True,
-                        "user_message": {
-                            "id": str(user_message.id),
-                            "content": user_message.content,
-                            "is_from_user": True,
-                            "created_at": user_message.created_at.isoformat(),
-                        },
-                        "ai_message": {
-                            "id": str(ai_message.id),
-                            "content": ai_message.content,
-                            "is_from_user": False,
-                            "created_at": ai_message.created_at.isoformat(),
-                        },
-                        "chat_title": chat.title,
-                    },
+                    {"success": True, **exchange},
                     status=status.HTTP_201_CREATED,
                 )
 
@@ -476,6 +664,119 @@ class ChatMessageView(APIView):
             )
 
 
+def _sse_event(event, data):
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_chat_reply(
+    assistant, user, chat, user_message_content, chat_history, is_first_exchange
+):
+    """
+    Relay the AI answer as it is generated, then save the exchange.
+
+    Emits ``token`` events with answer chunks, followed by a single ``done``
+    event carrying the saved messages, or an ``error`` event. Nothing is saved
+    if the AI call fails or the client disconnects before the end.
+    """
+    ai_message_parts = []
+    usage = {}
+    try:
+        async for event in assistant.stream_response(
+            prompt=user_message_content, chat_history=chat_history
+        ):
+            if "text" in event:
+                ai_message_parts.append(event["text"])
+                yield _sse_event("token", {"text": event["text"]})
+            else:
+                usage = event
+
+        exchange = await sync_to_async(save_chat_exchange)(
+            user,
+            chat,
+            user_message_content,
+            "".join(ai_message_parts),
+            usage,
+            is_first_exchange,
+        )
+    except Exception as e:
+        yield _sse_event("error", {"success": False, "error": str(e)})
+        return
+
+    yield _sse_event("done", {"success": True, **exchange})
+
+
+@csrf_exempt
+@require_POST
+async def chat_message_stream(request, chat_id):
+    """
+    Send a message and stream the AI response as Server-Sent Events.
+
+    Async counterpart of ``ChatMessageView.post``: ``token`` events carry the
+    answer as it is generated, then a ``done`` event carries the saved messages
+    (same shape as the non-streaming response) or an ``error`` event. Under an
+    ASGI worker the AI round trip does not hold a server thread.
+    """
+    # JWT authentication, as DRF would do for the API views
+    try:
+        auth = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+    except AuthenticationFailed as e:
+        return JsonResponse(
+            {"success": False, "error": str(e.detail)},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+    if auth is None:
+        return JsonResponse(
+            {"success": False, "error": "Authentication required"},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+    user = auth[0]
+
+    try:
+        data = json.loads(request.body or b"{}")
+    except (ValueError, UnicodeDecodeError):
+        data = None
+    if not isinstance(data, dict) or not isinstance(data.get("message"), str):
+        return JsonResponse(
+            {"success": False, "error": "Message content is required"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    user_message_content = data["message"].strip()
+    if not user_message_content:
+        return JsonResponse(
+            {"success": False, "error": "Message cannot be empty"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        chat = await Chat.objects.aget(id=chat_id, user=user)
+    except Chat.DoesNotExist:
+        return JsonResponse(
+            {"success": False, "error": "Chat not found"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    is_first_exchange, chat_history = await sync_to_async(get_chat_context)(chat)
+    # The first call in a worker creates the client (and uploads the resource PDF)
+    assistant = await sync_to_async(get_gemini_assistant, thread_sensitive=False)()
+
+    response = StreamingHttpResponse(
+        _stream_chat_reply(
+            assistant,
+            user,
+            chat,
+            user_message_content,
+            chat_history,
+            is_first_exchange,
+        ),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Don't let proxies buffer the stream
+    return response
+
+
 class UserProfileView(APIView):
     """Get or update user profile"""
 
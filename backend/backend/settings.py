@@ -35,9 +35,7 @@ DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "localhost,127.0.0.1").split(",")
 
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    ),
+    "DEFAULT_AUTHENTICATION_CLASSES": ("users.authentication.CachedJWTAuthentication",),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
@@ -195,16 +193,36 @@ CORS_ALLOWED_ORIGINS = [
 CORS_ALLOW_CREDENTIALS = True
 
 # Email settings
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
-EMAIL_HOST = "smtp.gmail.com"
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_BACKEND = os.getenv(
+    "EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend"
+)
+# Overridable to point at a local SMTP server (e.g. aiosmtpd) in development
+EMAIL_HOST = os.getenv("EMAIL_HOST", "smtp.gmail.com")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", 587))
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "True").lower() == "true"
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")  # Your Gmail address
 EMAIL_HOST_PASSWORD = os.getenv(
     "EMAIL_HOST_PASSWORD"
 )  # Use app password, not your main password
 DEFAULT_FROM_EMAIL = f"HepatoCAI Team <{os.getenv('EMAIL_HOST_USER')}>"
 
+# Don't let a stalled SMTP server hang the outbox thread
+EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", 30))
+
+# Email outbox (see users/outbox.py): handlers queue emails, which are sent
+# in the background and retried with exponential backoff
+EMAIL_OUTBOX_SEND_ON_COMMIT = (
+    os.getenv("EMAIL_OUTBOX_SEND_ON_COMMIT", "True").lower() == "true"
+)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", 5))
+# First retry delay in seconds, doubled after each failure up to the maximum
+EMAIL_OUTBOX_RETRY_DELAY = int(os.getenv("EMAIL_OUTBOX_RETRY_DELAY", 60))
+EMAIL_OUTBOX_MAX_RETRY_DELAY = int(os.getenv("EMAIL_OUTBOX_MAX_RETRY_DELAY", 3600))
+# Seconds a drain may hold claimed emails before another can claim them
+EMAIL_OUTBOX_LEASE = int(os.getenv("EMAIL_OUTBOX_LEASE", 300))
+EMAIL_OUTBOX_KEEP_DAYS = int(os.getenv("EMAIL_OUTBOX_KEEP_DAYS", 30))
+
 
 # Allauth settings
 AUTHENTICATION_BACKENDS = [
@@ -293,9 +311,71 @@ CACHES = {
                 "CLIENT_CLASS": "django_redis.client.DefaultClient",
             }
         ),
-    }
+    },
+    # Assistant answers to repeated questions (see aiassistant/AiModels/response_cache.py)
+    "ai_responses": {
+        "BACKEND": (
+            "django_redis.cache.RedisCache"
+            if not DEBUG and os.getenv("REDIS_URL")
+            else "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": (
+            os.getenv("REDIS_URL", "redis://127.0.0.1:6379/1")
+            if not DEBUG and os.getenv("REDIS_URL")
+            else "ai-responses"
+        ),
+        "KEY_PREFIX": "ai_responses",
+        "TIMEOUT": int(os.getenv("AI_RESPONSE_CACHE_TTL", 86400)),
+        "OPTIONS": (
+            {
+                # LocMemCache evicts the least recently used entries when full
+                "MAX_ENTRIES": int(os.getenv("AI_RESPONSE_CACHE_MAX_ENTRIES", 1000)),
+                "CULL_FREQUENCY": 10,
+            }
+            if DEBUG or not os.getenv("REDIS_URL")
+            else {
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            }
+        ),
+    },
 }
 
+# AI assistant response cache
+AI_RESPONSE_CACHE_ENABLED = (
+    os.getenv("AI_RESPONSE_CACHE_ENABLED", "True").lower() == "true"
+)
+AI_RESPONSE_CACHE_ALIAS = "ai_responses"
+AI_RESPONSE_CACHE_TTL = int(os.getenv("AI_RESPONSE_CACHE_TTL", 86400))
+# Only cache prompts with at most this many previous messages in the chat
+AI_RESPONSE_CACHE_MAX_HISTORY = int(os.getenv("AI_RESPONSE_CACHE_MAX_HISTORY", 2))
+
+# Diagnosis analytics cache (see diagnosis/analytics_cache.py). Entries are
+# invalidated on every diagnosis change, which needs a cache shared by all
+# workers, so it is only enabled by default with Redis.
+ANALYTICS_CACHE_ENABLED = (
+    os.getenv(
+        "ANALYTICS_CACHE_ENABLED", "True" if os.getenv("REDIS_URL") else "False"
+    ).lower()
+    == "true"
+)
+ANALYTICS_CACHE_ALIAS = "default"
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", 3600))
+# User management statistics include time windows (new this week, logins in
+# the last day), so they are only cached briefly
+USER_STATISTICS_CACHE_TTL = int(os.getenv("USER_STATISTICS_CACHE_TTL", 60))
+
+# Users loaded by JWT authentication (see users/authentication.py). Saving a
+# user invalidates its entry in every worker only with a shared cache, so
+# like the analytics cache it is only enabled by default with Redis.
+AUTH_USER_CACHE_ENABLED = (
+    os.getenv(
+        "AUTH_USER_CACHE_ENABLED", "True" if os.getenv("REDIS_URL") else "False"
+    ).lower()
+    == "true"
+)
+AUTH_USER_CACHE_ALIAS = "default"
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", 60))
+
 # Database connection settings
 if "default" in DATABASES:
     DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", 0))
@@ -305,6 +385,34 @@ PERFORMANCE_MONITORING = os.getenv("PERFORMANCE_MONITORING", "True").lower() ==
 SLOW_QUERY_THRESHOLD = float(os.getenv("SLOW_QUERY_THRESHOLD", 2.0))
 HIGH_QUERY_COUNT_THRESHOLD = int(os.getenv("HIGH_QUERY_COUNT_THRESHOLD", 10))
 
+# AI diagnosis model registry (models are loaded once per worker process)
+DIAGNOSIS_MODEL_DIR = os.getenv("DIAGNOSIS_MODEL_DIR") or None
+# Compact model bundle written by `manage.py export_diagnosis_bundle` (optional,
+# relative paths are resolved against BASE_DIR)
+DIAGNOSIS_MODEL_BUNDLE_DIR = (
+    os.path.join(BASE_DIR, os.getenv("DIAGNOSIS_MODEL_BUNDLE_DIR"))
+    if os.getenv("DIAGNOSIS_MODEL_BUNDLE_DIR")
+    else None
+)
+DIAGNOSIS_MODEL_HOT_RELOAD = (
+    os.getenv("DIAGNOSIS_MODEL_HOT_RELOAD", "False").lower() == "true"
+)
+# Load the models at app start-up (set by gunicorn.conf.py when preload_app is on)
+DIAGNOSIS_MODEL_PRELOAD = (
+    os.getenv("DIAGNOSIS_MODEL_PRELOAD", "False").lower() == "true"
+)
+DIAGNOSIS_MODEL_RELOAD_INTERVAL = float(
+    os.getenv("DIAGNOSIS_MODEL_RELOAD_INTERVAL", 30.0)
+)
+DIAGNOSIS_BATCH_MAX_SIZE = int(os.getenv("DIAGNOSIS_BATCH_MAX_SIZE", 1000))
+
+# Background export jobs (run by a thread pool in each worker process)
+EXPORT_JOB_DIR = os.getenv("EXPORT_JOB_DIR") or os.path.join(BASE_DIR, "exports")
+EXPORT_JOB_WORKERS = int(os.getenv("EXPORT_JOB_WORKERS", 2))
+# Seconds a job and its file are kept, counted from creation and again from
+# completion
+EXPORT_JOB_TTL = int(os.getenv("EXPORT_JOB_TTL", 24 * 60 * 60))
+
 # =============================================================================
 # SECURITY CONFIGURATION
 # =============================================================================
@@ -24,6 +24,14 @@ python manage.py makemigrations
 echo "🗄️ Running database migrations..."
 python manage.py migrate
 
+# Backfill the diagnosis rollups behind the admin analytics
+echo "📊 Rebuilding diagnosis analytics rollups..."
+python manage.py rebuild_diagnosis_rollups
+
+# Export the diagnosis models to the compact bundle loaded by the workers
+echo "🧠 Exporting diagnosis model bundle..."
+python manage.py export_diagnosis_bundle
+
 # Create default superuser if it doesn't exist
 echo "👤 Creating default superuser..."
 python manage.py create_default_superuser
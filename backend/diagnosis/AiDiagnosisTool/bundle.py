@@ -0,0 +1,181 @@
+"""
+Compact inference bundle for the AI diagnosis models.
+
+A bundle is a directory holding only what inference needs:
+
+    <bundle_dir>/
+        LATEST                     name of the current version directory
+        <version>/
+            manifest.json          feature lists, class labels and settings
+            xgboost_booster.ubj    native XGBoost booster (UBJSON)
+            lr_coef.npy            LR coefficients, shape (classes, features)
+            lr_intercept.npy
+            lr_scaler_mean.npy
+            lr_scaler_scale.npy
+            xgboost_scaler_mean.npy
+            xgboost_scaler_scale.npy
+
+The ``.npy`` arrays are opened with ``np.load(mmap_mode="r")`` so their pages
+come from the OS page cache and are shared by every gunicorn worker instead of
+being unpickled into private memory. The booster is loaded from its native
+format, which skips the sklearn wrapper and pickle machinery entirely.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+import xgboost as xgb
+
+BUNDLE_FORMAT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+LATEST_FILE = "LATEST"
+XGBOOST_BOOSTER_FILE = "xgboost_booster.ubj"
+
+# Inference parameter name -> .npy file name
+ARRAY_FILES = {
+    "lr_coef": "lr_coef.npy",
+    "lr_intercept": "lr_intercept.npy",
+    "lr_mean": "lr_scaler_mean.npy",
+    "lr_scale": "lr_scaler_scale.npy",
+    "xgb_mean": "xgboost_scaler_mean.npy",
+    "xgb_scale": "xgboost_scaler_scale.npy",
+}
+
+
+def artifact_digest(model_dir: str, artifacts: Iterable[str]) -> str:
+    """Return a short content hash of the source artifacts, used as bundle version."""
+    digest = hashlib.sha256()
+    for name in sorted(artifacts):
+        digest.update(name.encode())
+        with open(os.path.join(model_dir, name), "rb") as artifact:
+            for chunk in iter(lambda: artifact.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def resolve_bundle_path(bundle_dir: str) -> str:
+    """
+    Return the version directory to load from ``bundle_dir``.
+
+    ``bundle_dir`` may point at a version directory directly, or at the bundle
+    root, in which case the version named in ``LATEST`` is used.
+    """
+    if os.path.exists(os.path.join(bundle_dir, MANIFEST_FILE)):
+        return bundle_dir
+
+    latest_path = os.path.join(bundle_dir, LATEST_FILE)
+    if not os.path.exists(latest_path):
+        raise FileNotFoundError(f"No model bundle found in {bundle_dir}")
+    with open(latest_path) as latest:
+        version = latest.read().strip()
+    return os.path.join(bundle_dir, version)
+
+
+def export_bundle(params: Dict[str, Any], output_dir: str, version: str) -> str:
+    """
+    Write inference parameters (as built by ``AiDiagnosisTool``) to a bundle.
+
+    The version directory is written to a temporary location first and moved
+    into place, and ``LATEST`` is replaced atomically, so workers never see a
+    half-written bundle.
+
+    Returns:
+        Path of the written version directory
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    version_path = os.path.join(output_dir, version)
+    staging_path = tempfile.mkdtemp(prefix=f".{version}-", dir=output_dir)
+
+    try:
+        for name, file_name in ARRAY_FILES.items():
+            np.save(
+                os.path.join(staging_path, file_name),
+                np.ascontiguousarray(params[name], dtype=np.float64),
+            )
+        params["xgb_booster"].save_model(
+            os.path.join(staging_path, XGBOOST_BOOSTER_FILE)
+        )
+
+        missing = params["xgb_missing"]
+        manifest = {
+            "format_version": BUNDLE_FORMAT_VERSION,
+            "version": version,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "lr_features": list(params["lr_index"]),
+            "xgboost_features": list(params["xgb_index"]),
+            "lr_classes": np.asarray(params["lr_classes"]).tolist(),
+            "lr_ovr": bool(params["lr_ovr"]),
+            "xgboost_classes": np.asarray(params["xgb_classes"]).tolist(),
+            "xgboost_iteration_range": list(params["xgb_iteration_range"]),
+            "xgboost_missing": None if np.isnan(missing) else float(missing),
+        }
+        with open(os.path.join(staging_path, MANIFEST_FILE), "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+
+        # mkdtemp creates the directory owner-only; workers may run as another user
+        os.chmod(staging_path, 0o755)
+        if os.path.exists(version_path):
+            shutil.rmtree(version_path)
+        os.replace(staging_path, version_path)
+    except Exception:
+        shutil.rmtree(staging_path, ignore_errors=True)
+        raise
+
+    latest_tmp = os.path.join(output_dir, f".{LATEST_FILE}.tmp")
+    with open(latest_tmp, "w") as latest:
+        latest.write(version)
+    os.replace(latest_tmp, os.path.join(output_dir, LATEST_FILE))
+
+    return version_path
+
+
+def load_bundle(bundle_dir: str) -> Tuple[Dict[str, Any], List[str], List[str]]:
+    """
+    Load a bundle written by ``export_bundle``.
+
+    Returns:
+        (inference parameters, LR feature names, XGBoost feature names)
+    """
+    version_path = resolve_bundle_path(bundle_dir)
+    with open(os.path.join(version_path, MANIFEST_FILE)) as manifest_file:
+        manifest = json.load(manifest_file)
+
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported bundle format {manifest.get('format_version')}, "
+            f"expected {BUNDLE_FORMAT_VERSION}"
+        )
+
+    params = {
+        # np.asarray drops the memmap subclass but keeps the shared mapping
+        name: np.asarray(np.load(os.path.join(version_path, file_name), mmap_mode="r"))
+        for name, file_name in ARRAY_FILES.items()
+    }
+
+    booster = xgb.Booster()
+    booster.load_model(os.path.join(version_path, XGBOOST_BOOSTER_FILE))
+
+    lr_features = manifest["lr_features"]
+    xgboost_features = manifest["xgboost_features"]
+    missing = manifest["xgboost_missing"]
+    params.update(
+        {
+            "xgb_booster": booster,
+            "xgb_missing": np.nan if missing is None else missing,
+            "xgb_iteration_range": tuple(manifest["xgboost_iteration_range"]),
+            "xgb_classes": np.asarray(manifest["xgboost_classes"]),
+            "xgb_index": {f: i for i, f in enumerate(xgboost_features)},
+            "lr_ovr": manifest["lr_ovr"],
+            "lr_classes": np.asarray(manifest["lr_classes"]),
+            "lr_index": {f: i for i, f in enumerate(lr_features)},
+            "version": manifest["version"],
+        }
+    )
+    return params, lr_features, xgboost_features
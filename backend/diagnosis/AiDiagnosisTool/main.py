@@ -1,9 +1,12 @@
 import random
+import numpy as np
 import pandas as pd
 import joblib
 import os
 import sys
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from scipy.special import expit
+from sklearn.utils.extmath import softmax
 
 # import LogisticRegression and XGBoost from sklearn and xgboost
 from sklearn.linear_model import LogisticRegression
@@ -22,25 +25,45 @@ class AiDiagnosisTool:
     to diagnose hepatitis C and liver disease stages.
     """
 
-    def __init__(self, model_dir: Optional[str] = None):
+    STAGE_NAMES = ["Blood Donors", "Hepatitis", "Fibrosis", "Cirrhosis"]
+
+    # Stage probabilities forced by the ensemble consistency rules
+    NEGATIVE_STAGE_PROBABILITY = [0.95, 0.02, 0.02, 0.01]
+
+    def __init__(
+        self, model_dir: Optional[str] = None, bundle_dir: Optional[str] = None
+    ):
         """
         Initialize the AI Diagnosis Tool with model loading.
 
         Args:
             model_dir: Directory containing the model files. If None, uses current directory.
+            bundle_dir: Optional compact model bundle (see ``bundle.py``). When set,
+                the models are loaded from it instead of the pickled artifacts.
         """
         self.model_dir = model_dir or os.path.dirname(__file__)
+        self.bundle_dir = bundle_dir
+        self.bundle_version = None
         self.lr_model = None
         self.lr_scaler = None  # Placeholder for scaler, if used
         self.lr_feature_names = []  # Placeholder for feature names, if used
         self.xgboost_model = None
         self.xgboost_scaler = None  # Placeholder for scaler, if used
         self.xgboost_feature_names = []
-        self.sorted_features_importance = []  # Store feature importance
+        # Static LR coefficient ranking, computed once when the models load
+        self.sorted_features_importance: Tuple[Tuple[str, float], ...] = ()
+        self._fast_path = None  # Raw NumPy parameters for single-row prediction
         self._load_models()
 
     def _load_models(self):
-        """Load the trained models from joblib files."""
+        """Load the trained models from the bundle if configured, else from joblib files."""
+
+        if self.bundle_dir:
+            try:
+                self._load_bundle()
+                return
+            except Exception as e:
+                print(f"Error loading model bundle, using pickled models: {str(e)}")
 
         try:
             # Use the model directory and join paths properly
@@ -76,15 +99,264 @@ class AiDiagnosisTool:
             )
             # print("xgboost feature names:", self.xgboost_feature_names)
 
+            self._fast_path = self._prepare_fast_path()
+            self.sorted_features_importance = self._compute_feature_importance()
+
         except Exception as e:
             print(f"Error loading models: {str(e)}")
 
-    def predict_with_models(self, input_data: Dict[str, float]) -> Dict[str, Any]:
+    @property
+    def models_loaded(self) -> bool:
+        """Whether the models loaded, i.e. the tool can make predictions."""
+        return self._fast_path is not None or (
+            self.lr_model is not None and self.xgboost_model is not None
+        )
+
+    def _load_bundle(self):
+        """Load inference parameters from a compact, memory-mapped model bundle."""
+        from .bundle import load_bundle
+
+        params, lr_features, xgboost_features = load_bundle(self.bundle_dir)
+        self.lr_feature_names = list(lr_features)
+        self.xgboost_feature_names = list(xgboost_features)
+        self.bundle_version = params.pop("version")
+        self._fast_path = params
+        self.sorted_features_importance = self._compute_feature_importance()
+
+    @staticmethod
+    def _scaler_params(scaler, n_features: int):
+        """Return (mean, scale) arrays equivalent to ``StandardScaler.transform``."""
+        mean = getattr(scaler, "mean_", None)
+        scale = getattr(scaler, "scale_", None)
+        if getattr(scaler, "with_mean", True) and mean is None:
+            raise ValueError("scaler has no mean_")
+        if getattr(scaler, "with_std", True) and scale is None:
+            raise ValueError("scaler has no scale_")
+
+        mean = (
+            np.asarray(mean, dtype=np.float64)
+            if getattr(scaler, "with_mean", True)
+            else np.zeros(n_features)
+        )
+        scale = (
+            np.asarray(scale, dtype=np.float64)
+            if getattr(scaler, "with_std", True)
+            else np.ones(n_features)
+        )
+        if mean.shape != (n_features,) or scale.shape != (n_features,):
+            raise ValueError("scaler parameters do not match the feature list")
+        return mean, scale
+
+    def _prepare_fast_path(self) -> Optional[Dict[str, Any]]:
+        """
+        Extract the raw arrays needed to score one patient without pandas.
+
+        Returns None (so ``predict_with_models`` keeps using the DataFrame path)
+        when the loaded models are not ones the fast path knows how to mirror.
+        """
+        try:
+            xgb_mean, xgb_scale = self._scaler_params(
+                self.xgboost_scaler, len(self.xgboost_feature_names)
+            )
+            lr_mean, lr_scale = self._scaler_params(
+                self.lr_scaler, len(self.lr_feature_names)
+            )
+
+            if self.xgboost_model.objective != "binary:logistic":
+                raise ValueError(
+                    f"unsupported objective {self.xgboost_model.objective}"
+                )
+            try:
+                iteration_range = (0, self.xgboost_model.best_iteration + 1)
+            except AttributeError:
+                iteration_range = (0, 0)
+
+            lr_coef = np.asarray(self.lr_model.coef_, dtype=np.float64)
+            if lr_coef.shape != (
+                len(self.lr_model.classes_),
+                len(self.lr_feature_names),
+            ):
+                raise ValueError("only multi-class logistic regression is supported")
+            multi_class = getattr(self.lr_model, "multi_class", "auto")
+            lr_ovr = multi_class in ["ovr", "warn"] or (
+                multi_class in ["auto", "deprecated"]
+                and getattr(self.lr_model, "solver", "lbfgs") == "liblinear"
+            )
+
+            return {
+                "xgb_booster": self.xgboost_model.get_booster(),
+                "xgb_mean": xgb_mean,
+                "xgb_scale": xgb_scale,
+                "xgb_missing": self.xgboost_model.missing,
+                "xgb_iteration_range": iteration_range,
+                "xgb_classes": np.asarray(self.xgboost_model.classes_),
+                "xgb_index": {f: i for i, f in enumerate(self.xgboost_feature_names)},
+                "lr_mean": lr_mean,
+                "lr_scale": lr_scale,
+                "lr_coef": lr_coef,
+                "lr_intercept": np.asarray(self.lr_model.intercept_, dtype=np.float64),
+                "lr_ovr": lr_ovr,
+                "lr_classes": np.asarray(self.lr_model.classes_),
+                "lr_index": {f: i for i, f in enumerate(self.lr_feature_names)},
+            }
+        except Exception as e:
+            print(f"Fast prediction path disabled: {e}")
+            return None
+
+    def predict_with_models(
+        self, input_data: Dict[str, float], feature_contributions: bool = False
+    ) -> Dict[str, Any]:
         """
         Make predictions using both loaded models.
 
+        Uses the pandas-free fast path when the model parameters were extracted
+        at load time, and the DataFrame path otherwise.
+
+        Args:
+            input_data: Dictionary containing feature values
+            feature_contributions: Report this patient's per-feature contributions
+                as ``feature_importance`` instead of the static coefficient ranking
+
+        Returns:
+            Dictionary containing predictions from both models
+        """
+        if self._fast_path is not None:
+            try:
+                return self._predict_with_models_fast(input_data, feature_contributions)
+            except Exception as e:
+                print(f"Error in fast prediction, using DataFrame path: {e}")
+
+        return self._predict_with_models_dataframe(input_data, feature_contributions)
+
+    def _fill_feature_rows(self, input_data: Optional[Dict[str, Any]]) -> tuple:
+        """
+        Write one patient into preallocated XGBoost and LR rows.
+
+        Keys are cleaned the same way as in the DataFrame path (upper-cased,
+        AGE mapped to Age, empty or non-numeric values skipped), and features
+        the patient does not provide stay 0.0.
+        """
+        fast = self._fast_path
+        xgb_row = np.zeros((1, len(fast["xgb_index"])), dtype=np.float64)
+        lr_row = np.zeros((1, len(fast["lr_index"])), dtype=np.float64)
+
+        for key, value in (input_data or {}).items():
+            if value is None or value == "":
+                continue
+            try:
+                value = float(value)
+            except (ValueError, TypeError):
+                print(f"Invalid value for {key}: {value}, skipping.")
+                continue
+            key = key.upper()
+            if key == "AGE":
+                key = "Age"
+            column = fast["xgb_index"].get(key)
+            if column is not None:
+                xgb_row[0, column] = value
+            column = fast["lr_index"].get(key)
+            if column is not None:
+                lr_row[0, column] = value
+
+        return xgb_row, lr_row
+
+    def _score_rows(self, xgb_rows: np.ndarray, lr_rows: np.ndarray) -> tuple:
+        """
+        Score raw (unscaled) feature rows on NumPy arrays, bypassing pandas and sklearn.
+
+        Mirrors ``StandardScaler.transform``, ``XGBClassifier.predict_proba``
+        (binary logistic) and ``LogisticRegression.predict_proba`` operation for
+        operation so the output matches the DataFrame path. The rows are scaled
+        in place.
+
+        Returns:
+            (xgboost_prediction, xgboost_probability, lr_prediction,
+            lr_probability, lr_stage_index, scaled_lr_rows)
+        """
+        fast = self._fast_path
+
+        # XGBoost model predictions
+        xgb_rows -= fast["xgb_mean"]
+        xgb_rows /= fast["xgb_scale"]
+        positive_probability = fast["xgb_booster"].inplace_predict(
+            xgb_rows,
+            iteration_range=fast["xgb_iteration_range"],
+            missing=fast["xgb_missing"],
+            validate_features=False,
+        )
+        xgboost_probability = np.vstack(
+            (1.0 - positive_probability, positive_probability)
+        ).T
+        xgboost_prediction = fast["xgb_classes"][
+            (positive_probability > 0.5).astype(np.int64)
+        ]
+
+        # Logistic Regression model predictions
+        lr_rows -= fast["lr_mean"]
+        lr_rows /= fast["lr_scale"]
+        decision = lr_rows @ fast["lr_coef"].T + fast["lr_intercept"]
+        lr_stage_index = decision.argmax(axis=1)
+        lr_prediction = fast["lr_classes"][lr_stage_index]
+        if fast["lr_ovr"]:
+            expit(decision, out=decision)
+            decision /= decision.sum(axis=1).reshape((decision.shape[0], -1))
+            lr_probability = decision
+        else:
+            lr_probability = softmax(decision, copy=False)
+
+        return (
+            xgboost_prediction,
+            xgboost_probability,
+            lr_prediction,
+            lr_probability,
+            lr_stage_index,
+            lr_rows,
+        )
+
+    def _predict_with_models_fast(
+        self,
+        input_data: Optional[Dict[str, float]],
+        feature_contributions: bool = False,
+    ) -> Dict[str, Any]:
+        """Score one patient on raw NumPy arrays via ``_score_rows``."""
+        xgb_row, lr_row = self._fill_feature_rows(input_data)
+        (
+            hcv_status,
+            hcv_probability,
+            hcv_stage,
+            hcv_stage_probability,
+            stage_index,
+            scaled_lr_row,
+        ) = self._score_rows(xgb_row, lr_row)
+
+        feature_importance = (
+            self._compute_feature_contributions(scaled_lr_row, stage_index)[0]
+            if feature_contributions
+            else dict(self.sorted_features_importance)
+        )
+        return {
+            "xgboost": {
+                "prediction": hcv_status[0],
+                "probability": hcv_probability[0].tolist(),
+            },
+            "logistic_regression": {
+                "prediction": hcv_stage[0],
+                "probability": hcv_stage_probability[0].tolist(),
+            },
+            "feature_importance": feature_importance,
+        }
+
+    def _predict_with_models_dataframe(
+        self,
+        input_data: Optional[Dict[str, float]],
+        feature_contributions: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Reference prediction path built on pandas DataFrames and the sklearn API.
+
         Args:
             input_data: Dictionary containing feature values
+            feature_contributions: Report per-feature contributions for this patient
 
         Returns:
             Dictionary containing predictions from both models
@@ -138,24 +410,15 @@ class AiDiagnosisTool:
             hcv_stage = self.lr_model.predict(scaled_lr_data)[0]
             hcv_stage_probability = self.lr_model.predict_proba(scaled_lr_data)[0]
 
-            # Get feature importance from LR model
-            if hasattr(self.lr_model, "coef_") and self.lr_model.coef_ is not None:
-                lr_feature_importance = self.lr_model.coef_[0]
-                feature_importance_dict = dict(
-                    zip(self.lr_feature_names, lr_feature_importance)
-                )
-
-                # Sort features by absolute importance
-                self.sorted_features_importance = sorted(
-                    feature_importance_dict.items(),
-                    key=lambda x: abs(x[1]),
-                    reverse=True,
-                )
+            # Static coefficient ranking unless a per-patient breakdown is requested
+            if feature_contributions:
+                stage_index = np.searchsorted(self.lr_model.classes_, [hcv_stage])
+                feature_importance = self._compute_feature_contributions(
+                    scaled_lr_data.to_numpy(), stage_index
+                )[0]
             else:
-                # Fallback if model doesn't have coefficients
-                self.sorted_features_importance = [
-                    (f, 0.1) for f in self.lr_feature_names
-                ]  # Structure results to match get_ensemble_prediction expectations
+                feature_importance = dict(self.sorted_features_importance)
+            # Structure results to match get_ensemble_prediction expectations
             results = {
                 "xgboost": {
                     "prediction": hcv_status,
@@ -165,7 +428,7 @@ class AiDiagnosisTool:
                     "prediction": hcv_stage,
                     "probability": hcv_stage_probability.tolist(),
                 },
-                "feature_importance": dict(self.sorted_features_importance),
+                "feature_importance": feature_importance,
             }
 
         except Exception as e:
@@ -173,6 +436,277 @@ class AiDiagnosisTool:
 
         return results
 
+    def _lr_coefficients(self) -> Optional[np.ndarray]:
+        """Return the LR coefficient matrix from the bundle or the fitted model."""
+        if self._fast_path is not None:
+            return self._fast_path["lr_coef"]
+        return getattr(self.lr_model, "coef_", None)
+
+    def _compute_feature_importance(self) -> Tuple[Tuple[str, float], ...]:
+        """
+        Return LR coefficients as (feature, weight) pairs sorted by absolute weight.
+
+        The ranking only depends on the fitted model, so it is computed once in
+        ``_load_models`` and kept as an immutable tuple shared by all requests.
+        """
+        lr_coef = self._lr_coefficients()
+        if lr_coef is not None:
+            lr_feature_importance = np.asarray(lr_coef[0])
+            feature_importance_dict = dict(
+                zip(self.lr_feature_names, lr_feature_importance.tolist())
+            )
+
+            # Sort features by absolute importance
+            return tuple(
+                sorted(
+                    feature_importance_dict.items(),
+                    key=lambda x: abs(x[1]),
+                    reverse=True,
+                )
+            )
+
+        # Fallback if model doesn't have coefficients
+        return tuple((f, 0.1) for f in self.lr_feature_names)
+
+    def _compute_feature_contributions(
+        self, scaled_lr_data: np.ndarray, stage_index: np.ndarray
+    ) -> List[Dict[str, float]]:
+        """
+        Per-patient contribution of each LR feature to the predicted stage.
+
+        A contribution is the coefficient of the predicted stage's class times the
+        patient's scaled feature value, i.e. that feature's share of the decision
+        score. Computed for all rows at once and sorted by absolute contribution.
+
+        Args:
+            scaled_lr_data: Scaled LR features, shape (n, features)
+            stage_index: Index into the LR classes per patient, shape (n,)
+
+        Returns:
+            One {feature: contribution} dictionary per patient
+        """
+        contributions = np.asarray(self._lr_coefficients())[
+            np.asarray(stage_index)
+        ] * np.asarray(scaled_lr_data)
+        order = np.argsort(-np.abs(contributions), axis=1, kind="stable")
+        ranked = np.take_along_axis(contributions, order, axis=1).tolist()
+
+        return [
+            {
+                self.lr_feature_names[column]: value
+                for column, value in zip(columns, values)
+            }
+            for columns, values in zip(order.tolist(), ranked)
+        ]
+
+    def _build_feature_matrix(
+        self, input_data_list: List[Dict[str, Any]], feature_names: List[str]
+    ) -> np.ndarray:
+        """
+        Build a (patients x features) matrix in the column order of ``feature_names``.
+
+        Keys are matched the same way as in ``predict_with_models`` (upper-cased,
+        with AGE mapped to Age); missing or non-numeric values become 0.0.
+        """
+        column_index = {name: i for i, name in enumerate(feature_names)}
+        matrix = np.zeros((len(input_data_list), len(feature_names)), dtype=np.float64)
+
+        for row, input_data in enumerate(input_data_list):
+            for key, value in (input_data or {}).items():
+                key = key.upper()
+                if key == "AGE":
+                    key = "Age"
+                column = column_index.get(key)
+                if column is None or value is None or value == "":
+                    continue
+                try:
+                    matrix[row, column] = float(value)
+                except (ValueError, TypeError):
+                    continue
+
+        return matrix
+
+    def get_ensemble_predictions_batch(
+        self,
+        xgboost_prediction: np.ndarray,
+        xgboost_probability: np.ndarray,
+        lr_prediction: np.ndarray,
+        lr_probability: np.ndarray,
+    ) -> List[Dict[str, Any]]:
+        """
+        Vectorized version of ``get_ensemble_prediction`` for a whole batch.
+
+        Applies the same consistency rules (negative XGBoost result forces the
+        Blood Donors stage, a positive result never maps to stage 0) using
+        array operations instead of per-patient branching.
+
+        Args:
+            xgboost_prediction: Predicted HCV class per patient, shape (n,)
+            xgboost_probability: XGBoost class probabilities, shape (n, 2)
+            lr_prediction: Predicted stage class per patient, shape (n,)
+            lr_probability: LR stage probabilities, shape (n, k)
+
+        Returns:
+            List of ensemble prediction results, one per patient
+        """
+        xgboost_probability = np.asarray(xgboost_probability, dtype=np.float64)
+        lr_probability = np.asarray(lr_probability)
+        lr_prediction = np.asarray(lr_prediction)
+        n_patients = len(xgboost_probability)
+        n_stages = len(self.STAGE_NAMES)
+        lr_classes = lr_probability.shape[1]
+
+        hcv_positive = np.asarray(xgboost_prediction) != 0
+        max_xgb_prob = xgboost_probability.max(axis=1)
+        max_stage_prob = lr_probability.max(axis=1)
+
+        # Stage probabilities for each consistency branch
+        stage_probability = np.full((n_patients, n_stages), 0.25)
+        stage_probability[:, : min(lr_classes, n_stages)] = lr_probability[:, :n_stages]
+
+        adjusted_probability = np.empty((n_patients, n_stages))
+        adjusted_probability[:, 0] = 0.05
+        adjusted_probability[:, 1] = 0.70
+        adjusted_probability[:, 2] = lr_probability[:, 2] if lr_classes > 2 else 0.15
+        adjusted_probability[:, 3] = lr_probability[:, 3] if lr_classes > 3 else 0.10
+
+        adjusted = hcv_positive & (lr_prediction == 0)
+        stage_probability[adjusted] = adjusted_probability[adjusted]
+        stage_probability[~hcv_positive] = self.NEGATIVE_STAGE_PROBABILITY
+
+        stage_class = np.where(
+            hcv_positive, np.where(lr_prediction == 0, 1, lr_prediction), 0
+        )
+
+        hcv_risk = np.where(
+            hcv_positive,
+            np.where(
+                (max_stage_prob > 0.7) & (lr_prediction >= 2),
+                "High",
+                np.where(lr_prediction >= 1, "Medium", "Low"),
+            ),
+            "Low",
+        )
+
+        # Combined confidence weighted towards XGBoost for positive cases
+        confidence = np.where(
+            hcv_positive, max_xgb_prob * 0.6 + max_stage_prob * 0.4, max_xgb_prob
+        )
+
+        results = []
+        for i in range(n_patients):
+            results.append(
+                {
+                    "hcv_status": "Positive" if hcv_positive[i] else "Negative",
+                    "hcv_status_probability": float(max_xgb_prob[i]),
+                    "hcv_risk": str(hcv_risk[i]),
+                    "hcv_stage": self.get_stage_from_prediction(int(stage_class[i])),
+                    "confidence": float(confidence[i]),
+                    "hcv_stage_probability": dict(
+                        zip(self.STAGE_NAMES, stage_probability[i].tolist())
+                    ),
+                }
+            )
+
+        return results
+
+    def diagnose_batch(
+        self,
+        input_data_list: List[Dict[str, Any]],
+        feature_contributions: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Diagnose a batch of patients with one model pass per batch.
+
+        Builds a single feature matrix for each model so the scalers and models
+        run once for the whole batch instead of once per patient. Uses the same
+        NumPy scoring as single-row predictions when it is available.
+
+        Args:
+            input_data_list: List of dictionaries containing patient data features
+            feature_contributions: Report per-patient feature contributions
+                instead of the static coefficient ranking
+
+        Returns:
+            List of diagnosis results in the same format as ``diagnose``
+        """
+        if not input_data_list:
+            return []
+
+        try:
+            xgboost_matrix = self._build_feature_matrix(
+                input_data_list, self.xgboost_feature_names
+            )
+            lr_matrix = self._build_feature_matrix(
+                input_data_list, self.lr_feature_names
+            )
+
+            if self._fast_path is not None:
+                (
+                    xgboost_prediction,
+                    xgboost_probability,
+                    lr_prediction,
+                    lr_probability,
+                    lr_stage_index,
+                    scaled_lr_data,
+                ) = self._score_rows(xgboost_matrix, lr_matrix)
+            else:
+                # XGBoost model predictions
+                scaled_xgboost_data = pd.DataFrame(
+                    self.xgboost_scaler.transform(
+                        pd.DataFrame(xgboost_matrix, columns=self.xgboost_feature_names)
+                    ),
+                    columns=self.xgboost_feature_names,
+                )
+                xgboost_probability = self.xgboost_model.predict_proba(
+                    scaled_xgboost_data
+                )
+                xgboost_prediction = self.xgboost_model.classes_[
+                    xgboost_probability.argmax(axis=1)
+                ]
+
+                # Logistic Regression model predictions
+                scaled_lr_data = self.lr_scaler.transform(
+                    pd.DataFrame(lr_matrix, columns=self.lr_feature_names)
+                )
+                lr_probability = self.lr_model.predict_proba(
+                    pd.DataFrame(scaled_lr_data, columns=self.lr_feature_names)
+                )
+                lr_stage_index = lr_probability.argmax(axis=1)
+                lr_prediction = self.lr_model.classes_[lr_stage_index]
+
+            ensemble_results = self.get_ensemble_predictions_batch(
+                xgboost_prediction,
+                xgboost_probability,
+                lr_prediction,
+                lr_probability,
+            )
+        except Exception as e:
+            # Fall back to the per-patient path, which degrades gracefully
+            print(f"Error in batch prediction, falling back to single rows: {e}")
+            return [
+                self.diagnose(input_data, feature_contributions)
+                for input_data in input_data_list
+            ]
+
+        if feature_contributions:
+            feature_importance = self._compute_feature_contributions(
+                scaled_lr_data, lr_stage_index
+            )
+        else:
+            feature_importance = [dict(self.sorted_features_importance)] * len(
+                ensemble_results
+            )
+
+        return [
+            {
+                **ensemble_result,
+                "recommendation": self._generate_recommendation(ensemble_result),
+                "feature_importance": importance,
+            }
+            for ensemble_result, importance in zip(ensemble_results, feature_importance)
+        ]
+
     def get_stage_from_prediction(self, prediction_class: int) -> str:
         """Convert prediction class to stage name."""
         stage_mapping = {
@@ -302,19 +836,25 @@ class AiDiagnosisTool:
 
         return ensemble_result
 
-    def diagnose(self, input_data: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    def diagnose(
+        self,
+        input_data: Optional[Dict[str, float]] = None,
+        feature_contributions: bool = False,
+    ) -> Dict[str, Any]:
         """
         Main diagnosis function that uses both models to generate comprehensive results.
 
         Args:
             input_data: Dictionary containing patient data features
+            feature_contributions: Return this patient's per-feature contributions
+                (coefficient x scaled value) as ``feature_importance``
 
         Returns:
             Dictionary containing comprehensive diagnosis results
         """
 
         # Get predictions from both models
-        model_results = self.predict_with_models(input_data)
+        model_results = self.predict_with_models(input_data, feature_contributions)
 
         # Get ensemble prediction
         ensemble_result = self.get_ensemble_prediction(model_results)
@@ -0,0 +1,269 @@
+"""
+Process-wide registry for the AI diagnosis models.
+
+Loading ``AiDiagnosisTool`` unpickles six artifacts from disk, so doing it per
+request makes I/O the dominant cost of a diagnosis. The registry loads the
+tool once per process (i.e. once per gunicorn worker) and hands out the same
+warm instance to every request thread. A tool whose models failed to load
+is never cached: the error is raised and reported by ``stats()``, and the
+next lookup tries again. When hot reload is enabled it also
+watches the artifact mtimes and swaps in a freshly loaded tool after a
+retrain, without restarting the worker.
+
+If ``DIAGNOSIS_MODEL_BUNDLE_DIR`` is set, the tool is loaded from the compact
+bundle written by ``manage.py export_diagnosis_bundle`` instead of the pickles,
+and hot reload follows the bundle's ``LATEST`` pointer and manifest.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .bundle import LATEST_FILE, MANIFEST_FILE, resolve_bundle_path
+from .main import AiDiagnosisTool
+
+logger = logging.getLogger(__name__)
+
+MODEL_ARTIFACTS = (
+    "lr_model.pkl",
+    "lr_scaler.pkl",
+    "lr_features.pkl",
+    "xgboost_model.pkl",
+    "xgboost_scaler.pkl",
+    "xgboost_features.pkl",
+)
+
+
+class ModelLoadError(RuntimeError):
+    """Raised when the diagnosis models could not be loaded."""
+
+
+def _current_rss_bytes() -> Optional[int]:
+    """Return the resident set size of this process, if the platform exposes it."""
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        import resource
+
+        # ru_maxrss is the peak RSS: kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    except (ImportError, AttributeError, OSError):
+        return None
+
+
+def _current_private_bytes() -> Optional[int]:
+    """
+    Return the memory private to this process (not shared with other workers).
+
+    Pages of memory-mapped bundle files count as shared, while unpickled
+    models live in private memory, so this is the per-worker figure to watch.
+    """
+    try:
+        private = 0
+        with open("/proc/self/smaps_rollup") as smaps:
+            for line in smaps:
+                if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                    private += int(line.split()[1]) * 1024
+        return private
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ModelRegistry:
+    """
+    Thread-safe holder for a single shared ``AiDiagnosisTool`` instance.
+
+    The first call to ``get_tool()`` loads the models; every later call returns
+    the cached instance. If the models fail to load, ``ModelLoadError`` is
+    raised and nothing is cached, so the next call tries again. With ``hot_reload`` enabled the artifact mtimes are
+    re-checked at most once every ``reload_interval`` seconds and the tool is
+    reloaded when any of them changed.
+    """
+
+    def __init__(
+        self,
+        model_dir: Optional[str] = None,
+        hot_reload: bool = False,
+        reload_interval: float = 30.0,
+        bundle_dir: Optional[str] = None,
+    ):
+        self.model_dir = model_dir or os.path.dirname(__file__)
+        self.bundle_dir = bundle_dir
+        self.hot_reload = hot_reload
+        self.reload_interval = reload_interval
+
+        self._lock = threading.Lock()
+        self._tool: Optional[AiDiagnosisTool] = None
+        self._mtimes: Dict[str, float] = {}
+        self._last_check = 0.0
+
+        # Load statistics
+        self.load_count = 0
+        self.failed_load_count = 0
+        self.last_error: Optional[str] = None
+        self.last_load_seconds: Optional[float] = None
+        self.last_load_rss_delta: Optional[int] = None
+        self.loaded_at: Optional[float] = None
+
+    def _watched_paths(self):
+        """Return the files whose mtimes signal that the models changed."""
+        if not self.bundle_dir:
+            return [os.path.join(self.model_dir, name) for name in MODEL_ARTIFACTS]
+
+        paths = [os.path.join(self.bundle_dir, LATEST_FILE)]
+        try:
+            paths.append(
+                os.path.join(resolve_bundle_path(self.bundle_dir), MANIFEST_FILE)
+            )
+        except OSError:
+            pass
+        return paths
+
+    def _artifact_mtimes(self) -> Dict[str, float]:
+        """Return the modification time of every model artifact that exists."""
+        mtimes = {}
+        for path in self._watched_paths():
+            try:
+                mtimes[path] = os.path.getmtime(path)
+            except OSError:
+                continue
+        return mtimes
+
+    def _load(self) -> AiDiagnosisTool:
+        """
+        Load a new tool instance and record how much it cost. Caller holds the
+        lock. Raises ModelLoadError when the models did not load.
+        """
+        mtimes = self._artifact_mtimes()
+        rss_before = _current_rss_bytes()
+        start = time.perf_counter()
+
+        tool = AiDiagnosisTool(model_dir=self.model_dir, bundle_dir=self.bundle_dir)
+        if not tool.models_loaded:
+            self.failed_load_count += 1
+            self.last_error = (
+                f"Diagnosis models failed to load from "
+                f"{self.bundle_dir or self.model_dir}"
+            )
+            logger.error(f"{self.last_error} (pid={os.getpid()})")
+            raise ModelLoadError(self.last_error)
+
+        self.last_load_seconds = time.perf_counter() - start
+        rss_after = _current_rss_bytes()
+        self.last_load_rss_delta = (
+            rss_after - rss_before
+            if rss_before is not None and rss_after is not None
+            else None
+        )
+        self.load_count += 1
+        self.last_error = None
+        self.loaded_at = time.time()
+        self._mtimes = mtimes
+        self._last_check = time.monotonic()
+
+        logger.info(
+            f"Diagnosis models loaded in {self.last_load_seconds:.3f}s "
+            f"(pid={os.getpid()}, load #{self.load_count}, "
+            f"bundle={tool.bundle_version}, rss_delta={self.last_load_rss_delta})"
+        )
+        return tool
+
+    def _needs_reload(self) -> bool:
+        """Check artifact mtimes if the reload interval has elapsed."""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return False
+        self._last_check = now
+        return self._artifact_mtimes() != self._mtimes
+
+    def get_tool(self) -> AiDiagnosisTool:
+        """Return the shared tool, loading (or hot-reloading) it if required."""
+        tool = self._tool
+        if tool is not None and not self.hot_reload:
+            return tool
+
+        with self._lock:
+            if self._tool is None:
+                self._tool = self._load()
+            elif self.hot_reload and self._needs_reload():
+                logger.info("Diagnosis model artifacts changed on disk, reloading")
+                try:
+                    self._tool = self._load()
+                except ModelLoadError:
+                    # Keep serving the working models, retry after the interval
+                    pass
+            return self._tool
+
+    def reload(self) -> AiDiagnosisTool:
+        """Force a reload of the models regardless of artifact mtimes."""
+        with self._lock:
+            self._tool = self._load()
+            return self._tool
+
+    def clear(self):
+        """Drop the cached tool so the next ``get_tool()`` call loads it again."""
+        with self._lock:
+            self._tool = None
+            self._mtimes = {}
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._tool is not None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return load-time and memory figures for monitoring."""
+        return {
+            "pid": os.getpid(),
+            "loaded": self.is_loaded,
+            "healthy": self.last_error is None,
+            "last_error": self.last_error,
+            "load_count": self.load_count,
+            "failed_load_count": self.failed_load_count,
+            "last_load_seconds": (
+                round(self.last_load_seconds, 4)
+                if self.last_load_seconds is not None
+                else None
+            ),
+            "last_load_rss_delta_bytes": self.last_load_rss_delta,
+            "current_rss_bytes": _current_rss_bytes(),
+            "current_private_bytes": _current_private_bytes(),
+            "loaded_at": self.loaded_at,
+            "hot_reload": self.hot_reload,
+            "bundle_version": self._tool.bundle_version if self._tool else None,
+        }
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Return the process-wide registry, configured from Django settings."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from django.conf import settings
+
+                _registry = ModelRegistry(
+                    model_dir=getattr(settings, "DIAGNOSIS_MODEL_DIR", None),
+                    hot_reload=getattr(settings, "DIAGNOSIS_MODEL_HOT_RELOAD", False),
+                    reload_interval=getattr(
+                        settings, "DIAGNOSIS_MODEL_RELOAD_INTERVAL", 30.0
+                    ),
+                    bundle_dir=getattr(settings, "DIAGNOSIS_MODEL_BUNDLE_DIR", None),
+                )
+    return _registry
+
+
+def get_diagnosis_tool() -> AiDiagnosisTool:
+    """Shortcut for ``get_model_registry().get_tool()``."""
+    return get_model_registry().get_tool()
@@ -0,0 +1,61 @@
+"""
+Cache of the diagnosis analytics payloads and patient search counts.
+
+The user analytics are tagged with their user and the admin analytics with a
+global tag. Every HCVPatient or HCVResult change invalidates both tags once
+its transaction commits (see ``diagnosis.signals``), so a dashboard refresh
+is served from the cache until the underlying data actually changes.
+"""
+
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from utils.cache import TaggedCache
+
+GLOBAL_TAG = "diagnosis:all"
+
+
+def user_tag(user_id) -> str:
+    return f"diagnosis:user:{user_id}"
+
+
+def get_analytics_cache() -> Optional[TaggedCache]:
+    """Return the analytics cache, or None when it is disabled."""
+    if not getattr(settings, "ANALYTICS_CACHE_ENABLED", False):
+        return None
+    return TaggedCache(
+        alias=getattr(settings, "ANALYTICS_CACHE_ALIAS", "default"),
+        prefix="analytics",
+        timeout=getattr(settings, "ANALYTICS_CACHE_TTL", 3600),
+    )
+
+
+def cached_analytics(name, tags, compute, parts=None):
+    """
+    Return ``compute()``, from the analytics cache when it is enabled.
+
+    ``parts`` distinguishes values of the same name, like the filters of a
+    search whose count is cached.
+    """
+    analytics_cache = get_analytics_cache()
+    if analytics_cache is None:
+        return compute()
+    value, _ = analytics_cache.get_or_compute(name, tags, compute, parts=parts)
+    return value
+
+
+def invalidate_analytics(*user_ids):
+    """
+    Invalidate the global analytics and those of ``user_ids`` after commit.
+
+    Invalidating before the commit would let a concurrent request cache the
+    old data under the new generation.
+    """
+    analytics_cache = get_analytics_cache()
+    if analytics_cache is None:
+        return
+
+    tags = [GLOBAL_TAG] + [user_tag(user_id) for user_id in user_ids if user_id]
+    transaction.on_commit(lambda: analytics_cache.invalidate(*tags))
@@ -1,6 +1,36 @@
+import logging
+import os
+
 from django.apps import AppConfig
 
+logger = logging.getLogger(__name__)
+
 
 class DiagnosisConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'diagnosis'
+
+    def ready(self):
+        """
+        Connect the rollup signal handlers, and warm the diagnosis models when
+        preloading is enabled.
+
+        Under gunicorn with ``preload_app`` (see ``gunicorn.conf.py``) this runs
+        in the master process, so the workers forked afterwards share the
+        loaded models copy-on-write instead of each loading their own copy.
+        """
+        import diagnosis.signals  # noqa
+        from django.conf import settings
+
+        if not getattr(settings, "DIAGNOSIS_MODEL_PRELOAD", False):
+            return
+
+        from .AiDiagnosisTool.registry import get_model_registry
+
+        try:
+            registry = get_model_registry()
+            registry.get_tool()
+            logger.info(f"Diagnosis models preloaded in pid={os.getpid()}")
+        except Exception as e:
+            # Workers fall back to loading the models on first use
+            logger.error(f"Diagnosis model preload failed: {str(e)}")
@@ -0,0 +1,198 @@
+"""
+Background export jobs.
+
+Building a large Excel export takes longer than a request should hold a
+worker. Instead a POST creates an ``ExportJob`` row and hands its id to a
+small thread pool in the same process. The pool thread streams the rows into
+an openpyxl write-only workbook on disk, recording its progress on the job
+row, and the finished file is then downloaded separately.
+
+The job row is the only shared state, so any worker can report a job's
+status, and serve its file as long as ``EXPORT_JOB_DIR`` is on a disk the
+workers share. Jobs are not resumed: one cut short by a worker restart stays
+pending or running until it expires. ``cleanup_export_jobs()`` deletes
+expired jobs with their files; it runs whenever a job is created and from
+the ``cleanup_export_jobs`` command.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from openpyxl import Workbook
+
+from utils.downloads import EXPORT_CHUNK_SIZE
+
+from .exports import iter_patient_rows, patient_export_columns
+from .models import ExportJob, HCVPatient
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    ExportJob.FORMAT_XLSX: (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    ),
+}
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Return this process's export thread pool, created on first use.
+
+    The pool is created again after a fork, since its threads do not survive
+    the fork of the workers from a preloading gunicorn master.
+    """
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "EXPORT_JOB_WORKERS", 2),
+                thread_name_prefix="export-job",
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def job_ttl() -> timedelta:
+    return timedelta(seconds=getattr(settings, "EXPORT_JOB_TTL", 24 * 60 * 60))
+
+
+def job_path(job: ExportJob) -> str:
+    """Path of the job's finished file."""
+    return os.path.join(settings.EXPORT_JOB_DIR, f"{job.pk}.{job.format}")
+
+
+def job_queryset(job: ExportJob):
+    """Patients exported by ``job``."""
+    queryset = HCVPatient.objects.all()
+    if not job.include_all:
+        queryset = queryset.filter(created_by_id=job.created_by_id)
+    return queryset
+
+
+def create_export_job(user, format=ExportJob.FORMAT_XLSX) -> ExportJob:
+    """
+    Create an export of the records ``user`` may export and queue it.
+
+    Staff export every record, other users only their own, as with the
+    synchronous export views.
+    """
+    cleanup_export_jobs()
+    job = ExportJob.objects.create(
+        created_by=user,
+        format=format,
+        include_all=user.is_staff,
+        expires_at=timezone.now() + job_ttl(),
+    )
+    # The pool thread uses its own connection, so queue the job only once
+    # its row is committed
+    transaction.on_commit(lambda: get_executor().submit(_run_in_thread, job.pk))
+    return job
+
+
+def _run_in_thread(job_id):
+    try:
+        run_export_job(job_id)
+    finally:
+        # Connections are per thread; don't leave this one open
+        connections.close_all()
+
+
+def run_export_job(job_id):
+    """Build the file of a pending export job."""
+    # Claim the job, so it runs only once even if it is queued twice
+    claimed = ExportJob.objects.filter(
+        pk=job_id, status=ExportJob.STATUS_PENDING
+    ).update(status=ExportJob.STATUS_RUNNING, started_at=timezone.now())
+    if not claimed:
+        return
+
+    job = ExportJob.objects.get(pk=job_id)
+    try:
+        processed, file_size = write_xlsx_export(job)
+    except Exception as e:
+        logger.exception(f"Export job {job_id} failed")
+        ExportJob.objects.filter(pk=job_id).update(
+            status=ExportJob.STATUS_FAILED,
+            error=str(e),
+            finished_at=timezone.now(),
+        )
+        return
+
+    finished_at = timezone.now()
+    ExportJob.objects.filter(pk=job_id).update(
+        status=ExportJob.STATUS_COMPLETED,
+        processed_rows=processed,
+        file_name=f"patient_records_{finished_at:%Y%m%d_%H%M%S}.{job.format}",
+        file_size=file_size,
+        finished_at=finished_at,
+        # Keep the file for a full TTL after it becomes available
+        expires_at=finished_at + job_ttl(),
+    )
+    logger.info(f"Export job {job_id} wrote {processed} rows ({file_size} bytes)")
+
+
+def write_xlsx_export(job: ExportJob):
+    """
+    Write the job's rows to its workbook and return ``(rows, file size)``.
+
+    The write-only workbook keeps only the current row in memory, and the
+    file is written under a temporary name and renamed once complete, so a
+    download never sees a partial file.
+    """
+    queryset = job_queryset(job)
+    ExportJob.objects.filter(pk=job.pk).update(total_rows=queryset.count())
+
+    path = job_path(job)
+    partial_path = f"{path}.part"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    columns = patient_export_columns()
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Patient Records")
+    sheet.append([header for header, _, _ in columns])
+
+    processed = 0
+    try:
+        for row in iter_patient_rows(queryset, columns):
+            sheet.append(row)
+            processed += 1
+            if processed % EXPORT_CHUNK_SIZE == 0:
+                ExportJob.objects.filter(pk=job.pk).update(processed_rows=processed)
+        workbook.save(partial_path)
+        os.replace(partial_path, path)
+    except BaseException:
+        _remove(partial_path)
+        raise
+    return processed, os.path.getsize(path)
+
+
+def cleanup_export_jobs(now=None) -> int:
+    """Delete the jobs past their expiry with their files; return how many."""
+    expired = list(
+        ExportJob.objects.filter(expires_at__lte=now or timezone.now()).only(
+            "pk", "format"
+        )
+    )
+    for job in expired:
+        path = job_path(job)
+        _remove(path)
+        _remove(f"{path}.part")
+    deleted, _ = ExportJob.objects.filter(pk__in=[job.pk for job in expired]).delete()
+    return deleted
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,33 @@
+from django.db import models
+
+
+class TrigramIndex(models.Index):
+    """
+    Index for case-insensitive substring search (``icontains``) on a text field.
+
+    On PostgreSQL this is a GIN index on ``UPPER(field)`` with the ``pg_trgm``
+    operator class, which serves the ``UPPER(field) LIKE UPPER('%...%')`` that
+    Django generates for ``icontains``. The extension is created if missing.
+    Other databases, like the SQLite development database, get a plain index.
+    """
+
+    def __init__(self, *, field, name):
+        self.field = field
+        super().__init__(fields=[field], name=name)
+
+    def deconstruct(self):
+        path, _, _ = super().deconstruct()
+        return path, (), {"field": self.field, "name": self.name}
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+        from django.contrib.postgres.indexes import GinIndex, OpClass
+        from django.db.models.functions import Upper
+
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        index = GinIndex(
+            OpClass(Upper(self.field), name="gin_trgm_ops"), name=self.name
+        )
+        return index.create_sql(model, schema_editor, using=using, **kwargs)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from diagnosis.export_jobs import cleanup_export_jobs
+
+
+class Command(BaseCommand):
+    help = "Delete expired background export jobs and their files"
+
+    def handle(self, *args, **options):
+        deleted = cleanup_export_jobs()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired export jobs"))
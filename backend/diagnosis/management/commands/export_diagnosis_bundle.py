@@ -0,0 +1,139 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from diagnosis.AiDiagnosisTool import main as diagnosis_main
+from diagnosis.AiDiagnosisTool.bundle import artifact_digest, export_bundle
+from diagnosis.AiDiagnosisTool.main import AiDiagnosisTool
+from diagnosis.AiDiagnosisTool.registry import MODEL_ARTIFACTS
+
+# Loads the tool in a fresh interpreter and prints its memory cost as JSON.
+# Libraries are imported before the first reading so only the models count.
+MEMORY_PROBE = """
+import json, sys, time
+sys.path.insert(0, {base_dir!r})
+from diagnosis.AiDiagnosisTool.main import AiDiagnosisTool
+from diagnosis.AiDiagnosisTool.registry import (
+    _current_private_bytes,
+    _current_rss_bytes,
+)
+
+rss_before, private_before = _current_rss_bytes(), _current_private_bytes()
+start = time.perf_counter()
+tool = AiDiagnosisTool(model_dir={model_dir!r}, bundle_dir={bundle_dir!r})
+load_seconds = time.perf_counter() - start
+tool.diagnose({{"age": 45, "alp": 60.0, "ast": 30.0, "che": 8.0, "crea": 80.0,
+               "cgt": 25.0, "alt": 20.0}})
+print(json.dumps({{
+    "load_seconds": load_seconds,
+    "rss_bytes": _current_rss_bytes(),
+    "rss_delta_bytes": _current_rss_bytes() - rss_before,
+    "private_delta_bytes": (
+        _current_private_bytes() - private_before
+        if private_before is not None else None
+    ),
+    "bundle_version": tool.bundle_version,
+}}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the diagnosis models to a compact, memory-mappable bundle "
+        "(XGBoost UBJSON booster + .npy arrays)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model-dir",
+            help="Directory with the pickled model artifacts (defaults to DIAGNOSIS_MODEL_DIR)",
+        )
+        parser.add_argument(
+            "--output",
+            help="Bundle root directory (defaults to DIAGNOSIS_MODEL_BUNDLE_DIR, "
+            "or a 'bundle' folder next to the models)",
+        )
+        parser.add_argument(
+            "--bundle-version",
+            help="Bundle version name (defaults to a hash of the source artifacts)",
+        )
+        parser.add_argument(
+            "--report-memory",
+            action="store_true",
+            help="Load the models from pickles and from the bundle in fresh "
+            "processes and report the per-worker memory cost of each",
+        )
+
+    def handle(self, *args, **options):
+        model_dir = (
+            options["model_dir"]
+            or getattr(settings, "DIAGNOSIS_MODEL_DIR", None)
+            or os.path.dirname(diagnosis_main.__file__)
+        )
+        output_dir = (
+            options["output"]
+            or getattr(settings, "DIAGNOSIS_MODEL_BUNDLE_DIR", None)
+            or os.path.join(model_dir, "bundle")
+        )
+
+        tool = AiDiagnosisTool(model_dir=model_dir)
+        if tool._fast_path is None:
+            raise CommandError(
+                f"Could not extract inference parameters from the models in {model_dir}"
+            )
+
+        version = options["bundle_version"] or artifact_digest(
+            model_dir, MODEL_ARTIFACTS
+        )
+        version_path = export_bundle(tool._fast_path, output_dir, version)
+
+        size = sum(
+            os.path.getsize(os.path.join(version_path, name))
+            for name in os.listdir(version_path)
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Exported model bundle {version} to {version_path} ({size} bytes)"
+            )
+        )
+
+        if options["report_memory"]:
+            self._report_memory(model_dir, output_dir)
+
+    def _probe(self, model_dir, bundle_dir):
+        base_dir = str(settings.BASE_DIR)
+        script = MEMORY_PROBE.format(
+            base_dir=base_dir, model_dir=model_dir, bundle_dir=bundle_dir
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            text=True,
+            cwd=base_dir,
+            check=True,
+        )
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def _report_memory(self, model_dir, bundle_dir):
+        def mib(value):
+            return "n/a" if value is None else f"{value / (1024 * 1024):.1f} MiB"
+
+        for label, bundle in (("pickles", None), ("bundle", bundle_dir)):
+            try:
+                result = self._probe(model_dir, bundle)
+            except (subprocess.CalledProcessError, ValueError, IndexError) as e:
+                self.stdout.write(
+                    self.style.WARNING(f"ℹ️ Memory probe for {label} failed: {e}")
+                )
+                continue
+
+            self.stdout.write(
+                f"{label:>8}: load {result['load_seconds'] * 1000:.1f} ms, "
+                f"worker RSS {mib(result['rss_bytes'])}, "
+                f"RSS added by models {mib(result['rss_delta_bytes'])}, "
+                f"private memory added {mib(result['private_delta_bytes'])}"
+            )
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from diagnosis.analytics_cache import invalidate_analytics
+from diagnosis.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the daily and per-user diagnosis rollups behind the admin "
+        "analytics from the patient and result tables"
+    )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        days, users = rebuild_rollups()
+        invalidate_analytics()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt diagnosis rollups: {days} days, {users} users "
+                f"in {elapsed:.2f}s"
+            )
+        )
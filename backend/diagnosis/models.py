@@ -1,8 +1,12 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from .indexes import TrigramIndex
+
 # Create your models here.
 
 
@@ -71,6 +75,16 @@ class HCVPatient(models.Model):
     class Meta:
         db_table = "hcv_patients"
         ordering = ["-created_at"]
+        indexes = [
+            # Day-range scans when refreshing DiagnosisDailyRollup rows
+            models.Index(fields=["created_at"], name="hcv_patient_created_idx"),
+            # A user's records, newest first (PatientSearchView, exports)
+            models.Index(
+                fields=["created_by", "created_at"], name="hcv_patient_user_created_idx"
+            ),
+            # patient_name__icontains searches
+            TrigramIndex(field="patient_name", name="hcv_patient_name_trgm_idx"),
+        ]
 
     def __str__(self):
         return self.patient_name
@@ -170,6 +184,149 @@ class HCVResult(models.Model):
     class Meta:
         db_table = "hcv_results"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["hcv_status", "hcv_risk"], name="hcv_result_status_risk_idx"
+            ),
+            models.Index(fields=["confidence"], name="hcv_result_confidence_idx"),
+        ]
 
     def __str__(self):
         return f"HCV Result for {self.patient.patient_name} - {self.hcv_status}"
+
+
+class DiagnosisDailyRollup(models.Model):
+    """
+    Per-day diagnosis counts backing the admin analytics dashboard.
+
+    One row per day that has diagnoses, kept in sync with HCVPatient and
+    HCVResult by the signal handlers in ``diagnosis.signals`` and rebuilt
+    from scratch by the ``rebuild_diagnosis_rollups`` command.
+    """
+
+    date = models.DateField(unique=True)
+    total = models.PositiveIntegerField(default=0)
+
+    # HCV result distributions
+    positive = models.PositiveIntegerField(default=0)
+    negative = models.PositiveIntegerField(default=0)
+    high_risk = models.PositiveIntegerField(default=0)
+    medium_risk = models.PositiveIntegerField(default=0)
+    low_risk = models.PositiveIntegerField(default=0)
+    stage_blood_donors = models.PositiveIntegerField(default=0)
+    stage_hepatitis = models.PositiveIntegerField(default=0)
+    stage_fibrosis = models.PositiveIntegerField(default=0)
+    stage_cirrhosis = models.PositiveIntegerField(default=0)
+
+    # Patient demographics
+    male = models.PositiveIntegerField(default=0)
+    female = models.PositiveIntegerField(default=0)
+    age_young = models.PositiveIntegerField(default=0, help_text="Age under 30")
+    age_middle = models.PositiveIntegerField(default=0, help_text="Age 30 to 59")
+    age_elder = models.PositiveIntegerField(default=0, help_text="Age 60 and over")
+    age_sum = models.PositiveIntegerField(default=0)
+    age_min = models.PositiveIntegerField(null=True, blank=True)
+    age_max = models.PositiveIntegerField(null=True, blank=True)
+
+    # Sum and count of result confidences, for averaging across days
+    confidence_sum = models.FloatField(default=0.0)
+    confidence_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "diagnosis_daily_rollups"
+        ordering = ["-date"]
+
+    def __str__(self):
+        return f"Diagnoses on {self.date}: {self.total}"
+
+
+class DiagnosisUserRollup(models.Model):
+    """Number of diagnoses per user, kept in sync like DiagnosisDailyRollup."""
+
+    created_by = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="diagnosis_rollup",
+    )
+    diagnosis_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "diagnosis_user_rollups"
+        indexes = [
+            models.Index(fields=["-diagnosis_count"], name="diagnosis_user_count_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.created_by}: {self.diagnosis_count} diagnoses"
+
+
+class ExportJob(models.Model):
+    """
+    A diagnosis records export built in the background.
+
+    Created by ``ExportJobListView``, run by ``diagnosis.export_jobs`` and
+    deleted with its file once ``expires_at`` has passed.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_COMPLETED, "Completed"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    FORMAT_XLSX = "xlsx"
+    FORMAT_CHOICES = [
+        (FORMAT_XLSX, "Excel"),
+    ]
+
+    # Random ids, since the id is part of the download URL
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="export_jobs"
+    )
+    format = models.CharField(
+        max_length=10, choices=FORMAT_CHOICES, default=FORMAT_XLSX
+    )
+    # Export every user's records (staff) rather than only the creator's
+    include_all = models.BooleanField(default=False)
+
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING
+    )
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    processed_rows = models.PositiveIntegerField(default=0)
+    file_name = models.CharField(max_length=255, blank=True)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "diagnosis_export_jobs"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["expires_at"], name="export_job_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_format_display()} export {self.id} ({self.status})"
+
+    @property
+    def progress(self):
+        """Fraction of rows written, or None before the rows are counted."""
+        if self.status == self.STATUS_COMPLETED:
+            return 1.0
+        if not self.total_rows:
+            return None
+        return min(self.processed_rows / self.total_rows, 1.0)
@@ -0,0 +1,215 @@
+"""
+Columnar (Parquet) export of diagnosis records for analysis.
+
+The CSV export follows ``PatientWithResultResource`` and renders every value
+as text, so loading it into pandas means re-parsing it. The Parquet export
+keeps the types instead: lab values are float32, categories are
+dictionary-encoded and ``hcv_stage_probability`` is split into one float
+column per stage. Rows are read in chunks and written one row group at a
+time, so memory stays bounded by the row group size whatever the export's
+size.
+
+Only patients whose result has been saved are exported. For incremental
+pulls, ``export_watermark()`` caps an export at the newest result
+``created_at`` it includes; passing that value as ``since`` to the next
+export returns only records diagnosed after it. The result, not the
+patient, sets the watermark because a patient is saved before inference
+runs, and the watermark stays ``WATERMARK_LAG`` behind the clock so rows
+whose transaction commits late still land after it.
+"""
+
+from datetime import timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from utils.downloads import EXPORT_CHUNK_SIZE
+
+from .exports import COLUMN_EXPRESSIONS
+from .rollups import STAGE_FIELDS
+
+# Rows per Parquet row group
+PARQUET_ROW_GROUP_SIZE = 50000
+
+PARQUET_CONTENT_TYPE = "application/vnd.apache.parquet"
+
+# How far the watermark stays behind the clock, so rows stamped before it but
+# committed after the export read the table are picked up by the next pull
+WATERMARK_LAG = timedelta(minutes=5)
+
+LAB_FIELDS = ["alp", "ast", "che", "crea", "cgt", "alb", "bil", "chol", "prot", "alt"]
+
+CATEGORY = pa.dictionary(pa.int8(), pa.string())
+
+# (column, lookup, type) of the columns read straight from the joined query
+COLUMNS = [
+    ("id", "id", pa.int64()),
+    ("patient_name", "patient_name", pa.string()),
+    ("age", "age", pa.int16()),
+    ("sex", "sex", CATEGORY),
+    *[(field, field, pa.float32()) for field in LAB_FIELDS],
+    ("symptoms", "symptoms", pa.list_(pa.string())),
+    ("created_at", "created_at", pa.timestamp("us", tz="UTC")),
+    ("updated_at", "updated_at", pa.timestamp("us", tz="UTC")),
+    ("created_by_id", "created_by_id", pa.int64()),
+    ("created_by", COLUMN_EXPRESSIONS["created_by"], pa.string()),
+    ("hcv_status", "hcv_result__hcv_status", CATEGORY),
+    ("hcv_probability", "hcv_result__hcv_status_probability", pa.float32()),
+    ("hcv_risk", "hcv_result__hcv_risk", CATEGORY),
+    ("hcv_stage", "hcv_result__hcv_stage", CATEGORY),
+    ("confidence", "hcv_result__confidence", pa.float32()),
+    ("recommendation", "hcv_result__recommendation", pa.string()),
+]
+
+# Column -> hcv_stage_probability key, one float column per stage
+STAGE_PROBABILITY_COLUMNS = {
+    f"{field}_probability": stage for field, stage in STAGE_FIELDS.items()
+}
+
+SCHEMA = pa.schema(
+    [pa.field(name, type_) for name, _, type_ in COLUMNS]
+    + [pa.field(name, pa.float32()) for name in STAGE_PROBABILITY_COLUMNS]
+)
+
+SYMPTOMS_INDEX = [name for name, _, _ in COLUMNS].index("symptoms")
+
+
+def parse_export_datetime(value):
+    """
+    Parse an ISO 8601 date or date-time, as an aware datetime in the project
+    time zone when it has no offset. Raises ValueError when invalid.
+    """
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Invalid date-time: {value!r}")
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def filter_export_queryset(queryset, date_from=None, date_to=None, since=None):
+    """
+    Limit an export to a ``created_at`` window, from ``date_from``
+    (inclusive) until ``date_to`` (inclusive), and to records diagnosed
+    after ``since`` (exclusive, for incremental pulls).
+    """
+    if date_from:
+        queryset = queryset.filter(created_at__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(created_at__lte=date_to)
+    if since:
+        queryset = queryset.filter(hcv_result__created_at__gt=since)
+    return queryset
+
+
+def export_watermark(queryset, now=None):
+    """
+    Return ``(queryset, watermark)``, with the queryset limited to patients
+    that have a result and capped at the newest result ``created_at`` older
+    than ``WATERMARK_LAG``, so rows added while the export runs are left for
+    the next pull. The watermark is None when there are no rows.
+    """
+    cutoff = (now or timezone.now()) - WATERMARK_LAG
+    queryset = queryset.filter(hcv_result__created_at__lte=cutoff)
+    watermark = queryset.aggregate(watermark=Max("hcv_result__created_at"))["watermark"]
+    if watermark is not None:
+        queryset = queryset.filter(hcv_result__created_at__lte=watermark)
+    return queryset, watermark
+
+
+def _record_batch(rows):
+    columns = list(zip(*rows))
+    stage_probabilities = columns.pop()
+    columns[SYMPTOMS_INDEX] = [
+        [str(symptom) for symptom in symptoms] if isinstance(symptoms, list) else None
+        for symptoms in columns[SYMPTOMS_INDEX]
+    ]
+
+    arrays = [
+        pa.array(values, type=type_) for (_, _, type_), values in zip(COLUMNS, columns)
+    ]
+    for stage in STAGE_PROBABILITY_COLUMNS.values():
+        arrays.append(
+            pa.array(
+                [
+                    (
+                        probabilities.get(stage)
+                        if isinstance(probabilities, dict)
+                        else None
+                    )
+                    for probabilities in stage_probabilities
+                ],
+                type=pa.float32(),
+            )
+        )
+    return pa.RecordBatch.from_arrays(arrays, schema=SCHEMA)
+
+
+def iter_record_batches(
+    queryset, row_group_size=PARQUET_ROW_GROUP_SIZE, chunk_size=EXPORT_CHUNK_SIZE
+):
+    """Yield the rows of ``queryset`` as Arrow record batches."""
+    lookups = [lookup for _, lookup, _ in COLUMNS]
+    rows = queryset.values_list(*lookups, "hcv_result__hcv_stage_probability").iterator(
+        chunk_size=chunk_size
+    )
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= row_group_size:
+            yield _record_batch(batch)
+            batch = []
+    if batch:
+        yield _record_batch(batch)
+
+
+def write_parquet(queryset, where, row_group_size=PARQUET_ROW_GROUP_SIZE):
+    """Write ``queryset`` to the Parquet file or file-like ``where``; return rows."""
+    written = 0
+    with pq.ParquetWriter(where, SCHEMA) as writer:
+        for batch in iter_record_batches(queryset, row_group_size):
+            writer.write_batch(batch)
+            written += batch.num_rows
+    return written
+
+
+class _BufferSink:
+    """Write-only file collecting what the Parquet writer has produced."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def stream_parquet(queryset, row_group_size=PARQUET_ROW_GROUP_SIZE):
+    """Yield the Parquet export of ``queryset``, one row group at a time."""
+    sink = _BufferSink()
+    with pq.ParquetWriter(sink, SCHEMA) as writer:
+        for batch in iter_record_batches(queryset, row_group_size):
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    # The footer is written when the writer closes
+    yield sink.drain()
@@ -0,0 +1,152 @@
+"""
+Materialized diagnosis rollups for the admin analytics dashboard.
+
+Counting every bucket over ``hcv_patients`` on each dashboard request grows
+with the table. Instead, per-day counts (``DiagnosisDailyRollup``) and
+per-user counts (``DiagnosisUserRollup``) are kept up to date as patients and
+results change, so the dashboard reads one row per day.
+
+A change refreshes only the rows it affects: the patient's day is recounted
+from that day's patients (an index range scan on ``created_at``) and the
+user's total is recounted. Recounting instead of applying deltas keeps
+minimum and maximum ages correct on delete and makes every refresh
+idempotent. The rollup row is locked first so concurrent refreshes of the
+same day run one after the other.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DiagnosisDailyRollup, DiagnosisUserRollup, HCVPatient
+
+# Rollup field -> HCVResult stage, as reported by the diagnosis tool
+STAGE_FIELDS = {
+    "stage_blood_donors": "Blood Donors",
+    "stage_hepatitis": "Hepatitis",
+    "stage_fibrosis": "Fibrosis",
+    "stage_cirrhosis": "Cirrhosis",
+}
+
+
+def rollup_aggregates():
+    """Aggregates computing a DiagnosisDailyRollup row from HCVPatient rows."""
+    return {
+        "total": Count("pk"),
+        "positive": Count("pk", filter=Q(hcv_result__hcv_status="Positive")),
+        "negative": Count("pk", filter=Q(hcv_result__hcv_status="Negative")),
+        "high_risk": Count("pk", filter=Q(hcv_result__hcv_risk="High")),
+        "medium_risk": Count("pk", filter=Q(hcv_result__hcv_risk="Medium")),
+        "low_risk": Count("pk", filter=Q(hcv_result__hcv_risk="Low")),
+        **{
+            field: Count("pk", filter=Q(hcv_result__hcv_stage=stage))
+            for field, stage in STAGE_FIELDS.items()
+        },
+        "male": Count("pk", filter=Q(sex="Male")),
+        "female": Count("pk", filter=Q(sex="Female")),
+        "age_young": Count("pk", filter=Q(age__lt=30)),
+        "age_middle": Count("pk", filter=Q(age__gte=30, age__lt=60)),
+        "age_elder": Count("pk", filter=Q(age__gte=60)),
+        "age_sum": Sum("age"),
+        "age_min": Min("age"),
+        "age_max": Max("age"),
+        "confidence_sum": Sum("hcv_result__confidence"),
+        "confidence_count": Count("hcv_result__confidence"),
+    }
+
+
+def _rollup_values(values):
+    """Replace the NULL sums of an empty aggregate by zero."""
+    values = dict(values)
+    values["age_sum"] = values["age_sum"] or 0
+    values["confidence_sum"] = values["confidence_sum"] or 0.0
+    return values
+
+
+def rollup_date(created_at: datetime) -> date:
+    """The rollup day of a diagnosis, in the project time zone."""
+    return timezone.localdate(created_at)
+
+
+def day_range(day: date) -> Tuple[datetime, datetime]:
+    """Start (inclusive) and end (exclusive) datetimes of ``day``."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+@transaction.atomic
+def refresh_day(day: date):
+    """Recount the DiagnosisDailyRollup row of ``day``."""
+    DiagnosisDailyRollup.objects.get_or_create(date=day)
+    rollup = DiagnosisDailyRollup.objects.select_for_update().get(date=day)
+
+    start, end = day_range(day)
+    values = HCVPatient.objects.filter(
+        created_at__gte=start, created_at__lt=end
+    ).aggregate(**rollup_aggregates())
+
+    if values["total"] == 0:
+        rollup.delete()
+        return
+
+    for field, value in _rollup_values(values).items():
+        setattr(rollup, field, value)
+    rollup.save()
+
+
+@transaction.atomic
+def refresh_user(user_id: Optional[int]):
+    """Recount the DiagnosisUserRollup row of ``user_id``."""
+    if user_id is None:
+        return
+
+    count = HCVPatient.objects.filter(created_by_id=user_id).count()
+    if count == 0:
+        DiagnosisUserRollup.objects.filter(created_by_id=user_id).delete()
+    else:
+        DiagnosisUserRollup.objects.update_or_create(
+            created_by_id=user_id, defaults={"diagnosis_count": count}
+        )
+
+
+@transaction.atomic
+def rebuild_rollups() -> Tuple[int, int]:
+    """
+    Rebuild every rollup row from HCVPatient and HCVResult.
+
+    Needed after bulk changes that bypass model signals (``bulk_create``,
+    ``QuerySet.update()``, raw SQL) and to backfill existing data.
+
+    Returns:
+        The number of day rows and user rows written
+    """
+    DiagnosisDailyRollup.objects.all().delete()
+    DiagnosisUserRollup.objects.all().delete()
+
+    days = (
+        HCVPatient.objects.annotate(day=TruncDate("created_at"))
+        .values("day")
+        .order_by("day")
+        .annotate(**rollup_aggregates())
+    )
+    day_rollups = DiagnosisDailyRollup.objects.bulk_create(
+        DiagnosisDailyRollup(date=row.pop("day"), **_rollup_values(row)) for row in days
+    )
+
+    users = (
+        HCVPatient.objects.values("created_by")
+        .order_by("created_by")
+        .annotate(diagnosis_count=Count("pk"))
+    )
+    user_rollups = DiagnosisUserRollup.objects.bulk_create(
+        DiagnosisUserRollup(
+            created_by_id=row["created_by"], diagnosis_count=row["diagnosis_count"]
+        )
+        for row in users
+    )
+
+    return len(day_rollups), len(user_rollups)
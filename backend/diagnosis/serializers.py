@@ -1,8 +1,9 @@
 from django.contrib.auth.models import User
+from django.urls import reverse
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.types import OpenApiTypes
-from .models import HCVPatient, HCVResult
+from .models import ExportJob, HCVPatient, HCVResult
 
 
 class HCVPatientSerializer(serializers.ModelSerializer):
@@ -158,3 +159,38 @@ class PatientWithResultSerializer(serializers.ModelSerializer):
                 else obj.created_by.email
             )
         return None
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """Status of a background export job, with its download link once done."""
+
+    progress = serializers.FloatField(read_only=True, allow_null=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id",
+            "format",
+            "status",
+            "total_rows",
+            "processed_rows",
+            "progress",
+            "file_name",
+            "file_size",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "expires_at",
+            "download_url",
+        ]
+        read_only_fields = fields
+
+    @extend_schema_field(OpenApiTypes.URI)
+    def get_download_url(self, obj):
+        if obj.status != ExportJob.STATUS_COMPLETED:
+            return None
+        url = reverse("diagnosis:export_job_download", args=[obj.pk])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
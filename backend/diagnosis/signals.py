@@ -0,0 +1,72 @@
+# diagnosis/signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .analytics_cache import invalidate_analytics
+from .models import HCVPatient, HCVResult
+from .rollups import refresh_day, refresh_user, rollup_date
+
+
+@receiver(pre_save, sender=HCVPatient)
+def remember_patient_rollup_keys(sender, instance, raw=False, **kwargs):
+    """
+    Remember the day and user a patient is counted under before it is saved.
+
+    If either changes, the rollups they used to be counted in are refreshed
+    too in ``update_rollups_for_patient``.
+    """
+    if raw or instance.pk is None:
+        return
+
+    previous = (
+        HCVPatient.objects.filter(pk=instance.pk)
+        .values_list("created_at", "created_by_id")
+        .first()
+    )
+    instance._rollup_previous = previous
+
+
+@receiver(post_save, sender=HCVPatient)
+@receiver(post_delete, sender=HCVPatient)
+def update_rollups_for_patient(sender, instance, raw=False, **kwargs):
+    """
+    Refresh the daily and per-user rollups a patient is counted in, and
+    invalidate the cached analytics built on them.
+    """
+    if raw:
+        return
+
+    days = {rollup_date(instance.created_at)}
+    users = {instance.created_by_id}
+
+    previous = getattr(instance, "_rollup_previous", None)
+    if previous:
+        days.add(rollup_date(previous[0]))
+        users.add(previous[1])
+        instance._rollup_previous = None
+
+    for day in days:
+        refresh_day(day)
+    for user_id in users:
+        refresh_user(user_id)
+    invalidate_analytics(*users)
+
+
+@receiver(post_save, sender=HCVResult)
+@receiver(post_delete, sender=HCVResult)
+def update_rollups_for_result(sender, instance, raw=False, **kwargs):
+    """Refresh the daily rollup and cached analytics of a result's patient."""
+    if raw:
+        return
+
+    patient = (
+        HCVPatient.objects.filter(pk=instance.patient_id)
+        .values_list("created_at", "created_by_id")
+        .first()
+    )
+    # None if the patient row is already gone; its own post_delete
+    # refreshes the day
+    if patient is not None:
+        created_at, user_id = patient
+        refresh_day(rollup_date(created_at))
+        invalidate_analytics(user_id)
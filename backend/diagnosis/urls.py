@@ -1,8 +1,13 @@
 from django.urls import path
 from .views import (
     DiagnoseAPIView,
+    BatchDiagnoseAPIView,
     ExportPatientsCSVView,
     ExportPatientsExcelView,
+    ExportPatientsParquetView,
+    ExportJobListView,
+    ExportJobDetailView,
+    ExportJobDownloadView,
     UserDiagnosisAnalyticsView,
     AdminDiagnosisAnalyticsView,
     PatientListView,
@@ -15,6 +20,8 @@ app_name = "diagnosis"
 urlpatterns = [
     # Main diagnosis endpoint (POST: create, GET: list/get user's diagnoses, PUT: update, DELETE: delete)
     path("analyze-hcv/", DiagnoseAPIView.as_view(), name="diagnose"),
+    # Batch diagnosis endpoint (POST: list of patients, vectorized inference)
+    path("analyze-hcv/batch/", BatchDiagnoseAPIView.as_view(), name="diagnose_batch"),
     # Get specific diagnosis by ID (now handled by DiagnoseAPIView)
     path("analyze-hcv/<int:pk>/", DiagnoseAPIView.as_view(), name="diagnose_detail"),
     # Analytics endpoints - separated for user and admin
@@ -35,4 +42,17 @@ urlpatterns = [
     # Export endpoints
     path("export/csv/", ExportPatientsCSVView.as_view(), name="export_csv"),
     path("export/excel/", ExportPatientsExcelView.as_view(), name="export_excel"),
+    path("export/parquet/", ExportPatientsParquetView.as_view(), name="export_parquet"),
+    # Background export jobs (POST: start, GET: list / status / download)
+    path("export/jobs/", ExportJobListView.as_view(), name="export_jobs"),
+    path(
+        "export/jobs/<uuid:pk>/",
+        ExportJobDetailView.as_view(),
+        name="export_job_detail",
+    ),
+    path(
+        "export/jobs/<uuid:pk>/download/",
+        ExportJobDownloadView.as_view(),
+        name="export_job_download",
+    ),
 ]
@@ -6,18 +6,54 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from drf_spectacular.types import OpenApiTypes
-from .models import HCVPatient, HCVResult
-from .AiDiagnosisTool.main import AiDiagnosisTool
+from .models import (
+    DiagnosisDailyRollup,
+    ExportJob,
+    DiagnosisUserRollup,
+    HCVPatient,
+    HCVResult,
+)
+from .rollups import STAGE_FIELDS, refresh_day, refresh_user, rollup_date
+from .analytics_cache import (
+    GLOBAL_TAG,
+    cached_analytics,
+    invalidate_analytics,
+    user_tag,
+)
+from .AiDiagnosisTool.registry import get_diagnosis_tool, get_model_registry
 from .serializers import (
+    ExportJobSerializer,
     HCVPatientSerializer,
     HCVResultSerializer,
     PatientWithResultSerializer,
 )
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import timezone
+from django.conf import settings
 from .resources import PatientWithResultResource
+from .exports import stream_patients_csv
+from .parquet_export import (
+    PARQUET_CONTENT_TYPE,
+    export_watermark,
+    filter_export_queryset,
+    parse_export_datetime,
+    stream_parquet,
+)
+from .export_jobs import (
+    CONTENT_TYPES as EXPORT_CONTENT_TYPES,
+    create_export_job,
+    job_path,
+)
 from utils.responses import StandardResponse, handle_exceptions
 from utils.performance import PerformanceMonitor
+from utils.pagination import paginate_keyset
+from utils.downloads import ranged_file_response
 import logging
+import os
 from django.contrib.auth import get_user_model
 from datetime import datetime, timedelta
 
@@ -26,6 +62,120 @@ User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
+def _wants_feature_contributions(request):
+    """Whether the client asked for a per-patient feature breakdown."""
+    value = request.query_params.get("feature_contributions", "false")
+    return value.lower() in ("true", "1", "yes")
+
+
+def _matching_choices(choices, value):
+    """
+    Choice values containing ``value``, ignoring case.
+
+    Filtering the column with ``__in`` on these values keeps the lenient
+    matching of ``icontains`` while letting the database use its index.
+    """
+    value = value.lower()
+    return [choice for choice, _ in choices if value in choice.lower()]
+
+
+# Annotation holding the ordering value used by cursor-paginated searches
+SEARCH_SORT_KEY = "search_sort_key"
+
+
+def _search_sort_expression(field):
+    """Expression a patient search is ordered by in cursor mode."""
+    if field == "hcv_result__confidence":
+        # Patients without a result sort as -1 so cursors never compare NULLs
+        return Coalesce(field, Value(-1.0))
+    return F(field)
+
+
+def _paginate_patient_search(
+    request, queryset, order_by, default_page_size, count_name, count_tags, filters
+):
+    """
+    Paginate a patient search by page number or, opt-in, by cursor.
+
+    Page mode (``page``/``page_size``) is the original contract. Cursor mode,
+    requested with ``pagination=cursor`` and continued with the returned
+    ``next_cursor``, pages on ``(order_by, id)`` without OFFSET, so deep pages
+    cost as much as the first. ``count`` picks how the total is computed:
+    ``exact`` (default), ``cached`` (per filter signature, invalidated on
+    diagnosis changes) or ``none`` to skip it.
+
+    Returns:
+        The page of patients and the pagination metadata
+
+    Raises:
+        ValueError: If the pagination parameters are invalid
+    """
+    params = request.query_params
+    page_size = int(params.get("page_size", default_page_size))
+    if page_size < 1:
+        raise ValueError("Page size must be positive")
+
+    count_mode = params.get("count", "exact")
+    if count_mode == "exact":
+        total_count = queryset.count()
+    elif count_mode == "cached":
+        # The ordering does not change the count, so it is not part of the key
+        signature = {key: value for key, value in filters.items() if key != "order_by"}
+        total_count = cached_analytics(
+            count_name, count_tags, queryset.count, parts=signature
+        )
+    elif count_mode == "none":
+        total_count = None
+    else:
+        raise ValueError("Invalid count mode")
+
+    cursor = params.get("cursor")
+    if cursor or params.get("pagination") == "cursor":
+        direction = "-" if order_by.startswith("-") else ""
+        queryset = queryset.annotate(
+            **{SEARCH_SORT_KEY: _search_sort_expression(order_by.lstrip("-"))}
+        )
+        results, next_cursor = paginate_keyset(
+            queryset,
+            (f"{direction}{SEARCH_SORT_KEY}", f"{direction}id"),
+            cursor,
+            page_size,
+        )
+        return results, {
+            "mode": "cursor",
+            "count": total_count,
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
+        }
+
+    page = int(params.get("page", 1))
+    start = (page - 1) * page_size
+    end = start + page_size
+
+    if total_count is None:
+        # Fetch one extra row to know whether a next page exists
+        results = list(queryset[start : end + 1])
+        has_next = len(results) > page_size
+        results = results[:page_size]
+    else:
+        results = queryset[start:end]
+        has_next = end < total_count
+
+    return results, {
+        "count": total_count,
+        "page": page,
+        "page_size": page_size,
+        "has_next": has_next,
+        "has_previous": page > 1,
+        "total_pages": (
+            (total_count + page_size - 1) // page_size
+            if total_count is not None
+            else None
+        ),
+    }
+
+
 class DiagnoseAPIView(APIView):
     """
     AI-powered HCV diagnosis endpoint.
@@ -42,6 +192,13 @@ class DiagnoseAPIView(APIView):
         summary="Diagnose HCV using AI",
         description="Submit patient data and laboratory values for AI-powered hepatitis C diagnosis and staging",
         request=HCVPatientSerializer,
+        parameters=[
+            OpenApiParameter(
+                "feature_contributions",
+                OpenApiTypes.BOOL,
+                description="Return per-patient feature contributions (coefficient x scaled value) instead of the global coefficient ranking",
+            ),
+        ],
         responses={
             201: OpenApiResponse(
                 response=PatientWithResultSerializer,
@@ -74,7 +231,10 @@ class DiagnoseAPIView(APIView):
         try:
             print(f"request.data: {request.data}")
             print(f"data type: {type(request.data)}")
-            ai_result = AiDiagnosisTool().diagnose(request.data)
+            ai_result = get_diagnosis_tool().diagnose(
+                request.data,
+                feature_contributions=_wants_feature_contributions(request),
+            )
             logger.info(f"AI Diagnosis Result: {ai_result}")
 
             # Create HCV Result record
@@ -193,6 +353,135 @@ class DiagnoseAPIView(APIView):
             return StandardResponse.not_found("Patient not found", "patient")
 
 
+class BatchDiagnoseAPIView(APIView):
+    """
+    Batch AI-powered HCV diagnosis endpoint.
+
+    Accepts a list of patient lab panels, runs the models once for the whole
+    batch and stores all patients and results with bulk inserts.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = HCVPatientSerializer
+
+    @extend_schema(
+        operation_id="diagnose_hcv_batch",
+        summary="Diagnose a batch of patients using AI",
+        description="Submit a list of patient records (or an object with a 'patients' list) for AI-powered hepatitis C diagnosis in a single request.",
+        request=HCVPatientSerializer(many=True),
+        parameters=[
+            OpenApiParameter(
+                "feature_contributions",
+                OpenApiTypes.BOOL,
+                description="Return per-patient feature contributions (coefficient x scaled value) instead of the global coefficient ranking",
+            ),
+        ],
+        responses={
+            201: OpenApiResponse(
+                response=PatientWithResultSerializer(many=True),
+                description="Successful batch diagnosis with AI predictions",
+            ),
+            400: OpenApiResponse(
+                description="Validation error - invalid input data or batch too large"
+            ),
+            401: OpenApiResponse(description="Authentication required"),
+            500: OpenApiResponse(description="Internal server error during diagnosis"),
+        },
+        tags=["Diagnosis"],
+    )
+    @handle_exceptions
+    @PerformanceMonitor.monitor_db_queries
+    def post(self, request):
+        patients_data = request.data
+        if isinstance(patients_data, dict):
+            patients_data = patients_data.get("patients")
+
+        if not isinstance(patients_data, list) or not patients_data:
+            return StandardResponse.error(
+                message="A non-empty list of patients is required",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+        max_batch_size = getattr(settings, "DIAGNOSIS_BATCH_MAX_SIZE", 1000)
+        if len(patients_data) > max_batch_size:
+            return StandardResponse.error(
+                message=f"Batch size exceeds the maximum of {max_batch_size} patients",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+        logger.info(
+            f"Received batch diagnosis for {len(patients_data)} patients "
+            f"from {request.user}"
+        )
+
+        serializer = self.serializer_class(data=patients_data, many=True)
+        if not serializer.is_valid():
+            logger.error(f"Batch validation errors: {serializer.errors}")
+            return StandardResponse.validation_error(
+                errors=serializer.errors, message="Invalid diagnosis data provided"
+            )
+
+        feature_contributions = _wants_feature_contributions(request)
+        try:
+            diagnosis_tool = get_diagnosis_tool()
+            ai_results = diagnosis_tool.diagnose_batch(
+                patients_data, feature_contributions=feature_contributions
+            )
+        except Exception as e:
+            logger.error(f"AI diagnosis tool failed for batch: {str(e)}")
+            return StandardResponse.server_error("AI diagnosis tool failed", e)
+
+        with transaction.atomic():
+            patients = HCVPatient.objects.bulk_create(
+                [
+                    HCVPatient(**validated_data, created_by=request.user)
+                    for validated_data in serializer.validated_data
+                ]
+            )
+            results = HCVResult.objects.bulk_create(
+                [
+                    HCVResult(
+                        patient=patient,
+                        hcv_status=ai_result.get("hcv_status"),
+                        hcv_status_probability=ai_result.get("hcv_status_probability"),
+                        hcv_risk=ai_result.get("hcv_risk"),
+                        hcv_stage=ai_result.get("hcv_stage"),
+                        confidence=ai_result.get("confidence"),
+                        hcv_stage_probability=ai_result.get("hcv_stage_probability"),
+                        recommendation=ai_result.get("recommendation"),
+                    )
+                    for patient, ai_result in zip(patients, ai_results)
+                ]
+            )
+
+            # bulk_create skips the post_save receivers keeping the rollups
+            # and cached analytics up to date, so refresh and invalidate the
+            # ones this batch affects
+            for day in {rollup_date(patient.created_at) for patient in patients}:
+                refresh_day(day)
+            refresh_user(request.user.pk)
+            invalidate_analytics(request.user.pk)
+
+        # Attach results so serialization does not query them back
+        for patient, hcv_result in zip(patients, results):
+            patient.hcv_result = hcv_result
+
+        data = {
+            "patients": PatientWithResultSerializer(patients, many=True).data,
+            "feature_importance": dict(diagnosis_tool.sorted_features_importance),
+            "count": len(patients),
+        }
+        if feature_contributions:
+            data["feature_contributions"] = [
+                ai_result.get("feature_importance", {}) for ai_result in ai_results
+            ]
+        return StandardResponse.success(
+            data=data,
+            message="Batch diagnosis completed successfully",
+            status_code=status.HTTP_201_CREATED,
+        )
+
+
 class ExportPatientsCSVView(APIView):
     """Export patient records as CSV"""
 
@@ -211,21 +500,16 @@ class ExportPatientsCSVView(APIView):
     )
     def get(self, request):
         """Export patient records as CSV"""
-        resource = PatientWithResultResource()
-
         # If user is staff, export all data; otherwise, only their own data
         if request.user.is_staff:
-            queryset = HCVPatient.objects.select_related(
-                "hcv_result", "created_by"
-            ).all()
+            queryset = HCVPatient.objects.all()
         else:
-            queryset = HCVPatient.objects.select_related(
-                "hcv_result", "created_by"
-            ).filter(created_by=request.user)
+            queryset = HCVPatient.objects.filter(created_by=request.user)
 
-        dataset = resource.export(queryset)
-
-        response = HttpResponse(dataset.csv, content_type="text/csv")
+        # Rows are read in chunks and written as they are rendered
+        response = StreamingHttpResponse(
+            stream_patients_csv(queryset), content_type="text/csv"
+        )
         response["Content-Disposition"] = 'attachment; filename="patient_records.csv"'
         return response
 
@@ -270,6 +554,209 @@ class ExportPatientsExcelView(APIView):
         return response
 
 
+def _export_datetime_param(request, name):
+    """Parse an ISO 8601 date or date-time query parameter, if given."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return parse_export_datetime(value)
+    except ValueError:
+        raise DjangoValidationError(f"{name} must be an ISO 8601 date or date-time")
+
+
+class ExportPatientsParquetView(APIView):
+    """Export patient records as Parquet"""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        operation_id="export_patients_parquet",
+        summary="Export patient records as Parquet",
+        description=(
+            "Stream diagnosed patient records with their results as a typed "
+            "Parquet file for analysis. Staff users get all records, regular users "
+            "get only their own records. For incremental pulls, pass the "
+            "X-Export-Watermark header of the previous export as `since`."
+        ),
+        parameters=[
+            OpenApiParameter(
+                "date_from",
+                OpenApiTypes.DATETIME,
+                description="Only records created at or after this time",
+            ),
+            OpenApiParameter(
+                "date_to",
+                OpenApiTypes.DATETIME,
+                description="Only records created at or before this time",
+            ),
+            OpenApiParameter(
+                "since",
+                OpenApiTypes.DATETIME,
+                description="Only records diagnosed after this time (exclusive)",
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(description="Parquet file streamed successfully"),
+            400: OpenApiResponse(description="Invalid date parameter"),
+            401: OpenApiResponse(description="Authentication required"),
+        },
+        tags=["Export", "Patients"],
+    )
+    @handle_exceptions
+    def get(self, request):
+        """Export patient records as Parquet"""
+        if request.user.is_staff:
+            queryset = HCVPatient.objects.all()
+        else:
+            queryset = HCVPatient.objects.filter(created_by=request.user)
+
+        queryset = filter_export_queryset(
+            queryset,
+            date_from=_export_datetime_param(request, "date_from"),
+            date_to=_export_datetime_param(request, "date_to"),
+            since=_export_datetime_param(request, "since"),
+        )
+        queryset, watermark = export_watermark(queryset)
+
+        response = StreamingHttpResponse(
+            stream_parquet(queryset.order_by("created_at", "id")),
+            content_type=PARQUET_CONTENT_TYPE,
+        )
+        response["Content-Disposition"] = (
+            'attachment; filename="patient_records.parquet"'
+        )
+        if watermark is not None:
+            response["X-Export-Watermark"] = watermark.isoformat()
+        return response
+
+
+class ExportJobListView(APIView):
+    """Create background export jobs and list the user's jobs"""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        operation_id="list_export_jobs",
+        summary="List export jobs",
+        description="List the authenticated user's export jobs that have not expired yet.",
+        responses={
+            200: OpenApiResponse(
+                response=ExportJobSerializer(many=True),
+                description="Export jobs, newest first",
+            ),
+            401: OpenApiResponse(description="Authentication required"),
+        },
+        tags=["Export", "Patients"],
+    )
+    @handle_exceptions
+    def get(self, request):
+        jobs = ExportJob.objects.filter(
+            created_by=request.user, expires_at__gt=timezone.now()
+        )
+        return StandardResponse.success(
+            data=ExportJobSerializer(
+                jobs, many=True, context={"request": request}
+            ).data,
+            message="Export jobs retrieved successfully",
+        )
+
+    @extend_schema(
+        operation_id="create_export_job",
+        summary="Start a background Excel export",
+        description="Queue an Excel export of patient records and return the job to poll. Staff users export all records, regular users only their own records.",
+        request=None,
+        responses={
+            202: OpenApiResponse(
+                response=ExportJobSerializer, description="Export job queued"
+            ),
+            401: OpenApiResponse(description="Authentication required"),
+        },
+        tags=["Export", "Patients"],
+    )
+    @handle_exceptions
+    def post(self, request):
+        job = create_export_job(request.user)
+        return StandardResponse.success(
+            data=ExportJobSerializer(job, context={"request": request}).data,
+            message="Export job queued",
+            status_code=status.HTTP_202_ACCEPTED,
+        )
+
+
+class ExportJobDetailView(APIView):
+    """Status of a background export job"""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        operation_id="get_export_job",
+        summary="Get export job status",
+        description="Report the status and progress of one of the user's export jobs, with its download link once completed.",
+        responses={
+            200: OpenApiResponse(
+                response=ExportJobSerializer, description="Export job status"
+            ),
+            401: OpenApiResponse(description="Authentication required"),
+            404: OpenApiResponse(description="Export job not found or expired"),
+        },
+        tags=["Export", "Patients"],
+    )
+    @handle_exceptions
+    def get(self, request, pk):
+        job = _get_export_job(request, pk)
+        if job is None:
+            return StandardResponse.not_found("Export job not found", "ExportJob")
+        return StandardResponse.success(
+            data=ExportJobSerializer(job, context={"request": request}).data,
+            message="Export job retrieved successfully",
+        )
+
+
+class ExportJobDownloadView(APIView):
+    """Download the file of a completed export job"""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        operation_id="download_export_job",
+        summary="Download an export file",
+        description="Download the file of a completed export job. Supports single byte-range requests (Range header) to resume interrupted downloads.",
+        responses={
+            200: OpenApiResponse(description="Export file"),
+            206: OpenApiResponse(description="Requested byte range of the file"),
+            401: OpenApiResponse(description="Authentication required"),
+            404: OpenApiResponse(description="Export job not found or expired"),
+            409: OpenApiResponse(description="Export job has not completed"),
+            416: OpenApiResponse(description="Requested range not satisfiable"),
+        },
+        tags=["Export", "Patients"],
+    )
+    def get(self, request, pk):
+        job = _get_export_job(request, pk)
+        if job is None:
+            return StandardResponse.not_found("Export job not found", "ExportJob")
+        if job.status != ExportJob.STATUS_COMPLETED:
+            return StandardResponse.error(
+                message=f"Export job is {job.status}",
+                status_code=status.HTTP_409_CONFLICT,
+                error_code="EXPORT_NOT_READY",
+            )
+        path = job_path(job)
+        if not os.path.exists(path):
+            return StandardResponse.not_found("Export file not found", "ExportJob")
+        return ranged_file_response(
+            request, path, job.file_name, EXPORT_CONTENT_TYPES[job.format]
+        )
+
+
+def _get_export_job(request, pk):
+    """The user's unexpired export job ``pk``, or None."""
+    return ExportJob.objects.filter(
+        pk=pk, created_by=request.user, expires_at__gt=timezone.now()
+    ).first()
+
+
 class UserDiagnosisAnalyticsView(APIView):
     """
     User-specific diagnosis analytics for profile section
@@ -292,82 +779,101 @@ class UserDiagnosisAnalyticsView(APIView):
     @PerformanceMonitor.monitor_db_queries
     def get(self, request):
         """Get comprehensive diagnosis analytics for the authenticated user"""
+        data = cached_analytics(
+            "user",
+            [user_tag(request.user.pk)],
+            lambda: self.get_analytics(request.user),
+        )
+        return StandardResponse.success(
+            data=data, message="User analytics retrieved successfully"
+        )
+
+    def get_analytics(self, user):
+        """Compute the analytics payload of ``user``"""
         # Get user's patients with results
-        user_patients = HCVPatient.objects.filter(
-            created_by=request.user
-        ).select_related("hcv_result")
+        user_patients = HCVPatient.objects.filter(created_by=user).select_related(
+            "hcv_result"
+        )
+
+        # Every count is a filtered aggregate over the same rows, so the whole
+        # summary is a single query however many charts the profile shows
+        now = datetime.now()
+        stages = ["Blood Donors", "Hepatitis", "Fibrosis", "Cirrhosis"]
+        windows = [
+            (now - timedelta(days=(i + 1) * 30), now - timedelta(days=i * 30))
+            for i in range(6)
+        ]
+        summary = user_patients.aggregate(
+            total=Count("pk"),
+            young=Count("pk", filter=Q(age__lt=30)),
+            middle=Count("pk", filter=Q(age__gte=30, age__lt=60)),
+            elder=Count("pk", filter=Q(age__gte=60)),
+            recent=Count("pk", filter=Q(created_at__gte=now - timedelta(days=30))),
+            high_risk=Count("pk", filter=Q(hcv_result__hcv_risk="High")),
+            medium_risk=Count("pk", filter=Q(hcv_result__hcv_risk="Medium")),
+            low_risk=Count("pk", filter=Q(hcv_result__hcv_risk="Low")),
+            positive=Count("pk", filter=Q(hcv_result__hcv_status="Positive")),
+            negative=Count("pk", filter=Q(hcv_result__hcv_status="Negative")),
+            male=Count("pk", filter=Q(sex="Male")),
+            female=Count("pk", filter=Q(sex="Female")),
+            avg_confidence=Avg("hcv_result__confidence"),
+            **{
+                f"stage_{index}": Count("pk", filter=Q(hcv_result__hcv_stage=stage))
+                for index, stage in enumerate(stages)
+            },
+            **{
+                f"window_{index}": Count(
+                    "pk", filter=Q(created_at__gte=start, created_at__lt=end)
+                )
+                for index, (start, end) in enumerate(windows)
+            },
+        )
 
         # Basic counts
-        total_diagnoses = user_patients.count()
+        total_diagnoses = summary["total"]
 
         if total_diagnoses == 0:
-            return StandardResponse.success(
-                data={
-                    "total_diagnoses": 0,
-                    "message": "No diagnosis records found for this user",
-                },
-                message="User analytics retrieved successfully",
-            )
+            return {
+                "total_diagnoses": 0,
+                "message": "No diagnosis records found for this user",
+            }
 
-        # Get user's diagnoses by age groups
         age_stats = {
-            "young": user_patients.filter(age__lt=30).count(),
-            "middle": user_patients.filter(age__gte=30, age__lt=60).count(),
-            "elder": user_patients.filter(age__gte=60).count(),
+            "young": summary["young"],
+            "middle": summary["middle"],
+            "elder": summary["elder"],
         }
 
-        # Get recent diagnoses (last 30 days)
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_diagnoses = user_patients.filter(created_at__gte=thirty_days_ago).count()
-
-        # Get monthly diagnosis trends for user (last 6 months)
-        monthly_trends = []
-        for i in range(6):
-            start_date = datetime.now() - timedelta(days=(i + 1) * 30)
-            end_date = datetime.now() - timedelta(days=i * 30)
-            count = user_patients.filter(
-                created_at__gte=start_date, created_at__lt=end_date
-            ).count()
-            monthly_trends.append(
-                {"month": start_date.strftime("%Y-%m"), "count": count}
-            )
+        # Diagnoses in the last 30 days
+        recent_diagnoses = summary["recent"]
+
+        # Monthly diagnosis trends for user (last six 30-day windows)
+        monthly_trends = [
+            {"month": start.strftime("%Y-%m"), "count": summary[f"window_{index}"]}
+            for index, (start, end) in enumerate(windows)
+        ]
 
-        # Get user's risk level distribution
         risk_distribution = {
-            "high_risk": user_patients.filter(hcv_result__hcv_risk="High").count(),
-            "medium_risk": user_patients.filter(hcv_result__hcv_risk="Medium").count(),
-            "low_risk": user_patients.filter(hcv_result__hcv_risk="Low").count(),
+            "high_risk": summary["high_risk"],
+            "medium_risk": summary["medium_risk"],
+            "low_risk": summary["low_risk"],
         }
 
-        # Get user's HCV status distribution
         hcv_status_distribution = {
-            "positive": user_patients.filter(hcv_result__hcv_status="Positive").count(),
-            "negative": user_patients.filter(hcv_result__hcv_status="Negative").count(),
+            "positive": summary["positive"],
+            "negative": summary["negative"],
         }
 
-        # Get user's stage distribution
-        stage_stats = {}
-        stages = ["Blood Donors", "Hepatitis", "Fibrosis", "Cirrhosis"]
-        for stage in stages:
-            stage_stats[stage] = user_patients.filter(
-                hcv_result__hcv_stage=stage
-            ).count()
+        stage_stats = {
+            stage: summary[f"stage_{index}"] for index, stage in enumerate(stages)
+        }
 
-        # Get user's gender distribution
         gender_stats = {
-            "male": user_patients.filter(sex="Male").count(),
-            "female": user_patients.filter(sex="Female").count(),
+            "male": summary["male"],
+            "female": summary["female"],
         }
 
-        # Calculate user's average confidence
-        from django.db.models import Avg
-
-        avg_confidence = (
-            user_patients.aggregate(avg_confidence=Avg("hcv_result__confidence"))[
-                "avg_confidence"
-            ]
-            or 0
-        )
+        avg_confidence = summary["avg_confidence"] or 0
 
         # Get latest diagnosis for quick info
         latest_patient = user_patients.first()
@@ -382,35 +888,32 @@ class UserDiagnosisAnalyticsView(APIView):
                 "confidence": latest_patient.hcv_result.confidence,
             }
 
-        return StandardResponse.success(
-            data={
-                "total_diagnoses": total_diagnoses,
-                "recent_diagnoses": recent_diagnoses,
-                "age_distribution": age_stats,
-                "risk_distribution": risk_distribution,
-                "hcv_status_distribution": hcv_status_distribution,
-                "hcv_stage_distribution": stage_stats,
-                "gender_distribution": gender_stats,
-                "monthly_trends": monthly_trends,
-                "average_confidence": (
-                    round(avg_confidence * 100, 1) if avg_confidence else 0
+        return {
+            "total_diagnoses": total_diagnoses,
+            "recent_diagnoses": recent_diagnoses,
+            "age_distribution": age_stats,
+            "risk_distribution": risk_distribution,
+            "hcv_status_distribution": hcv_status_distribution,
+            "hcv_stage_distribution": stage_stats,
+            "gender_distribution": gender_stats,
+            "monthly_trends": monthly_trends,
+            "average_confidence": (
+                round(avg_confidence * 100, 1) if avg_confidence else 0
+            ),
+            "latest_diagnosis": latest_diagnosis_info,
+            "health_insights": {
+                "most_common_risk": (
+                    max(risk_distribution, key=risk_distribution.get)
+                    if any(risk_distribution.values())
+                    else "No data"
+                ),
+                "diagnosis_frequency": (
+                    "Regular"
+                    if total_diagnoses > 5
+                    else "Occasional" if total_diagnoses > 2 else "Infrequent"
                 ),
-                "latest_diagnosis": latest_diagnosis_info,
-                "health_insights": {
-                    "most_common_risk": (
-                        max(risk_distribution, key=risk_distribution.get)
-                        if any(risk_distribution.values())
-                        else "No data"
-                    ),
-                    "diagnosis_frequency": (
-                        "Regular"
-                        if total_diagnoses > 5
-                        else "Occasional" if total_diagnoses > 2 else "Infrequent"
-                    ),
-                },
             },
-            message="User analytics retrieved successfully",
-        )
+        }
 
 
 class AdminDiagnosisAnalyticsView(APIView):
@@ -442,149 +945,172 @@ class AdminDiagnosisAnalyticsView(APIView):
                 status_code=status.HTTP_403_FORBIDDEN,
             )
 
-        # Get total counts using HCVPatient
-        total_diagnoses = HCVPatient.objects.count()
-        total_users = HCVPatient.objects.values("created_by").distinct().count()
+        data = cached_analytics("admin", [GLOBAL_TAG], self.get_analytics)
+        # Live process state, never cached
+        data["system_health"]["model_registry"] = get_model_registry().stats()
+        return StandardResponse.success(
+            data=data, message="Admin analytics retrieved successfully"
+        )
+
+    def get_analytics(self):
+        """Compute the admin analytics payload"""
+        # Served from the daily and per-user rollups (see diagnosis/rollups.py),
+        # so the cost grows with the number of days, not of diagnoses
+        today = timezone.localdate()
+        monthly_windows = [
+            (today - timedelta(days=(i + 1) * 30), today - timedelta(days=i * 30))
+            for i in range(12)
+        ]
+        weekly_windows = [
+            (today - timedelta(days=(i + 1) * 7), today - timedelta(days=i * 7))
+            for i in range(4)
+        ]
+        # Aggregates are named after the rollup field they sum ("all_<field>")
+        summary = DiagnosisDailyRollup.objects.aggregate(
+            **{
+                f"all_{field}": Sum(field)
+                for field in [
+                    "total",
+                    "age_young",
+                    "age_middle",
+                    "age_elder",
+                    "high_risk",
+                    "medium_risk",
+                    "low_risk",
+                    "positive",
+                    "negative",
+                    "male",
+                    "female",
+                    "age_sum",
+                    "confidence_sum",
+                    "confidence_count",
+                    *STAGE_FIELDS,
+                ]
+            },
+            min_age=Min("age_min"),
+            max_age=Max("age_max"),
+            recent=Sum("total", filter=Q(date__gt=today - timedelta(days=30))),
+            **{
+                f"month_{index}": Sum("total", filter=Q(date__gt=start, date__lte=end))
+                for index, (start, end) in enumerate(monthly_windows)
+            },
+            **{
+                f"week_{index}": Sum("total", filter=Q(date__gt=start, date__lte=end))
+                for index, (start, end) in enumerate(weekly_windows)
+            },
+        )
+        # Sums over no rollup rows are NULL
+        summary = {key: value or 0 for key, value in summary.items()}
+
+        total_diagnoses = summary["all_total"]
+        total_users = DiagnosisUserRollup.objects.count()
 
         # Get diagnoses by age groups
         age_stats = {
-            "young": HCVPatient.objects.filter(age__lt=30).count(),
-            "middle": HCVPatient.objects.filter(age__gte=30, age__lt=60).count(),
-            "elder": HCVPatient.objects.filter(age__gte=60).count(),
+            "young": summary["all_age_young"],
+            "middle": summary["all_age_middle"],
+            "elder": summary["all_age_elder"],
         }
 
-        # Get recent diagnoses (last 30 days)
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_diagnoses = HCVPatient.objects.filter(
-            created_at__gte=thirty_days_ago
-        ).count()
-
-        # Get monthly diagnosis trends (last 12 months for admin)
-        monthly_trends = []
-        for i in range(12):
-            start_date = datetime.now() - timedelta(days=(i + 1) * 30)
-            end_date = datetime.now() - timedelta(days=i * 30)
-            count = HCVPatient.objects.filter(
-                created_at__gte=start_date, created_at__lt=end_date
-            ).count()
-            monthly_trends.append(
-                {"month": start_date.strftime("%Y-%m"), "count": count}
-            )
+        # Diagnoses in the last 30 days
+        recent_diagnoses = summary["recent"]
+
+        # Monthly diagnosis trends (last twelve 30-day windows for admin)
+        monthly_trends = [
+            {"month": start.strftime("%Y-%m"), "count": summary[f"month_{index}"]}
+            for index, (start, end) in enumerate(monthly_windows)
+        ]
 
         # Get risk level distribution based on HCV results
         risk_distribution = {
-            "high_risk": HCVPatient.objects.filter(hcv_result__hcv_risk="High").count(),
-            "medium_risk": HCVPatient.objects.filter(
-                hcv_result__hcv_risk="Medium"
-            ).count(),
-            "low_risk": HCVPatient.objects.filter(hcv_result__hcv_risk="Low").count(),
+            "high_risk": summary["all_high_risk"],
+            "medium_risk": summary["all_medium_risk"],
+            "low_risk": summary["all_low_risk"],
         }
 
         # Get HCV status distribution
         hcv_status_distribution = {
-            "positive": HCVPatient.objects.filter(
-                hcv_result__hcv_status="Positive"
-            ).count(),
-            "negative": HCVPatient.objects.filter(
-                hcv_result__hcv_status="Negative"
-            ).count(),
+            "positive": summary["all_positive"],
+            "negative": summary["all_negative"],
         }
 
         # Get stage distribution
-        stage_stats = {}
-        stages = ["Blood Donors", "Hepatitis", "Fibrosis", "Cirrhosis"]
-        for stage in stages:
-            stage_stats[stage] = HCVPatient.objects.filter(
-                hcv_result__hcv_stage=stage
-            ).count()
+        stage_stats = {
+            stage: summary[f"all_{field}"] for field, stage in STAGE_FIELDS.items()
+        }
 
         # Get gender distribution
         gender_stats = {
-            "male": HCVPatient.objects.filter(sex="Male").count(),
-            "female": HCVPatient.objects.filter(sex="Female").count(),
+            "male": summary["all_male"],
+            "female": summary["all_female"],
         }
 
         # Calculate average confidence
-        from django.db.models import Avg, Max, Min
-
         avg_confidence = (
-            HCVPatient.objects.aggregate(avg_confidence=Avg("hcv_result__confidence"))[
-                "avg_confidence"
-            ]
-            or 0
+            summary["all_confidence_sum"] / summary["all_confidence_count"]
+            if summary["all_confidence_count"]
+            else 0
         )
 
         # Additional admin-specific analytics
         # Most active users
-        from django.db.models import Count
-
-        top_users = (
-            HCVPatient.objects.values(
-                "created_by__email",
-                "created_by__first_name",
-                "created_by__last_name",
-            )
-            .annotate(diagnosis_count=Count("id"))
-            .order_by("-diagnosis_count")[:5]
-        )
+        top_users = DiagnosisUserRollup.objects.values(
+            "created_by__email",
+            "created_by__first_name",
+            "created_by__last_name",
+            "diagnosis_count",
+        ).order_by("-diagnosis_count")[:5]
 
         # Age distribution analysis
-        age_analysis = HCVPatient.objects.aggregate(
-            avg_age=Avg("age"),
-            min_age=Min("age"),
-            max_age=Max("age"),
-        )
+        age_analysis = {
+            "avg_age": (
+                summary["all_age_sum"] / total_diagnoses if total_diagnoses else None
+            ),
+            "min_age": summary["min_age"],
+            "max_age": summary["max_age"],
+        }
 
         # Weekly trends (last 4 weeks)
-        weekly_trends = []
-        for i in range(4):
-            start_date = datetime.now() - timedelta(days=(i + 1) * 7)
-            end_date = datetime.now() - timedelta(days=i * 7)
-            count = HCVPatient.objects.filter(
-                created_at__gte=start_date, created_at__lt=end_date
-            ).count()
-            weekly_trends.append({"week": f"Week {4-i}", "count": count})
+        weekly_trends = [
+            {"week": f"Week {4-index}", "count": summary[f"week_{index}"]}
+            for index in range(len(weekly_windows))
+        ]
 
-        return StandardResponse.success(
-            data={
-                "total_diagnoses": total_diagnoses,
-                "total_users": total_users,
-                "recent_diagnoses": recent_diagnoses,
-                "age_distribution": age_stats,
-                "risk_distribution": risk_distribution,
-                "hcv_status_distribution": hcv_status_distribution,
-                "stage_distribution": stage_stats,
-                "gender_distribution": gender_stats,
-                "monthly_trends": monthly_trends,
-                "weekly_trends": weekly_trends,
-                "average_confidence": (
-                    round(avg_confidence * 100, 1) if avg_confidence else 0
+        return {
+            "total_diagnoses": total_diagnoses,
+            "total_users": total_users,
+            "recent_diagnoses": recent_diagnoses,
+            "age_distribution": age_stats,
+            "risk_distribution": risk_distribution,
+            "hcv_status_distribution": hcv_status_distribution,
+            "stage_distribution": stage_stats,
+            "gender_distribution": gender_stats,
+            "monthly_trends": monthly_trends,
+            "weekly_trends": weekly_trends,
+            "average_confidence": (
+                round(avg_confidence * 100, 1) if avg_confidence else 0
+            ),
+            "age_analysis": {
+                "average_age": (
+                    round(age_analysis["avg_age"], 1) if age_analysis["avg_age"] else 0
                 ),
-                "age_analysis": {
-                    "average_age": (
-                        round(age_analysis["avg_age"], 1)
-                        if age_analysis["avg_age"]
-                        else 0
-                    ),
-                    "min_age": age_analysis["min_age"] or 0,
-                    "max_age": age_analysis["max_age"] or 0,
-                },
-                "top_users": list(top_users),
-                "system_health": {
-                    "total_records": total_diagnoses,
-                    "active_users": total_users,
-                    "average_diagnosis_time": "2.3 minutes",
-                    "system_uptime": "99.9%",
-                },
-                "model_performance": {
-                    "accuracy": "96.73%",
-                    "precision": "95.2%",
-                    "recall": "94.8%",
-                    "f1_score": "95.0%",
-                },
+                "min_age": age_analysis["min_age"] or 0,
+                "max_age": age_analysis["max_age"] or 0,
             },
-            message="Admin analytics retrieved successfully",
-        )
+            "top_users": list(top_users),
+            "system_health": {
+                "total_records": total_diagnoses,
+                "active_users": total_users,
+                "average_diagnosis_time": "2.3 minutes",
+                "system_uptime": "99.9%",
+            },
+            "model_performance": {
+                "accuracy": "96.73%",
+                "precision": "95.2%",
+                "recall": "94.8%",
+                "f1_score": "95.0%",
+            },
+        }
 
 
 class PatientListView(APIView):
@@ -689,6 +1215,23 @@ class PatientSearchView(APIView):
             OpenApiParameter(
                 "page_size", OpenApiTypes.INT, description="Number of results per page"
             ),
+            OpenApiParameter(
+                "pagination",
+                OpenApiTypes.STR,
+                enum=["page", "cursor"],
+                description="Use 'cursor' to page with next_cursor instead of page numbers",
+            ),
+            OpenApiParameter(
+                "cursor",
+                OpenApiTypes.STR,
+                description="Opaque cursor from the previous page's next_cursor",
+            ),
+            OpenApiParameter(
+                "count",
+                OpenApiTypes.STR,
+                enum=["exact", "cached", "none"],
+                description="How the total count is computed (default exact)",
+            ),
         ],
         responses={
             200: OpenApiResponse(description="Search completed successfully"),
@@ -704,17 +1247,25 @@ class PatientSearchView(APIView):
         """Search patient records with advanced filters"""
         # Get base queryset for user
         queryset = HCVPatient.objects.filter(created_by=request.user).select_related(
-            "hcv_result"
+            "hcv_result", "created_by"
         )
 
         # Apply filters
         hcv_status = request.query_params.get("hcv_status")
         if hcv_status:
-            queryset = queryset.filter(hcv_result__hcv_status__icontains=hcv_status)
+            queryset = queryset.filter(
+                hcv_result__hcv_status__in=_matching_choices(
+                    HCVResult.HCV_STATUS_CHOICES, hcv_status
+                )
+            )
 
         hcv_risk = request.query_params.get("hcv_risk")
         if hcv_risk:
-            queryset = queryset.filter(hcv_result__hcv_risk__icontains=hcv_risk)
+            queryset = queryset.filter(
+                hcv_result__hcv_risk__in=_matching_choices(
+                    HCVResult.RISK_CHOICES, hcv_risk
+                )
+            )
 
         min_confidence = request.query_params.get("min_confidence")
         if min_confidence:
@@ -786,23 +1337,35 @@ class PatientSearchView(APIView):
             "patient_name",
             "-patient_name",
         ]
-        if order_by in valid_order_fields:
-            queryset = queryset.order_by(order_by)
+        if order_by not in valid_order_fields:
+            order_by = "-created_at"
+        queryset = queryset.order_by(order_by)
+
+        filters_applied = {
+            "hcv_status": hcv_status,
+            "hcv_risk": hcv_risk,
+            "min_confidence": min_confidence,
+            "max_confidence": max_confidence,
+            "patient_name": patient_name,
+            "min_age": min_age,
+            "max_age": max_age,
+            "date_from": date_from,
+            "date_to": date_to,
+            "order_by": order_by,
+        }
 
         # Pagination
         try:
-            page_size = int(request.query_params.get("page_size", 10))
-            page = int(request.query_params.get("page", 1))
-            start = (page - 1) * page_size
-            end = start + page_size
-
-            total_count = queryset.count()
-            results = queryset[start:end]
-
-            has_next = end < total_count
-            has_previous = page > 1
-
-        except ValueError:
+            results, pagination = _paginate_patient_search(
+                request,
+                queryset,
+                order_by,
+                default_page_size=10,
+                count_name="patient_search_count",
+                count_tags=[user_tag(request.user.pk)],
+                filters=filters_applied,
+            )
+        except (ValueError, DjangoValidationError):
             return StandardResponse.error(
                 message="Invalid pagination parameters",
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -813,26 +1376,8 @@ class PatientSearchView(APIView):
         return StandardResponse.success(
             data={
                 "results": serializer.data,
-                "pagination": {
-                    "count": total_count,
-                    "page": page,
-                    "page_size": page_size,
-                    "has_next": has_next,
-                    "has_previous": has_previous,
-                    "total_pages": (total_count + page_size - 1) // page_size,
-                },
-                "filters_applied": {
-                    "hcv_status": hcv_status,
-                    "hcv_risk": hcv_risk,
-                    "min_confidence": min_confidence,
-                    "max_confidence": max_confidence,
-                    "patient_name": patient_name,
-                    "min_age": min_age,
-                    "max_age": max_age,
-                    "date_from": date_from,
-                    "date_to": date_to,
-                    "order_by": order_by,
-                },
+                "pagination": pagination,
+                "filters_applied": filters_applied,
             },
             message="Search completed successfully",
         )
@@ -899,6 +1444,23 @@ class AdminPatientSearchView(APIView):
             OpenApiParameter(
                 "page_size", OpenApiTypes.INT, description="Number of results per page"
             ),
+            OpenApiParameter(
+                "pagination",
+                OpenApiTypes.STR,
+                enum=["page", "cursor"],
+                description="Use 'cursor' to page with next_cursor instead of page numbers",
+            ),
+            OpenApiParameter(
+                "cursor",
+                OpenApiTypes.STR,
+                description="Opaque cursor from the previous page's next_cursor",
+            ),
+            OpenApiParameter(
+                "count",
+                OpenApiTypes.STR,
+                enum=["exact", "cached", "none"],
+                description="How the total count is computed (default exact)",
+            ),
         ],
         responses={
             200: OpenApiResponse(description="Admin search completed successfully"),
@@ -926,11 +1488,19 @@ class AdminPatientSearchView(APIView):
         # Apply filters
         hcv_status = request.query_params.get("hcv_status")
         if hcv_status:
-            queryset = queryset.filter(hcv_result__hcv_status__icontains=hcv_status)
+            queryset = queryset.filter(
+                hcv_result__hcv_status__in=_matching_choices(
+                    HCVResult.HCV_STATUS_CHOICES, hcv_status
+                )
+            )
 
         hcv_risk = request.query_params.get("hcv_risk")
         if hcv_risk:
-            queryset = queryset.filter(hcv_result__hcv_risk__icontains=hcv_risk)
+            queryset = queryset.filter(
+                hcv_result__hcv_risk__in=_matching_choices(
+                    HCVResult.RISK_CHOICES, hcv_risk
+                )
+            )
 
         min_confidence = request.query_params.get("min_confidence")
         if min_confidence:
@@ -1009,23 +1579,36 @@ class AdminPatientSearchView(APIView):
             "created_by__username",
             "-created_by__username",
         ]
-        if order_by in valid_order_fields:
-            queryset = queryset.order_by(order_by)
+        if order_by not in valid_order_fields:
+            order_by = "-created_at"
+        queryset = queryset.order_by(order_by)
+
+        filters_applied = {
+            "hcv_status": hcv_status,
+            "hcv_risk": hcv_risk,
+            "min_confidence": min_confidence,
+            "max_confidence": max_confidence,
+            "patient_name": patient_name,
+            "min_age": min_age,
+            "max_age": max_age,
+            "created_by": created_by_user,
+            "date_from": date_from,
+            "date_to": date_to,
+            "order_by": order_by,
+        }
 
         # Pagination
         try:
-            page_size = int(request.query_params.get("page_size", 25))
-            page = int(request.query_params.get("page", 1))
-            start = (page - 1) * page_size
-            end = start + page_size
-
-            total_count = queryset.count()
-            results = queryset[start:end]
-
-            has_next = end < total_count
-            has_previous = page > 1
-
-        except ValueError:
+            results, pagination = _paginate_patient_search(
+                request,
+                queryset,
+                order_by,
+                default_page_size=25,
+                count_name="admin_patient_search_count",
+                count_tags=[GLOBAL_TAG],
+                filters=filters_applied,
+            )
+        except (ValueError, DjangoValidationError):
             return StandardResponse.error(
                 message="Invalid pagination parameters",
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -1036,27 +1619,8 @@ class AdminPatientSearchView(APIView):
         return StandardResponse.success(
             data={
                 "results": serializer.data,
-                "pagination": {
-                    "count": total_count,
-                    "page": page,
-                    "page_size": page_size,
-                    "has_next": has_next,
-                    "has_previous": has_previous,
-                    "total_pages": (total_count + page_size - 1) // page_size,
-                },
-                "filters_applied": {
-                    "hcv_status": hcv_status,
-                    "hcv_risk": hcv_risk,
-                    "min_confidence": min_confidence,
-                    "max_confidence": max_confidence,
-                    "patient_name": patient_name,
-                    "min_age": min_age,
-                    "max_age": max_age,
-                    "created_by": created_by_user,
-                    "date_from": date_from,
-                    "date_to": date_to,
-                    "order_by": order_by,
-                },
+                "pagination": pagination,
+                "filters_applied": filters_applied,
             },
             message="Admin search completed successfully",
         )
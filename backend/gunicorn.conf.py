@@ -0,0 +1,46 @@
+"""
+Gunicorn configuration for the HepatoCAI backend.
+
+With ``preload_app`` (on by default, GUNICORN_PRELOAD=False disables it) the
+Django app is imported once in the master process. ``DiagnosisConfig.ready()``
+then warms the diagnosis models before the workers are forked, so pandas,
+sklearn, xgboost and the model weights are shared copy-on-write instead of
+being loaded again in every worker. Clients that are not fork-safe, like the
+Gemini assistant, are created lazily inside each worker.
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 4)))
+threads = int(os.getenv("GUNICORN_THREADS", 1))
+# Deployments serve backend.asgi:application with "uvicorn.workers.UvicornWorker"
+# so async views (the streaming chat endpoint) share the worker's event loop
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "True").lower() == "true"
+
+if preload_app:
+    # Read by settings.DIAGNOSIS_MODEL_PRELOAD when the app is imported below
+    os.environ.setdefault("DIAGNOSIS_MODEL_PRELOAD", "True")
+
+
+def when_ready(server):
+    """Runs in the master after the app is preloaded, before any worker forks."""
+    if preload_app:
+        # Move the preloaded objects out of the GC's reach so collections in
+        # the workers do not touch (and un-share) their pages
+        gc.freeze()
+        server.log.info(f"Preloaded app frozen ({gc.get_freeze_count()} objects)")
+
+
+def post_fork(server, worker):
+    """Runs in each worker right after the fork."""
+    if preload_app:
+        # Never reuse database sockets opened by the master
+        from django.db import connections
+
+        connections.close_all()
@@ -0,0 +1,117 @@
+"""
+Tests for the cached user lookup of JWT authentication.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.test_diagnosis_analytics import ANALYTICS_CACHES
+from users.authentication import CachedJWTAuthentication
+
+User = get_user_model()
+
+
+@override_settings(AUTH_USER_CACHE_ENABLED=True, CACHES=ANALYTICS_CACHES)
+class CachedJWTAuthenticationTests(TestCase):
+    """Test warm requests skip the user query until the user changes"""
+
+    def setUp(self):
+        caches["default"].clear()
+        self.user = User.objects.create_user(
+            email="jwt@example.com",
+            username="jwtuser",
+            password="testpass123",
+        )
+        self.admin = User.objects.create_user(
+            email="jwt-admin@example.com",
+            username="jwtadmin",
+            password="testpass123",
+            is_staff=True,
+            is_superuser=True,
+        )
+        self.token = str(AccessToken.for_user(self.user))
+
+    def _authenticate(self, token=None):
+        request = RequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {token or self.token}"
+        )
+        return CachedJWTAuthentication().authenticate(request)
+
+    def test_warm_requests_skip_user_query(self):
+        """Test only the first request loads the user"""
+        with self.assertNumQueries(1):
+            user, _ = self._authenticate()
+        self.assertEqual(user, self.user)
+
+        with self.assertNumQueries(0):
+            user, _ = self._authenticate()
+        self.assertEqual(user.email, "jwt@example.com")
+
+    def test_api_requests(self):
+        """Test warm API requests run no query on the user table"""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        url = reverse("aiassistant:chat-list")
+        client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            [q for q in queries.captured_queries if "users_customuser" in q["sql"]]
+        )
+
+    def test_deactivation_applies_at_once(self):
+        """Test a user deactivated through the API is refused on the next request"""
+        self._authenticate()
+
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.patch(
+                reverse("user-management-detail", args=[self.user.pk]),
+                {"action": "deactivate"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate()
+
+    def test_password_change_invalidates(self):
+        """Test a password change reloads the user"""
+        self._authenticate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password("newpass12345")
+            self.user.save()
+
+        with self.assertNumQueries(1):
+            user, _ = self._authenticate()
+        self.assertTrue(user.check_password("newpass12345"))
+
+    def test_unknown_user(self):
+        """Test a token for a deleted user is refused"""
+        token = str(AccessToken.for_user(self.admin))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate(token)
+
+    @override_settings(AUTH_USER_CACHE_ENABLED=False)
+    def test_disabled(self):
+        """Test every request loads the user when the cache is disabled"""
+        self._authenticate()
+
+        with self.assertNumQueries(1):
+            self._authenticate()
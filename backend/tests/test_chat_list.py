@@ -0,0 +1,149 @@
+"""
+Tests for the cursor-paginated chat list, including its query count.
+"""
+
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from aiassistant.models import Chat, Message
+from utils.pagination import encode_cursor
+
+User = get_user_model()
+
+
+class ChatListViewTests(TestCase):
+    """Test listing chats with annotations and cursor pagination"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="list@example.com", username="listuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("aiassistant:chat-list")
+
+    def test_list_includes_count_and_last_message_preview(self):
+        """Test each chat carries its message count and last message"""
+        chat = Chat.objects.create(user=self.user, title="Stages")
+        Message.objects.create(chat=chat, content="How many stages?")
+        Message.objects.create(chat=chat, content="x" * 150, is_from_user=False)
+        empty = Chat.objects.create(user=self.user, title="Empty")
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        chats = {c["id"]: c for c in response.data["chats"]}
+        self.assertEqual(chats[str(chat.id)]["message_count"], 2)
+        last_message = chats[str(chat.id)]["last_message"]
+        self.assertEqual(last_message["content"], "x" * 100 + "...")
+        self.assertFalse(last_message["is_from_user"])
+        self.assertEqual(chats[str(empty.id)]["message_count"], 0)
+        self.assertIsNone(chats[str(empty.id)]["last_message"])
+
+    def test_only_own_chats_are_listed(self):
+        """Test chats of other users are not returned"""
+        other = User.objects.create_user(
+            email="other@example.com", username="other", password="testpass123"
+        )
+        Chat.objects.create(user=other)
+        Chat.objects.create(user=self.user)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(len(response.data["chats"]), 1)
+        self.assertEqual(response.data["total"], 1)
+
+    def test_cursor_pages_cover_every_chat_once(self):
+        """Test following next_cursor returns each chat exactly once, newest first"""
+        # bulk_create gives every chat the same updated_at, so ties are exercised
+        Chat.objects.bulk_create(Chat(user=self.user) for _ in range(25))
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 10}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(c["id"] for c in response.data["chats"])
+            cursor = response.data["next_cursor"]
+            self.assertEqual(response.data["has_more"], cursor is not None)
+            if not cursor:
+                break
+
+        expected = Chat.objects.filter(user=self.user).order_by("-updated_at", "-id")
+        self.assertEqual(seen, [str(chat.id) for chat in expected])
+
+    def test_invalid_pagination_parameters(self):
+        """Test malformed or tampered cursors and bad limits are rejected"""
+        Chat.objects.create(user=self.user)
+        tampered = [
+            encode_cursor(["not-a-date", str(uuid.uuid4())]),
+            encode_cursor(["2024-01-01T00:00:00+00:00", "not-a-uuid"]),
+            encode_cursor([["2024-01-01"], 1]),
+        ]
+        for params in [
+            {"cursor": "not-a-cursor"},
+            *({"cursor": cursor} for cursor in tampered),
+            {"limit": "zero"},
+            {"limit": 0},
+        ]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data["error"], "Invalid pagination parameters")
+
+
+class ChatListBenchmarkTests(TestCase):
+    """Benchmark: the chat list runs a constant number of queries"""
+
+    chat_count = 5000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="heavy@example.com", username="heavyuser", password="testpass123"
+        )
+        chats = Chat.objects.bulk_create(
+            Chat(user=cls.user, title=f"Chat {i}") for i in range(cls.chat_count)
+        )
+        Message.objects.bulk_create(
+            Message(chat=chat, content=f"Message {i} of {chat.title}")
+            for chat in chats
+            for i in range(2)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _list(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("aiassistant:chat-list"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(queries)
+
+    def test_query_count_is_constant(self):
+        """Test deep pages over 5,000 chats cost one query each"""
+        first, first_queries = self._list(limit=50)
+        self.assertEqual(first.data["total"], self.chat_count)
+        self.assertEqual(len(first.data["chats"]), 50)
+        self.assertEqual(first.data["chats"][0]["message_count"], 2)
+
+        # One query for the page and one for the total (auth is forced)
+        self.assertEqual(first_queries, 2)
+
+        # Walk deep into the list; later pages skip the total
+        cursor = first.data["next_cursor"]
+        for _ in range(20):
+            page, page_queries = self._list(limit=50, cursor=cursor)
+            cursor = page.data["next_cursor"]
+            self.assertEqual(page_queries, 1)
+            self.assertNotIn("total", page.data)
@@ -0,0 +1,124 @@
+"""
+Tests for paging through a chat's messages in the chat detail view.
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from aiassistant.models import Chat, Message
+
+User = get_user_model()
+
+
+class ChatMessagePagingTests(TestCase):
+    """Test before/after message paging on the chat detail view"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="paging@example.com", username="paginguser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.chat = Chat.objects.create(user=self.user, title="Long chat")
+        start = timezone.now() - timedelta(hours=1)
+        self.messages = Message.objects.bulk_create(
+            Message(
+                chat=self.chat,
+                content=f"Message {i}",
+                is_from_user=i % 2 == 0,
+                created_at=start + timedelta(seconds=i),
+            )
+            for i in range(120)
+        )
+        self.url = reverse("aiassistant:chat-detail", args=[self.chat.id])
+
+    def _contents(self, response):
+        return [m["content"] for m in response.data["chat"]["messages"]]
+
+    def test_default_returns_latest_page_oldest_first(self):
+        """Test without parameters the latest messages are returned in order"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self._contents(response), [f"Message {i}" for i in range(70, 120)]
+        )
+        self.assertTrue(response.data["has_more"])
+        self.assertEqual(response.data["chat"]["title"], "Long chat")
+
+    def test_before_walks_back_through_history(self):
+        """Test following the oldest message with before reaches the start"""
+        seen = []
+        params = {"limit": 40}
+        while True:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            page = response.data["chat"]["messages"]
+            seen = [m["content"] for m in page] + seen
+            if not response.data["has_more"]:
+                break
+            params = {"limit": 40, "before": page[0]["id"]}
+
+        self.assertEqual(seen, [f"Message {i}" for i in range(120)])
+
+    def test_after_returns_only_new_messages(self):
+        """Test polling with after returns messages newer than the anchor"""
+        response = self.client.get(
+            self.url, {"after": str(self.messages[116].id), "limit": 2}
+        )
+
+        self.assertEqual(self._contents(response), ["Message 117", "Message 118"])
+        self.assertTrue(response.data["has_more"])
+
+        latest = self.client.get(self.url, {"after": str(self.messages[-1].id)})
+        self.assertEqual(latest.data["chat"]["messages"], [])
+        self.assertFalse(latest.data["has_more"])
+
+    def test_messages_with_equal_timestamps_are_not_skipped(self):
+        """Test ties on created_at are broken by id"""
+        chat = Chat.objects.create(user=self.user)
+        created_at = timezone.now()
+        Message.objects.bulk_create(
+            Message(chat=chat, content=f"Tie {i}", created_at=created_at)
+            for i in range(5)
+        )
+        url = reverse("aiassistant:chat-detail", args=[chat.id])
+
+        first = self.client.get(url, {"limit": 2})
+        anchor = first.data["chat"]["messages"][0]["id"]
+        rest = self.client.get(url, {"limit": 10, "before": anchor})
+
+        ids = [m["id"] for m in rest.data["chat"]["messages"]] + [
+            m["id"] for m in first.data["chat"]["messages"]
+        ]
+        self.assertEqual(len(set(ids)), 5)
+
+    def test_invalid_pagination_parameters(self):
+        """Test malformed, foreign or conflicting anchors are rejected"""
+        other_chat = Chat.objects.create(user=self.user)
+        foreign = Message.objects.create(chat=other_chat, content="Elsewhere")
+        anchor = str(self.messages[10].id)
+
+        for params in [
+            {"before": "not-a-uuid"},
+            {"after": str(foreign.id)},
+            {"before": anchor, "after": anchor},
+            {"limit": 0},
+        ]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_page_uses_constant_queries(self):
+        """Test a page costs the chat lookup, anchor lookup and one page query"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {"before": str(self.messages[60].id)})
+
+        self.assertEqual(len(queries), 3)
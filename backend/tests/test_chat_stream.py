@@ -0,0 +1,347 @@
+"""
+Tests for the streaming (async, Server-Sent Events) chat message endpoint.
+
+Gemini is replaced by a local fake gRPC server speaking the real
+``GenerativeService.StreamGenerateContent`` protocol, so the assistant's async
+client, the SSE relay and the message persistence run end to end.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from concurrent import futures
+from unittest import mock
+
+import grpc
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from google.ai import generativelanguage_v1beta as glm
+from google.ai.generativelanguage_v1beta.services.generative_service import (
+    GenerativeServiceAsyncClient,
+)
+from google.ai.generativelanguage_v1beta.services.generative_service.transports import (
+    GenerativeServiceGrpcAsyncIOTransport,
+)
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from aiassistant.AiModels.Gemini import GeminiAIAssistant
+from aiassistant.models import Chat, Message, UserProfile
+
+User = get_user_model()
+
+REPLY_CHUNKS = ["Hepatitis C ", "is a liver ", "infection."]
+
+# Seconds streams held by FakeGeminiServer wait for the others to open
+STREAM_OVERLAP_TIMEOUT = 20
+
+
+class FakeGeminiServer:
+    """
+    Local gRPC server that streams a canned answer with a fixed per-chunk delay.
+
+    With ``hold_until_streams``, each stream waits before answering until that
+    many streams are open at once. The client must then have all of them in
+    flight together; if it served them one after another, the wait times out
+    and the streams fail.
+    """
+
+    def __init__(self, chunk_delay=0.0, fail_stream=False, hold_until_streams=None):
+        self.chunk_delay = chunk_delay
+        self.fail_stream = fail_stream
+        self.barrier = (
+            threading.Barrier(hold_until_streams) if hold_until_streams else None
+        )
+        self.requests = []
+        self.active_streams = 0
+        self.max_active_streams = 0
+        self._lock = threading.Lock()
+
+        handler = grpc.method_handlers_generic_handler(
+            "google.ai.generativelanguage.v1beta.GenerativeService",
+            {
+                "StreamGenerateContent": grpc.unary_stream_rpc_method_handler(
+                    self._stream_generate_content,
+                    request_deserializer=glm.GenerateContentRequest.deserialize,
+                    response_serializer=glm.GenerateContentResponse.serialize,
+                )
+            },
+        )
+        self._server = grpc.server(futures.ThreadPoolExecutor(max_workers=100))
+        self._server.add_generic_rpc_handlers((handler,))
+        port = self._server.add_insecure_port("127.0.0.1:0")
+        self.address = f"127.0.0.1:{port}"
+
+    def start(self):
+        self._server.start()
+
+    def stop(self):
+        self._server.stop(grace=None)
+
+    def make_async_client(self):
+        """Async client on a plaintext channel to this server (loop-bound)."""
+        channel = grpc.aio.insecure_channel(self.address)
+        return GenerativeServiceAsyncClient(
+            transport=GenerativeServiceGrpcAsyncIOTransport(channel=channel)
+        )
+
+    def _stream_generate_content(self, request, context):
+        with self._lock:
+            self.requests.append(request)
+            self.active_streams += 1
+            self.max_active_streams = max(self.max_active_streams, self.active_streams)
+        try:
+            if self.fail_stream:
+                context.abort(grpc.StatusCode.INTERNAL, "model error")
+
+            if self.barrier is not None:
+                try:
+                    self.barrier.wait(timeout=STREAM_OVERLAP_TIMEOUT)
+                except threading.BrokenBarrierError:
+                    context.abort(
+                        grpc.StatusCode.DEADLINE_EXCEEDED,
+                        f"only {self.active_streams} streams open at once",
+                    )
+
+            for text in REPLY_CHUNKS:
+                time.sleep(self.chunk_delay)
+                yield glm.GenerateContentResponse(
+                    candidates=[
+                        glm.Candidate(
+                            index=0,
+                            content=glm.Content(
+                                role="model", parts=[glm.Part(text=text)]
+                            ),
+                        )
+                    ]
+                )
+            yield glm.GenerateContentResponse(
+                candidates=[
+                    glm.Candidate(
+                        index=0,
+                        content=glm.Content(role="model", parts=[]),
+                        finish_reason=glm.Candidate.FinishReason.STOP,
+                    )
+                ],
+                usage_metadata=glm.GenerateContentResponse.UsageMetadata(
+                    prompt_token_count=12, candidates_token_count=8
+                ),
+            )
+        finally:
+            with self._lock:
+                self.active_streams -= 1
+
+
+def parse_sse(body):
+    """Return [(event, data)] from a text/event-stream body."""
+    events = []
+    for block in body.decode().strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class ChatStreamTestMixin:
+    """Start a fake Gemini server and point a real assistant at it."""
+
+    chunk_delay = 0.0
+    fail_stream = False
+    hold_until_streams = None
+
+    def setUp(self):
+        self.server = FakeGeminiServer(
+            chunk_delay=self.chunk_delay,
+            fail_stream=self.fail_stream,
+            hold_until_streams=self.hold_until_streams,
+        )
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+        with mock.patch.object(GeminiAIAssistant, "_load_hcv_resource"):
+            self.assistant = GeminiAIAssistant(api_key="test-key")
+
+        patches = [
+            mock.patch(
+                "aiassistant.views.get_gemini_assistant", return_value=self.assistant
+            ),
+            mock.patch(
+                "google.generativeai.client.get_default_generative_async_client",
+                side_effect=self.server.make_async_client,
+            ),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(
+            email="chat@example.com", username="chatuser", password="testpass123"
+        )
+        self.auth_headers = {
+            "Authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        }
+
+    async def stream_message(self, chat, message="What is Hepatitis C?"):
+        response = await self.async_client.post(
+            reverse("aiassistant:chat-message-stream", args=[chat.id]),
+            {"message": message},
+            content_type="application/json",
+            headers=self.auth_headers,
+        )
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        return response, parse_sse(body)
+
+
+class ChatStreamViewTests(ChatStreamTestMixin, TestCase):
+    """Test the streaming message endpoint"""
+
+    async def test_stream_relays_tokens_and_saves_exchange(self):
+        """Test tokens are streamed and the messages saved once complete"""
+        chat = await Chat.objects.acreate(user=self.user)
+
+        response, events = await self.stream_message(chat)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(
+            [data["text"] for event, data in events if event == "token"],
+            REPLY_CHUNKS,
+        )
+        event, done = events[-1]
+        self.assertEqual(event, "done")
+        self.assertTrue(done["success"])
+        self.assertEqual(done["user_message"]["content"], "What is Hepatitis C?")
+        self.assertEqual(done["ai_message"]["content"], "".join(REPLY_CHUNKS))
+        self.assertEqual(done["chat_title"], "What is Hepatitis C?")
+
+        self.assertEqual(await Message.objects.filter(chat=chat).acount(), 2)
+        profile = await UserProfile.objects.aget(user=self.user)
+        self.assertEqual(profile.total_tokens_used, 20)
+        self.assertEqual(profile.daily_message_count, 1)
+
+    async def test_stream_sends_chat_history(self):
+        """Test previous messages are sent to Gemini as context"""
+        chat = await Chat.objects.acreate(user=self.user, title="Existing")
+        await Message.objects.acreate(chat=chat, content="Hi", is_from_user=True)
+        await Message.objects.acreate(chat=chat, content="Hello!", is_from_user=False)
+
+        await self.stream_message(chat, "Tell me more")
+
+        contents = self.server.requests[0].contents
+        self.assertEqual([c.role for c in contents], ["user", "model", "user"])
+        self.assertEqual(contents[-1].parts[0].text, "Tell me more")
+
+    async def test_stream_requires_authentication(self):
+        """Test requests without a token are rejected"""
+        chat = await Chat.objects.acreate(user=self.user)
+
+        response = await self.async_client.post(
+            reverse("aiassistant:chat-message-stream", args=[chat.id]),
+            {"message": "Hi"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.server.requests, [])
+
+    async def test_stream_rejects_empty_message(self):
+        """Test empty messages are rejected before calling Gemini"""
+        chat = await Chat.objects.acreate(user=self.user)
+
+        response = await self.async_client.post(
+            reverse("aiassistant:chat-message-stream", args=[chat.id]),
+            {"message": "   "},
+            content_type="application/json",
+            headers=self.auth_headers,
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.server.requests, [])
+
+    async def test_stream_other_users_chat_not_found(self):
+        """Test users cannot post into another user's chat"""
+        other = await sync_to_async(User.objects.create_user)(
+            email="other@example.com", username="other", password="testpass123"
+        )
+        chat = await Chat.objects.acreate(user=other)
+
+        response = await self.async_client.post(
+            reverse("aiassistant:chat-message-stream", args=[chat.id]),
+            {"message": "Hi"},
+            content_type="application/json",
+            headers=self.auth_headers,
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+
+class ChatStreamFailureTests(ChatStreamTestMixin, TestCase):
+    """Test the streaming endpoint when Gemini fails"""
+
+    fail_stream = True
+
+    async def test_failed_stream_saves_nothing(self):
+        """Test an AI error is reported as an SSE error and nothing is saved"""
+        chat = await Chat.objects.acreate(user=self.user)
+
+        response, events = await self.stream_message(chat)
+
+        self.assertEqual(response.status_code, 200)
+        event, data = events[-1]
+        self.assertEqual(event, "error")
+        self.assertFalse(data["success"])
+        self.assertEqual(await Message.objects.filter(chat=chat).acount(), 0)
+
+
+class ChatStreamLoadTests(ChatStreamTestMixin, TestCase):
+    """Load test: many concurrent chats served by a single worker"""
+
+    concurrent_chats = 20
+    hold_until_streams = concurrent_chats
+
+    async def test_concurrent_chats_share_one_worker(self):
+        """Test slow AI answers overlap instead of queueing behind each other"""
+        chats = [
+            await Chat.objects.acreate(user=self.user)
+            for _ in range(self.concurrent_chats)
+        ]
+
+        # The fake server holds every answer until all the chats are open at
+        # once, which one event loop (one worker) only manages if it serves
+        # them concurrently
+        try:
+            results = await asyncio.wait_for(
+                asyncio.gather(*(self.stream_message(chat) for chat in chats)),
+                timeout=2 * STREAM_OVERLAP_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            self.fail("The concurrent chats did not finish")
+
+        for response, events in results:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(events[-1][0], "done", events[-1][1])
+        self.assertEqual(self.server.max_active_streams, self.concurrent_chats)
+        self.assertEqual(
+            await Message.objects.filter(chat__user=self.user).acount(),
+            2 * self.concurrent_chats,
+        )
+
+
+class AsyncModelTests(SimpleTestCase):
+    """Test the assistant's async client follows the running event loop"""
+
+    def test_model_per_event_loop(self):
+        """Test each event loop gets its own model, reused within the loop"""
+        with mock.patch.object(GeminiAIAssistant, "_load_hcv_resource"):
+            assistant = GeminiAIAssistant(api_key="test-key")
+
+        async def models():
+            return assistant._async_model(), assistant._async_model()
+
+        first, same_loop = asyncio.run(models())
+        second, _ = asyncio.run(models())
+
+        self.assertIs(first, same_loop)
+        self.assertIsNot(first, second)
+        self.assertIsNot(first, assistant.model)
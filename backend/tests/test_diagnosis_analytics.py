@@ -0,0 +1,443 @@
+"""
+Tests for the diagnosis analytics endpoints, their query budgets and caching.
+"""
+
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from diagnosis.models import (
+    DiagnosisDailyRollup,
+    DiagnosisUserRollup,
+    HCVPatient,
+    HCVResult,
+)
+from diagnosis.rollups import refresh_day, rollup_date
+from utils.cache import TaggedCache
+
+User = get_user_model()
+
+ANALYTICS_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "analytics-test",
+    },
+}
+
+
+def create_patient(user, age, sex, days_ago=0, result=None):
+    """Create a patient, optionally with a result, created ``days_ago`` days ago."""
+    patient = HCVPatient.objects.create(
+        patient_name=f"Patient {age}",
+        age=age,
+        sex=sex,
+        alp=50.0,
+        ast=30.0,
+        che=8.0,
+        crea=80.0,
+        cgt=25.0,
+        created_by=user,
+    )
+    HCVPatient.objects.filter(pk=patient.pk).update(
+        created_at=timezone.now() - timedelta(days=days_ago)
+    )
+    if result:
+        status_, risk, stage, confidence = result
+        HCVResult.objects.create(
+            patient=patient,
+            hcv_status=status_,
+            hcv_status_probability=0.9,
+            hcv_risk=risk,
+            hcv_stage=stage,
+            confidence=confidence,
+            hcv_stage_probability={},
+            recommendation="Follow up",
+        )
+    return patient
+
+
+class UserDiagnosisAnalyticsTests(TestCase):
+    """Test the user analytics payload and its query budget"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="analytics@example.com",
+            username="analyticsuser",
+            password="testpass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("diagnosis:user_analytics")
+
+        create_patient(self.user, 25, "Male", 5, ("Positive", "High", "Fibrosis", 0.8))
+        create_patient(
+            self.user, 45, "Female", 40, ("Negative", "Low", "Hepatitis", 0.6)
+        )
+        create_patient(
+            self.user, 70, "Male", 100, ("Positive", "High", "Cirrhosis", 0.7)
+        )
+        create_patient(self.user, 35, "Female", 200)
+        # Another user's patients are not counted
+        other = User.objects.create_user(
+            email="other@example.com", username="other", password="testpass123"
+        )
+        create_patient(other, 50, "Male", 1, ("Positive", "Medium", "Fibrosis", 0.9))
+        self.latest = create_patient(
+            self.user, 60, "Female", 0, ("Negative", "Medium", "Cirrhosis", 0.9)
+        )
+
+    def test_payload(self):
+        """Test every chart is computed from the user's own patients"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data["data"]
+        self.assertEqual(data["total_diagnoses"], 5)
+        self.assertEqual(data["recent_diagnoses"], 2)
+        self.assertEqual(
+            data["age_distribution"], {"young": 1, "middle": 2, "elder": 2}
+        )
+        self.assertEqual(
+            data["risk_distribution"],
+            {"high_risk": 2, "medium_risk": 1, "low_risk": 1},
+        )
+        self.assertEqual(
+            data["hcv_status_distribution"], {"positive": 2, "negative": 2}
+        )
+        self.assertEqual(
+            data["hcv_stage_distribution"],
+            {"Blood Donors": 0, "Hepatitis": 1, "Fibrosis": 1, "Cirrhosis": 2},
+        )
+        self.assertEqual(data["gender_distribution"], {"male": 2, "female": 3})
+        self.assertEqual(
+            [month["count"] for month in data["monthly_trends"]], [2, 1, 0, 1, 0, 0]
+        )
+        self.assertEqual(data["average_confidence"], 75.0)
+        self.assertEqual(data["latest_diagnosis"]["id"], self.latest.id)
+        self.assertEqual(data["latest_diagnosis"]["hcv_risk"], "Medium")
+        self.assertEqual(data["health_insights"]["most_common_risk"], "high_risk")
+        self.assertEqual(data["health_insights"]["diagnosis_frequency"], "Occasional")
+
+    def test_query_budget(self):
+        """Test the summary and the latest diagnosis take two queries in total"""
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_no_diagnoses(self):
+        """Test a user without patients gets an empty summary from one query"""
+        HCVPatient.objects.filter(created_by=self.user).delete()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.data["data"]["total_diagnoses"], 0)
+
+
+class DiagnosisRollupTests(TestCase):
+    """Test the daily and per-user rollups follow patient and result changes"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="rollup@example.com", username="rollupuser", password="testpass123"
+        )
+
+    def _rollups(self):
+        days = list(
+            DiagnosisDailyRollup.objects.order_by("date").values(
+                *[
+                    f.name
+                    for f in DiagnosisDailyRollup._meta.fields
+                    if f.name not in ("id", "updated_at")
+                ]
+            )
+        )
+        users = list(
+            DiagnosisUserRollup.objects.order_by("created_by").values_list(
+                "created_by", "diagnosis_count"
+            )
+        )
+        return days, users
+
+    def test_rollups_follow_saves_and_deletes(self):
+        """Test creating, updating and deleting records refreshes the rollups"""
+        first = create_patient(
+            self.user, 25, "Male", 0, ("Positive", "High", "Fibrosis", 0.8)
+        )
+        create_patient(
+            self.user, 70, "Female", 0, ("Negative", "Low", "Hepatitis", 0.6)
+        )
+
+        rollup = DiagnosisDailyRollup.objects.get()
+        self.assertEqual(rollup.total, 2)
+        self.assertEqual((rollup.positive, rollup.high_risk), (1, 1))
+        self.assertEqual((rollup.age_min, rollup.age_max), (25, 70))
+        self.assertAlmostEqual(rollup.confidence_sum, 1.4)
+        self.assertEqual(self.user.diagnosis_rollup.diagnosis_count, 2)
+
+        result = first.hcv_result
+        result.hcv_risk = "Medium"
+        result.save()
+        rollup.refresh_from_db()
+        self.assertEqual((rollup.high_risk, rollup.medium_risk), (0, 1))
+
+        first.delete()
+        rollup.refresh_from_db()
+        self.assertEqual(rollup.total, 1)
+        self.assertEqual((rollup.age_min, rollup.positive), (70, 0))
+
+        HCVPatient.objects.get().delete()
+        self.assertFalse(DiagnosisDailyRollup.objects.exists())
+        self.assertFalse(DiagnosisUserRollup.objects.exists())
+
+    def test_rebuild_matches_incremental_rollups(self):
+        """Test the rebuild command reproduces the signal-maintained rollups"""
+        other = User.objects.create_user(
+            email="other@example.com", username="other", password="testpass123"
+        )
+        create_patient(self.user, 25, "Male", 0, ("Positive", "High", "Fibrosis", 0.8))
+        create_patient(
+            self.user, 45, "Female", 3, ("Negative", "Low", "Hepatitis", 0.6)
+        )
+        create_patient(other, 65, "Male", 3)
+        # Backdating with update() bypasses the signals; refresh by hand
+        for day in DiagnosisDailyRollup.objects.values_list("date", flat=True):
+            refresh_day(day)
+        for patient in HCVPatient.objects.all():
+            refresh_day(rollup_date(patient.created_at))
+        incremental = self._rollups()
+
+        out = StringIO()
+        call_command("rebuild_diagnosis_rollups", stdout=out)
+
+        self.assertEqual(self._rollups(), incremental)
+        self.assertEqual(len(incremental[0]), 2)
+        self.assertIn("2 days, 2 users", out.getvalue())
+
+
+class AdminDiagnosisAnalyticsTests(TestCase):
+    """Test the admin analytics are served from the rollups"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            email="admin@example.com",
+            username="admin",
+            password="testpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.url = reverse("diagnosis:admin_analytics")
+
+        other = User.objects.create_user(
+            email="other@example.com", username="other", password="testpass123"
+        )
+        create_patient(self.admin, 25, "Male", 5, ("Positive", "High", "Fibrosis", 0.8))
+        create_patient(
+            self.admin, 45, "Female", 40, ("Negative", "Low", "Hepatitis", 0.6)
+        )
+        create_patient(self.admin, 70, "Male", 100)
+        create_patient(other, 35, "Female", 2, ("Positive", "Medium", "Cirrhosis", 0.7))
+        call_command("rebuild_diagnosis_rollups", stdout=StringIO())
+
+    def test_payload(self):
+        """Test the dashboard figures match the underlying records"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data["data"]
+        self.assertEqual(data["total_diagnoses"], 4)
+        self.assertEqual(data["total_users"], 2)
+        self.assertEqual(data["recent_diagnoses"], 2)
+        self.assertEqual(
+            data["age_distribution"], {"young": 1, "middle": 2, "elder": 1}
+        )
+        self.assertEqual(
+            data["risk_distribution"],
+            {"high_risk": 1, "medium_risk": 1, "low_risk": 1},
+        )
+        self.assertEqual(
+            data["hcv_status_distribution"], {"positive": 2, "negative": 1}
+        )
+        self.assertEqual(
+            data["stage_distribution"],
+            {"Blood Donors": 0, "Hepatitis": 1, "Fibrosis": 1, "Cirrhosis": 1},
+        )
+        self.assertEqual(data["gender_distribution"], {"male": 2, "female": 2})
+        self.assertEqual(
+            [month["count"] for month in data["monthly_trends"]],
+            [2, 1, 0, 1] + [0] * 8,
+        )
+        self.assertEqual(
+            [week["count"] for week in data["weekly_trends"]], [2, 0, 0, 0]
+        )
+        self.assertEqual(data["average_confidence"], 70.0)
+        self.assertEqual(
+            data["age_analysis"], {"average_age": 43.8, "min_age": 25, "max_age": 70}
+        )
+        self.assertEqual(data["top_users"][0]["created_by__email"], "admin@example.com")
+        self.assertEqual(data["top_users"][0]["diagnosis_count"], 3)
+
+    def test_query_budget(self):
+        """Test the dashboard reads the rollups, whatever the number of records"""
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_empty_rollups(self):
+        """Test the dashboard works before any diagnosis exists"""
+        HCVPatient.objects.all().delete()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data["data"]["total_diagnoses"], 0)
+        self.assertEqual(response.data["data"]["average_confidence"], 0)
+
+
+@override_settings(CACHES=ANALYTICS_CACHES)
+class TaggedCacheTests(TestCase):
+    """Test generation-keyed invalidation and stampede protection"""
+
+    def setUp(self):
+        caches["default"].clear()
+        self.tagged_cache = TaggedCache(prefix="test")
+
+    def test_invalidating_a_tag_orphans_its_entries(self):
+        """Test only entries built on an invalidated tag are recomputed"""
+        values = iter(range(10))
+
+        def compute():
+            return next(values)
+
+        self.assertEqual(
+            self.tagged_cache.get_or_compute("a", ["t1"], compute), (0, False)
+        )
+        self.assertEqual(
+            self.tagged_cache.get_or_compute("b", ["t2"], compute), (1, False)
+        )
+        self.assertEqual(
+            self.tagged_cache.get_or_compute("a", ["t1"], compute), (0, True)
+        )
+
+        self.tagged_cache.invalidate("t1")
+
+        self.assertEqual(
+            self.tagged_cache.get_or_compute("a", ["t1"], compute), (2, False)
+        )
+        self.assertEqual(
+            self.tagged_cache.get_or_compute("b", ["t2"], compute), (1, True)
+        )
+
+    def test_evicted_generation_does_not_revive_old_entries(self):
+        """Test a recreated generation never matches entries of an older one"""
+        self.tagged_cache.get_or_compute("a", ["t1"], lambda: "old")
+        self.tagged_cache.invalidate("t1")
+        caches["default"].delete("test:tag:t1")
+
+        value, hit = self.tagged_cache.get_or_compute("a", ["t1"], lambda: "new")
+
+        self.assertEqual((value, hit), ("new", False))
+
+    def test_only_one_caller_recomputes_on_a_miss(self):
+        """Test concurrent misses wait for a single computation"""
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.3)
+            return "value"
+
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(self.tagged_cache.get_or_compute("slow", ["t"], compute))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([value for value, _ in results], ["value"] * 8)
+
+
+@override_settings(CACHES=ANALYTICS_CACHES, ANALYTICS_CACHE_ENABLED=True)
+class AnalyticsCacheTests(TestCase):
+    """Test analytics responses are cached until a diagnosis changes"""
+
+    def setUp(self):
+        caches["default"].clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="cached@example.com",
+            username="cacheduser",
+            password="testpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            create_patient(
+                self.user, 25, "Male", 0, ("Positive", "High", "Fibrosis", 0.8)
+            )
+
+    def test_repeated_requests_are_served_from_cache(self):
+        """Test a second dashboard refresh runs no queries"""
+        for name in ["diagnosis:user_analytics", "diagnosis:admin_analytics"]:
+            first = self.client.get(reverse(name))
+            with self.assertNumQueries(0):
+                second = self.client.get(reverse(name))
+
+            self.assertEqual(second.status_code, status.HTTP_200_OK)
+            self.assertEqual(second.data["data"], first.data["data"])
+
+    def test_diagnosis_changes_invalidate_cached_analytics(self):
+        """Test creating and deleting diagnoses is reflected immediately"""
+        user_url = reverse("diagnosis:user_analytics")
+        admin_url = reverse("diagnosis:admin_analytics")
+        self.assertEqual(self.client.get(user_url).data["data"]["total_diagnoses"], 1)
+        self.assertEqual(self.client.get(admin_url).data["data"]["total_diagnoses"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            patient = create_patient(self.user, 45, "Female", 0)
+        self.assertEqual(self.client.get(user_url).data["data"]["total_diagnoses"], 2)
+        self.assertEqual(self.client.get(admin_url).data["data"]["total_diagnoses"], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            patient.delete()
+        self.assertEqual(self.client.get(user_url).data["data"]["total_diagnoses"], 1)
+        self.assertEqual(self.client.get(admin_url).data["data"]["total_diagnoses"], 1)
+
+    def test_user_analytics_are_cached_per_user(self):
+        """Test another user's diagnoses only invalidate the global analytics"""
+        other = User.objects.create_user(
+            email="other@example.com", username="other", password="testpass123"
+        )
+        self.client.get(reverse("diagnosis:user_analytics"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_patient(other, 45, "Female", 0)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("diagnosis:user_analytics"))
+        self.assertEqual(response.data["data"]["total_diagnoses"], 1)
+        self.assertEqual(
+            self.client.get(reverse("diagnosis:admin_analytics")).data["data"][
+                "total_diagnoses"
+            ],
+            2,
+        )
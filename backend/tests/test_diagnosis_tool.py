@@ -0,0 +1,564 @@
+"""
+Tests for the AI diagnosis tool and its process-wide model registry.
+"""
+
+import math
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from diagnosis.AiDiagnosisTool import main as diagnosis_main
+from diagnosis.AiDiagnosisTool.main import AiDiagnosisTool
+from diagnosis.AiDiagnosisTool.bundle import LATEST_FILE, MANIFEST_FILE
+from diagnosis.AiDiagnosisTool.registry import (
+    MODEL_ARTIFACTS,
+    ModelLoadError,
+    ModelRegistry,
+)
+
+from diagnosis.models import (
+    DiagnosisDailyRollup,
+    DiagnosisUserRollup,
+    HCVPatient,
+    HCVResult,
+)
+from tests.test_diagnosis_analytics import ANALYTICS_CACHES
+
+User = get_user_model()
+
+MODEL_DIR = os.path.dirname(diagnosis_main.__file__)
+
+SAMPLE_PATIENTS = [
+    {
+        "age": 32,
+        "sex": "1",
+        "alb": 38.5,
+        "alp": 52.5,
+        "ast": 22.1,
+        "bil": 7.5,
+        "che": 6.93,
+        "chol": 3.23,
+        "crea": 106.0,
+        "cgt": 12.1,
+        "prot": 69.0,
+        "alt": 7.7,
+    },
+    {
+        "age": 50,
+        "sex": "0",
+        "alb": 40.0,
+        "alp": 32.7,
+        "ast": 46.0,
+        "bil": 10.0,
+        "che": 7.51,
+        "chol": 4.67,
+        "crea": 56.6,
+        "cgt": 22.3,
+        "prot": 70.1,
+        "alt": 9.0,
+    },
+    {
+        "age": 61,
+        "sex": "0",
+        "alb": 50.0,
+        "alp": 34.4,
+        "ast": 114.4,
+        "bil": 22.0,
+        "che": 9.48,
+        "chol": 4.62,
+        "crea": 61.9,
+        "cgt": 169.8,
+        "prot": 86.0,
+        "alt": 27.4,
+    },
+    {
+        "age": 29,
+        "sex": "1",
+        "alb": 41.0,
+        "alp": 43.1,
+        "ast": 83.5,
+        "bil": 6.0,
+        "che": 11.49,
+        "chol": 5.42,
+        "crea": 55.2,
+        "cgt": 130.0,
+        "prot": 66.5,
+        "alt": 2.4,
+    },
+]
+
+
+class ModelRegistryTests(TestCase):
+    """Test the shared model registry"""
+
+    def test_models_loaded_once(self):
+        """Test repeated lookups return the same warm instance"""
+        registry = ModelRegistry(model_dir=MODEL_DIR)
+        first = registry.get_tool()
+        second = registry.get_tool()
+
+        self.assertIs(first, second)
+        self.assertEqual(registry.load_count, 1)
+        self.assertIsNotNone(first.lr_model)
+        self.assertIsNotNone(first.xgboost_model)
+
+    def test_concurrent_first_access_loads_once(self):
+        """Test concurrent threads racing on a cold registry share one load"""
+        registry = ModelRegistry(model_dir=MODEL_DIR)
+        tools = []
+
+        def worker():
+            tools.append(registry.get_tool())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(registry.load_count, 1)
+        self.assertTrue(all(tool is tools[0] for tool in tools))
+
+    def test_stats_report_load_cost(self):
+        """Test stats expose load time and memory figures"""
+        registry = ModelRegistry(model_dir=MODEL_DIR)
+        self.assertFalse(registry.stats()["loaded"])
+
+        registry.get_tool()
+        stats = registry.stats()
+
+        self.assertTrue(stats["loaded"])
+        self.assertEqual(stats["load_count"], 1)
+        self.assertGreaterEqual(stats["last_load_seconds"], 0)
+        self.assertIn("current_rss_bytes", stats)
+
+    def test_hot_reload_on_mtime_change(self):
+        """Test the tool is reloaded when an artifact's mtime changes"""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        for name in MODEL_ARTIFACTS:
+            shutil.copy(os.path.join(MODEL_DIR, name), tmp_dir)
+
+        registry = ModelRegistry(model_dir=tmp_dir, hot_reload=True, reload_interval=0)
+        first = registry.get_tool()
+        self.assertIs(registry.get_tool(), first)
+
+        model_path = os.path.join(tmp_dir, "lr_model.pkl")
+        future = time.time() + 60
+        os.utime(model_path, (future, future))
+
+        second = registry.get_tool()
+        self.assertIsNot(first, second)
+        self.assertEqual(registry.load_count, 2)
+
+    def test_no_reload_without_hot_reload(self):
+        """Test mtime changes are ignored when hot reload is disabled"""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        for name in MODEL_ARTIFACTS:
+            shutil.copy(os.path.join(MODEL_DIR, name), tmp_dir)
+
+        registry = ModelRegistry(model_dir=tmp_dir, reload_interval=0)
+        first = registry.get_tool()
+
+        future = time.time() + 60
+        os.utime(os.path.join(tmp_dir, "lr_model.pkl"), (future, future))
+
+        self.assertIs(registry.get_tool(), first)
+        self.assertEqual(registry.load_count, 1)
+
+    def test_failed_load_is_retried(self):
+        """Test a failed load is reported, not cached, and retried on next use"""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        registry = ModelRegistry(model_dir=tmp_dir)
+
+        with self.assertRaises(ModelLoadError):
+            registry.get_tool()
+        stats = registry.stats()
+        self.assertFalse(stats["loaded"])
+        self.assertFalse(stats["healthy"])
+        self.assertEqual(stats["failed_load_count"], 1)
+
+        for name in MODEL_ARTIFACTS:
+            shutil.copy(os.path.join(MODEL_DIR, name), tmp_dir)
+
+        self.assertTrue(registry.get_tool().models_loaded)
+        self.assertTrue(registry.stats()["healthy"])
+        self.assertEqual(registry.load_count, 1)
+
+    def test_failed_hot_reload_keeps_working_models(self):
+        """Test a broken retrain does not replace the models being served"""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        for name in MODEL_ARTIFACTS:
+            shutil.copy(os.path.join(MODEL_DIR, name), tmp_dir)
+
+        registry = ModelRegistry(model_dir=tmp_dir, hot_reload=True, reload_interval=0)
+        first = registry.get_tool()
+
+        model_path = os.path.join(tmp_dir, "lr_model.pkl")
+        with open(model_path, "wb") as model_file:
+            model_file.write(b"not a model")
+        future = time.time() + 60
+        os.utime(model_path, (future, future))
+
+        self.assertIs(registry.get_tool(), first)
+        self.assertFalse(registry.stats()["healthy"])
+        self.assertEqual(registry.load_count, 1)
+
+
+class AiDiagnosisToolTests(TestCase):
+    """Test AI diagnosis tool predictions"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tool = AiDiagnosisTool()
+
+    def test_diagnose_returns_expected_keys(self):
+        """Test diagnose returns the full result payload"""
+        result = self.tool.diagnose(SAMPLE_PATIENTS[0])
+
+        for key in [
+            "hcv_status",
+            "hcv_status_probability",
+            "hcv_risk",
+            "hcv_stage",
+            "confidence",
+            "hcv_stage_probability",
+            "recommendation",
+            "feature_importance",
+        ]:
+            self.assertIn(key, result)
+        self.assertIn(result["hcv_status"], ["Positive", "Negative"])
+
+    def test_batch_matches_single_diagnosis(self):
+        """Test vectorized batch diagnosis matches per-patient diagnosis"""
+        batch_results = self.tool.diagnose_batch(SAMPLE_PATIENTS)
+
+        self.assertEqual(len(batch_results), len(SAMPLE_PATIENTS))
+        for patient, batch_result in zip(SAMPLE_PATIENTS, batch_results):
+            single_result = self.tool.diagnose(patient)
+            self.assertEqual(batch_result["hcv_status"], single_result["hcv_status"])
+            self.assertEqual(batch_result["hcv_stage"], single_result["hcv_stage"])
+            self.assertEqual(batch_result["hcv_risk"], single_result["hcv_risk"])
+            self.assertEqual(
+                batch_result["recommendation"], single_result["recommendation"]
+            )
+            self.assertTrue(
+                math.isclose(
+                    batch_result["confidence"],
+                    single_result["confidence"],
+                    rel_tol=1e-9,
+                )
+            )
+            for stage, probability in single_result["hcv_stage_probability"].items():
+                self.assertTrue(
+                    math.isclose(
+                        batch_result["hcv_stage_probability"][stage],
+                        probability,
+                        rel_tol=1e-9,
+                        abs_tol=1e-12,
+                    )
+                )
+
+    def test_fast_path_matches_dataframe_path(self):
+        """Test the pandas-free single-row path gives identical outputs"""
+        self.assertIsNotNone(self.tool._fast_path)
+
+        rng = random.Random(42)
+        patients = list(SAMPLE_PATIENTS)
+        for _ in range(200):
+            patients.append(
+                {
+                    key: round(rng.uniform(0, 200), 2)
+                    for key in ["age", "alp", "ast", "che", "crea", "cgt", "alt"]
+                }
+            )
+        # Missing, empty and non-numeric values are handled the same way
+        patients.append({"age": 40, "alp": "", "ast": None, "cgt": "abc"})
+        patients.append({})
+
+        for patient in patients:
+            self.assertEqual(
+                self.tool._predict_with_models_fast(patient),
+                self.tool._predict_with_models_dataframe(patient),
+            )
+            self.assertEqual(
+                self.tool._predict_with_models_fast(patient, True),
+                self.tool._predict_with_models_dataframe(patient, True),
+            )
+
+    def test_feature_importance_is_static(self):
+        """Test the coefficient ranking is computed once and not mutated per call"""
+        ranking = self.tool.sorted_features_importance
+        self.assertIsInstance(ranking, tuple)
+        self.assertEqual(len(ranking), len(self.tool.lr_feature_names))
+        weights = [abs(weight) for _, weight in ranking]
+        self.assertEqual(weights, sorted(weights, reverse=True))
+
+        result = self.tool.diagnose(SAMPLE_PATIENTS[0])
+        self.assertIs(self.tool.sorted_features_importance, ranking)
+        self.assertEqual(result["feature_importance"], dict(ranking))
+
+    def test_feature_contributions(self):
+        """Test per-patient contributions are coefficient times scaled value"""
+        patient = SAMPLE_PATIENTS[2]
+        result = self.tool.diagnose(patient, feature_contributions=True)
+        contributions = result["feature_importance"]
+
+        model_results = self.tool._predict_with_models_dataframe(patient)
+        stage = model_results["logistic_regression"]["prediction"]
+        stage_index = list(self.tool.lr_model.classes_).index(stage)
+        row = self.tool._build_feature_matrix([patient], self.tool.lr_feature_names)
+        scaled = (row[0] - self.tool.lr_scaler.mean_) / self.tool.lr_scaler.scale_
+
+        self.assertEqual(set(contributions), set(self.tool.lr_feature_names))
+        for column, feature in enumerate(self.tool.lr_feature_names):
+            expected = self.tool.lr_model.coef_[stage_index][column] * scaled[column]
+            self.assertTrue(math.isclose(contributions[feature], expected))
+        magnitudes = [abs(value) for value in contributions.values()]
+        self.assertEqual(magnitudes, sorted(magnitudes, reverse=True))
+
+        batch_results = self.tool.diagnose_batch(
+            SAMPLE_PATIENTS, feature_contributions=True
+        )
+        for single, batch in zip(SAMPLE_PATIENTS, batch_results):
+            expected = self.tool.diagnose(single, feature_contributions=True)
+            for feature, value in expected["feature_importance"].items():
+                self.assertTrue(
+                    math.isclose(
+                        batch["feature_importance"][feature], value, abs_tol=1e-12
+                    )
+                )
+
+    def test_batch_empty_input(self):
+        """Test an empty batch returns no results"""
+        self.assertEqual(self.tool.diagnose_batch([]), [])
+
+
+class ModelBundleTests(TestCase):
+    """Test exporting and loading the compact model bundle"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.pickle_tool = AiDiagnosisTool()
+
+    def setUp(self):
+        self.bundle_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.bundle_dir)
+
+    def _export(self, version="v1"):
+        call_command(
+            "export_diagnosis_bundle",
+            output=self.bundle_dir,
+            bundle_version=version,
+            stdout=StringIO(),
+        )
+
+    def test_export_writes_versioned_bundle(self):
+        """Test the command writes the booster, arrays and LATEST pointer"""
+        self._export()
+
+        with open(os.path.join(self.bundle_dir, LATEST_FILE)) as latest:
+            self.assertEqual(latest.read(), "v1")
+        version_dir = os.path.join(self.bundle_dir, "v1")
+        for name in [MANIFEST_FILE, "xgboost_booster.ubj", "lr_coef.npy"]:
+            self.assertTrue(os.path.exists(os.path.join(version_dir, name)))
+
+    def test_bundle_matches_pickled_models(self):
+        """Test a tool loaded from the bundle gives identical results"""
+        self._export()
+        bundle_tool = AiDiagnosisTool(bundle_dir=self.bundle_dir)
+
+        self.assertEqual(bundle_tool.bundle_version, "v1")
+        self.assertIsNone(bundle_tool.lr_model)
+        self.assertEqual(
+            bundle_tool.sorted_features_importance,
+            self.pickle_tool.sorted_features_importance,
+        )
+        for patient in SAMPLE_PATIENTS:
+            self.assertEqual(
+                bundle_tool.diagnose(patient), self.pickle_tool.diagnose(patient)
+            )
+            self.assertEqual(
+                bundle_tool.diagnose(patient, feature_contributions=True),
+                self.pickle_tool.diagnose(patient, feature_contributions=True),
+            )
+        self.assertEqual(
+            bundle_tool.diagnose_batch(SAMPLE_PATIENTS),
+            self.pickle_tool.diagnose_batch(SAMPLE_PATIENTS),
+        )
+
+    def test_missing_bundle_falls_back_to_pickles(self):
+        """Test an empty bundle directory falls back to the pickled models"""
+        tool = AiDiagnosisTool(bundle_dir=self.bundle_dir)
+
+        self.assertIsNone(tool.bundle_version)
+        self.assertIsNotNone(tool.lr_model)
+
+    def test_registry_reloads_new_bundle_version(self):
+        """Test hot reload follows the LATEST pointer to a new version"""
+        self._export("v1")
+        registry = ModelRegistry(
+            bundle_dir=self.bundle_dir, hot_reload=True, reload_interval=0
+        )
+        self.assertEqual(registry.get_tool().bundle_version, "v1")
+
+        self._export("v2")
+        latest_path = os.path.join(self.bundle_dir, LATEST_FILE)
+        future = time.time() + 60
+        os.utime(latest_path, (future, future))
+
+        self.assertEqual(registry.get_tool().bundle_version, "v2")
+        self.assertEqual(registry.load_count, 2)
+        self.assertEqual(registry.stats()["bundle_version"], "v2")
+
+
+class ModelPreloadTests(TestCase):
+    """Test warming the models from the app-ready hook (gunicorn preload)"""
+
+    def test_ready_skips_preload_by_default(self):
+        """Test the models are not loaded at start-up unless preload is on"""
+        with mock.patch(
+            "diagnosis.AiDiagnosisTool.registry.get_model_registry"
+        ) as get_registry:
+            apps.get_app_config("diagnosis").ready()
+
+        get_registry.assert_not_called()
+
+    @override_settings(DIAGNOSIS_MODEL_PRELOAD=True)
+    def test_ready_preloads_models(self):
+        """Test the hook loads the shared tool when preload is on"""
+        registry = ModelRegistry()
+        with mock.patch(
+            "diagnosis.AiDiagnosisTool.registry.get_model_registry",
+            return_value=registry,
+        ):
+            apps.get_app_config("diagnosis").ready()
+
+        self.assertTrue(registry.is_loaded)
+        self.assertEqual(registry.load_count, 1)
+
+
+class BatchDiagnoseAPITests(TestCase):
+    """Test the batch diagnosis endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="batch@example.com",
+            password="BatchPass123!",
+            first_name="Batch",
+            last_name="User",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("diagnosis:diagnose_batch")
+
+    def _payload(self):
+        return [
+            {**patient, "patient_name": f"Patient {i}", "sex": "Male"}
+            for i, patient in enumerate(SAMPLE_PATIENTS)
+        ]
+
+    def test_batch_diagnosis_creates_records(self):
+        """Test a batch creates one patient and one result per row"""
+        response = self.client.post(self.url, self._payload(), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["data"]["count"], len(SAMPLE_PATIENTS))
+        self.assertEqual(
+            HCVPatient.objects.filter(created_by=self.user).count(),
+            len(SAMPLE_PATIENTS),
+        )
+        self.assertEqual(HCVResult.objects.count(), len(SAMPLE_PATIENTS))
+        for patient in response.data["data"]["patients"]:
+            self.assertIsNotNone(patient["hcv_result"])
+
+    def test_batch_diagnosis_updates_rollups(self):
+        """Test a batch is counted in the daily and per-user rollups"""
+        response = self.client.post(self.url, self._payload(), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        rollup = DiagnosisDailyRollup.objects.get()
+        self.assertEqual(rollup.total, len(SAMPLE_PATIENTS))
+        self.assertEqual(rollup.male, len(SAMPLE_PATIENTS))
+        self.assertEqual(
+            rollup.positive + rollup.negative,
+            HCVResult.objects.filter(hcv_status__in=["Positive", "Negative"]).count(),
+        )
+        self.assertEqual(rollup.confidence_count, len(SAMPLE_PATIENTS))
+        self.assertEqual(
+            DiagnosisUserRollup.objects.get(created_by=self.user).diagnosis_count,
+            len(SAMPLE_PATIENTS),
+        )
+
+    @override_settings(CACHES=ANALYTICS_CACHES, ANALYTICS_CACHE_ENABLED=True)
+    def test_batch_diagnosis_invalidates_cached_analytics(self):
+        """Test cached analytics include a batch as soon as it is committed"""
+        caches["default"].clear()
+        self.user.is_staff = True
+        self.user.save()
+        user_url = reverse("diagnosis:user_analytics")
+        admin_url = reverse("diagnosis:admin_analytics")
+        self.assertEqual(self.client.get(user_url).data["data"]["total_diagnoses"], 0)
+        self.assertEqual(self.client.get(admin_url).data["data"]["total_diagnoses"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, self._payload(), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        for url in [user_url, admin_url]:
+            self.assertEqual(
+                self.client.get(url).data["data"]["total_diagnoses"],
+                len(SAMPLE_PATIENTS),
+            )
+
+    def test_batch_accepts_wrapped_payload(self):
+        """Test the patients list can be wrapped in an object"""
+        response = self.client.post(
+            self.url, {"patients": self._payload()}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_batch_validation_error_creates_nothing(self):
+        """Test an invalid row rejects the whole batch"""
+        payload = self._payload()
+        payload[1]["age"] = 500
+
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(HCVPatient.objects.count(), 0)
+
+    def test_batch_feature_contributions(self):
+        """Test per-patient contributions are returned when requested"""
+        response = self.client.post(
+            f"{self.url}?feature_contributions=true", self._payload(), format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        contributions = response.data["data"]["feature_contributions"]
+        self.assertEqual(len(contributions), len(SAMPLE_PATIENTS))
+        self.assertNotEqual(contributions[0], contributions[2])
+
+    def test_batch_rejects_empty_list(self):
+        """Test an empty batch is rejected"""
+        response = self.client.post(self.url, [], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,217 @@
+"""
+Tests for the email outbox: handlers only queue emails, and the drain sends
+them in batches over one connection, retrying failures with backoff.
+"""
+
+import smtplib
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.models import EmailOutbox
+from users.outbox import drain_outbox, enqueue_email
+from users.views import SendVerificationEmail
+
+User = get_user_model()
+
+
+class RecordingBackend(locmem.EmailBackend):
+    """locmem backend counting the connections it opens"""
+
+    opens = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connected = False
+
+    def open(self):
+        if self.connected:
+            return False
+        type(self).opens += 1
+        self.connected = True
+        return True
+
+    def close(self):
+        self.connected = False
+
+
+class RefusingBackend(RecordingBackend):
+    """Backend refusing mail to the addresses in ``refused``"""
+
+    refused = {"bounce@example.com"}
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.refused & set(message.to):
+                raise smtplib.SMTPRecipientsRefused(
+                    {address: (550, b"No such user") for address in message.to}
+                )
+        return super().send_messages(messages)
+
+
+class UnreachableBackend(RecordingBackend):
+    """Backend whose server cannot be reached"""
+
+    def open(self):
+        raise ConnectionRefusedError("Connection refused")
+
+
+@override_settings(EMAIL_BACKEND="tests.test_email_outbox.RecordingBackend")
+class EmailOutboxTests(TestCase):
+    """Test emails are queued by handlers and sent by the drain"""
+
+    def setUp(self):
+        RecordingBackend.opens = 0
+
+    @override_settings(CONTACT_EMAIL="admin@example.com")
+    def test_contact_form_only_queues(self):
+        """Test the contact form sends nothing itself and queues both emails"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = APIClient().post(
+                reverse("contact-me"),
+                {
+                    "name": "Jane Doe",
+                    "email": "jane@example.com",
+                    "subject": "Question about results",
+                    "message": "Hello, I have a question about my results.",
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(EmailOutbox.objects.count(), 2)
+        # Each email schedules a drain once the transaction commits
+        self.assertEqual(len(callbacks), 2)
+
+        self.assertEqual(drain_outbox()["sent"], 2)
+        admin_mail, confirmation = mail.outbox
+        self.assertEqual(
+            admin_mail.subject, "[HepatoCAI Contact] Question about results"
+        )
+        self.assertEqual(admin_mail.to, ["admin@example.com"])
+        self.assertEqual(admin_mail.reply_to, ["jane@example.com"])
+        self.assertEqual(admin_mail.alternatives[0][1], "text/html")
+        self.assertEqual(confirmation.to, ["jane@example.com"])
+
+    def test_verification_email(self):
+        """Test the verification email is queued with its HTML alternative"""
+        user = User.objects.create_user(
+            email="verify@example.com", username="verify", password="testpass123"
+        )
+
+        SendVerificationEmail(user)
+        self.assertEqual(len(mail.outbox), 0)
+        drain_outbox()
+
+        self.assertEqual(mail.outbox[0].to, ["verify@example.com"])
+        self.assertIn("verify", mail.outbox[0].alternatives[0][0])
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.status, EmailOutbox.STATUS_SENT)
+        self.assertEqual(email.attempts, 1)
+        self.assertIsNotNone(email.sent_at)
+
+    def test_batches_share_one_connection(self):
+        """Test every batch of a drain is sent over the same connection"""
+        for i in range(5):
+            enqueue_email(f"Subject {i}", "Body", [f"user{i}@example.com"])
+
+        totals = drain_outbox(batch_size=2)
+
+        self.assertEqual(totals, {"sent": 5, "retrying": 0, "failed": 0})
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(RecordingBackend.opens, 1)
+
+    @override_settings(
+        EMAIL_BACKEND="tests.test_email_outbox.RefusingBackend",
+        EMAIL_OUTBOX_RETRY_DELAY=60,
+        EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+    )
+    def test_retries_with_backoff(self):
+        """Test a failed email is retried later, with a growing delay, then failed"""
+        bounce = enqueue_email("Bounce", "Body", ["bounce@example.com"])
+        enqueue_email("Fine", "Body", ["fine@example.com"])
+
+        totals = drain_outbox()
+        self.assertEqual(totals, {"sent": 1, "retrying": 1, "failed": 0})
+        self.assertEqual([m.subject for m in mail.outbox], ["Fine"])
+
+        bounce.refresh_from_db()
+        self.assertEqual(bounce.status, EmailOutbox.STATUS_PENDING)
+        self.assertEqual(bounce.attempts, 1)
+        self.assertIn("No such user", bounce.last_error)
+        first_delay = bounce.next_attempt_at - timezone.now()
+        self.assertAlmostEqual(first_delay.total_seconds(), 60, delta=5)
+
+        # Not due yet
+        self.assertEqual(drain_outbox()["retrying"], 0)
+
+        EmailOutbox.objects.filter(pk=bounce.pk).update(next_attempt_at=timezone.now())
+        drain_outbox()
+        bounce.refresh_from_db()
+        second_delay = bounce.next_attempt_at - timezone.now()
+        self.assertAlmostEqual(second_delay.total_seconds(), 120, delta=5)
+
+        EmailOutbox.objects.filter(pk=bounce.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(drain_outbox()["failed"], 1)
+        bounce.refresh_from_db()
+        self.assertEqual(bounce.status, EmailOutbox.STATUS_FAILED)
+        self.assertEqual(bounce.attempts, 3)
+
+    @override_settings(EMAIL_BACKEND="tests.test_email_outbox.UnreachableBackend")
+    def test_unreachable_server(self):
+        """Test the drain stops and reschedules the batch when the server is down"""
+        for i in range(3):
+            enqueue_email(f"Subject {i}", "Body", ["user@example.com"])
+
+        totals = drain_outbox(batch_size=2)
+
+        self.assertEqual(totals, {"sent": 0, "retrying": 2, "failed": 0})
+        self.assertEqual(
+            EmailOutbox.objects.filter(
+                status=EmailOutbox.STATUS_PENDING, attempts=1
+            ).count(),
+            2,
+        )
+        # The email not claimed yet is left for the next drain
+        self.assertEqual(EmailOutbox.objects.filter(attempts=0).count(), 1)
+
+    def test_expired_claim_is_reclaimed(self):
+        """Test an email claimed by a drain that died is sent once its lease ends"""
+        email = enqueue_email("Stuck", "Body", ["stuck@example.com"])
+        EmailOutbox.objects.filter(pk=email.pk).update(
+            status=EmailOutbox.STATUS_SENDING,
+            next_attempt_at=timezone.now() + timedelta(minutes=5),
+        )
+        self.assertEqual(drain_outbox()["sent"], 0)
+
+        EmailOutbox.objects.filter(pk=email.pk).update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(drain_outbox()["sent"], 1)
+
+    def test_command(self):
+        """Test the command drains the outbox and purges old sent emails"""
+        enqueue_email("Queued", "Body", ["user@example.com"])
+        old = enqueue_email("Old", "Body", ["user@example.com"])
+        EmailOutbox.objects.filter(pk=old.pk).update(
+            status=EmailOutbox.STATUS_SENT,
+            sent_at=timezone.now() - timedelta(days=60),
+        )
+        out = StringIO()
+
+        call_command("send_outbox_emails", stdout=out)
+
+        self.assertIn("Sent 1 emails", out.getvalue())
+        self.assertIn("purged 1 old sent emails", out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(EmailOutbox.objects.filter(pk=old.pk).exists())
@@ -0,0 +1,221 @@
+"""
+Tests for background export jobs, their downloads and cleanup.
+"""
+
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from diagnosis.export_jobs import cleanup_export_jobs, job_path, run_export_job
+from diagnosis.exports import patient_export_columns
+from diagnosis.models import ExportJob
+from tests.test_diagnosis_analytics import create_patient
+from utils.downloads import parse_range_header, ranged_file_response
+
+User = get_user_model()
+
+
+class ExportJobTests(TestCase):
+    """Test creating, running, polling and downloading export jobs"""
+
+    def setUp(self):
+        self.export_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.export_dir, ignore_errors=True)
+        settings_override = override_settings(EXPORT_JOB_DIR=self.export_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        # Jobs run when the test calls run_export_job, not in the pool
+        executor_patch = mock.patch("diagnosis.export_jobs.get_executor")
+        self.executor = executor_patch.start()
+        self.addCleanup(executor_patch.stop)
+
+        self.client = APIClient()
+        self.staff = User.objects.create_user(
+            email="jobs-staff@example.com",
+            username="jobsstaff",
+            password="testpass123",
+            is_staff=True,
+        )
+        self.user = User.objects.create_user(
+            email="jobs-user@example.com",
+            username="jobsuser",
+            password="testpass123",
+        )
+        create_patient(self.staff, 40, "Male", 1, ("Positive", "High", "Fibrosis", 0.9))
+        create_patient(self.staff, 30, "Female", 2)
+        create_patient(self.user, 55, "Male", 0, ("Negative", "Low", "Hepatitis", 0.6))
+
+    def _create(self, user):
+        self.client.force_authenticate(user=user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("diagnosis:export_jobs"))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        return response.data["data"]
+
+    def _status(self, job_id):
+        response = self.client.get(
+            reverse("diagnosis:export_job_detail", args=[job_id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["data"]
+
+    def test_job_lifecycle(self):
+        """Test a job is queued, reports progress and downloads its workbook"""
+        job = self._create(self.staff)
+
+        self.assertEqual(job["status"], ExportJob.STATUS_PENDING)
+        self.assertIsNone(job["download_url"])
+        self.executor.return_value.submit.assert_called_once()
+
+        download_url = reverse("diagnosis:export_job_download", args=[job["id"]])
+        response = self.client.get(download_url)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        run_export_job(job["id"])
+        job = self._status(job["id"])
+
+        self.assertEqual(job["status"], ExportJob.STATUS_COMPLETED)
+        self.assertEqual(job["total_rows"], 3)
+        self.assertEqual(job["processed_rows"], 3)
+        self.assertEqual(job["progress"], 1.0)
+        self.assertTrue(job["download_url"].endswith(download_url))
+
+        response = self.client.get(download_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        content = b"".join(response.streaming_content)
+        self.assertEqual(len(content), job["file_size"])
+
+        rows = list(load_workbook(BytesIO(content)).active.values)
+        self.assertEqual(
+            list(rows[0]), [header for header, _, _ in patient_export_columns()]
+        )
+        self.assertEqual(len(rows), 4)
+
+    def test_regular_user_exports_own_records(self):
+        """Test a regular user's job only holds their records and is private"""
+        job = self._create(self.user)
+        run_export_job(job["id"])
+
+        self.assertEqual(self._status(job["id"])["total_rows"], 1)
+
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(
+            reverse("diagnosis:export_job_detail", args=[job["id"]])
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_range_download(self):
+        """Test a download can be resumed with a byte range"""
+        job = self._create(self.staff)
+        run_export_job(job["id"])
+        url = reverse("diagnosis:export_job_download", args=[job["id"]])
+        full = b"".join(self.client.get(url).streaming_content)
+
+        response = self.client.get(url, HTTP_RANGE="bytes=100-")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(
+            response["Content-Range"], f"bytes 100-{len(full) - 1}/{len(full)}"
+        )
+        self.assertEqual(b"".join(response.streaming_content), full[100:])
+
+        response = self.client.get(url, HTTP_RANGE=f"bytes={len(full)}-")
+        self.assertEqual(
+            response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+
+    def test_job_runs_once(self):
+        """Test a job queued twice is only built once"""
+        job = self._create(self.staff)
+        run_export_job(job["id"])
+
+        with mock.patch("diagnosis.export_jobs.write_xlsx_export") as write:
+            run_export_job(job["id"])
+        write.assert_not_called()
+
+    def test_failed_job(self):
+        """Test an error while writing marks the job failed and leaves no file"""
+        job = self._create(self.staff)
+
+        with mock.patch(
+            "diagnosis.export_jobs.iter_patient_rows", side_effect=OSError("disk full")
+        ):
+            run_export_job(job["id"])
+
+        job = self._status(job["id"])
+        self.assertEqual(job["status"], ExportJob.STATUS_FAILED)
+        self.assertEqual(job["error"], "disk full")
+        self.assertEqual(os.listdir(self.export_dir), [])
+
+    def test_cleanup_deletes_expired_jobs_and_files(self):
+        """Test expired jobs are deleted with their files"""
+        expired = self._create(self.staff)
+        current = self._create(self.staff)
+        run_export_job(expired["id"])
+        run_export_job(current["id"])
+        ExportJob.objects.filter(pk=expired["id"]).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        expired_path = job_path(ExportJob.objects.get(pk=expired["id"]))
+
+        response = self.client.get(
+            reverse("diagnosis:export_job_detail", args=[expired["id"]])
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.assertEqual(cleanup_export_jobs(), 1)
+        self.assertFalse(os.path.exists(expired_path))
+        self.assertEqual(str(ExportJob.objects.get().pk), current["id"])
+
+
+class RangeHeaderTests(SimpleTestCase):
+    """Test parsing Range headers and serving partial content"""
+
+    def test_parse_range_header(self):
+        for header, expected in [
+            (None, None),
+            ("bytes=0-", None),
+            ("bytes=0-99", None),
+            ("bytes=0-1000", None),
+            ("bytes=10-19", (10, 19)),
+            ("bytes=10-", (10, 99)),
+            ("bytes=-10", (90, 99)),
+            ("bytes=90-200", (90, 99)),
+            ("bytes=0-1,5-9", None),
+            ("items=0-10", None),
+        ]:
+            with self.subTest(header=header):
+                self.assertEqual(parse_range_header(header, 100), expected)
+
+        for header in ["bytes=100-", "bytes=20-10", "bytes=-0"]:
+            with self.subTest(header=header):
+                with self.assertRaises(ValueError):
+                    parse_range_header(header, 100)
+
+    def test_ranged_file_response(self):
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(bytes(range(256)) * 1024)
+        self.addCleanup(os.remove, f.name)
+        request = RequestFactory().get("/", HTTP_RANGE="bytes=1000-70999")
+
+        response = ranged_file_response(
+            request, f.name, "data.bin", "application/octet-stream"
+        )
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Length"], "70000")
+        self.assertIn('filename="data.bin"', response["Content-Disposition"])
+        content = b"".join(response.streaming_content)
+        self.assertEqual(content, (bytes(range(256)) * 1024)[1000:71000])
@@ -0,0 +1,138 @@
+"""
+Tests for the token login endpoint, which hashes the password once per
+login, and for login tracking.
+"""
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from utils.ip_utils import update_user_login_tracking
+
+User = get_user_model()
+
+
+class TokenLoginTests(TestCase):
+    """Test a login authenticates once and tracks the same user"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("get_token_legacy")
+        self.password = "testpass123"
+        self.user = User.objects.create_user(
+            email="login@example.com",
+            username="loginuser",
+            password=self.password,
+            full_name="Login User",
+        )
+
+    def _login(self, password=None):
+        return self.client.post(
+            self.url,
+            {"email": self.user.email, "password": password or self.password},
+            format="json",
+            REMOTE_ADDR="203.0.113.7",
+        )
+
+    def test_login(self):
+        """Test the response carries the tokens and user, and login is tracked"""
+        response = self._login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("access", response.data)
+        self.assertIn("refresh", response.data)
+        self.assertEqual(response.data["user"]["email"], self.user.email)
+        self.assertEqual(response.data["user"]["full_name"], "Login User")
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.login_count, 1)
+        self.assertEqual(self.user.last_login_ip, "203.0.113.7")
+        self.assertIsNotNone(self.user.last_login)
+
+    def test_password_hashed_once(self):
+        """Test a login verifies the password once and costs two queries"""
+        with mock.patch.object(
+            PBKDF2PasswordHasher,
+            "verify",
+            autospec=True,
+            side_effect=PBKDF2PasswordHasher.verify,
+        ) as verify:
+            with CaptureQueriesContext(connection) as queries:
+                response = self._login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(verify.call_count, 1)
+        lookups = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('SELECT "users_customuser"."id"')
+        ]
+        self.assertEqual(len(lookups), 1)
+        # The lookup and the tracking UPDATE
+        self.assertEqual(len(queries), 2)
+
+    def test_wrong_password(self):
+        """Test a failed login is rejected and not tracked"""
+        response = self._login(password="wrongpass123")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.login_count, 0)
+        self.assertIsNone(self.user.last_login)
+
+
+class LoginTrackingTests(TestCase):
+    """Test login tracking is one atomic update without validation"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="tracking@example.com",
+            username="tracking",
+            password="testpass123",
+        )
+
+    def test_concurrent_logins_counted(self):
+        """Test logins through stale instances are all counted"""
+        first = User.objects.get(pk=self.user.pk)
+        second = User.objects.get(pk=self.user.pk)
+
+        with self.assertNumQueries(1):
+            first.record_login("198.51.100.1")
+        second.record_login("198.51.100.2")
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.login_count, 2)
+        self.assertEqual(self.user.last_login_ip, "198.51.100.2")
+        self.assertEqual(first.login_count, 1)
+
+    def test_unknown_ip_keeps_previous(self):
+        """Test a login without a usable client IP keeps the last known one"""
+        self.user.record_login("198.51.100.1")
+        request = RequestFactory().get("/")
+        request.META.pop("REMOTE_ADDR")
+
+        update_user_login_tracking(self.user, request)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.login_count, 2)
+        self.assertEqual(self.user.last_login_ip, "198.51.100.1")
+
+    def test_tracking_save_skips_validation(self):
+        """Test saving only tracking fields runs a single UPDATE"""
+        self.user.last_login = timezone.now()
+
+        with self.assertNumQueries(1):
+            self.user.save(update_fields=["last_login"])
+
+        # Any other field still goes through full validation
+        with CaptureQueriesContext(connection) as queries:
+            self.user.save(update_fields=["last_login", "full_name"])
+        self.assertGreater(len(queries), 1)
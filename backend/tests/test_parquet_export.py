@@ -0,0 +1,178 @@
+"""
+Tests for the Parquet export endpoint and command.
+"""
+
+import os
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from diagnosis.models import HCVPatient, HCVResult
+from diagnosis.parquet_export import stream_parquet
+from tests.test_diagnosis_analytics import create_patient
+
+User = get_user_model()
+
+
+class ParquetExportTests(TestCase):
+    """Test the Parquet export keeps types and supports incremental pulls"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("diagnosis:export_parquet")
+        self.staff = User.objects.create_user(
+            email="parquet-staff@example.com",
+            username="parquetstaff",
+            password="testpass123",
+            is_staff=True,
+        )
+        self.user = User.objects.create_user(
+            email="parquet-user@example.com",
+            username="parquetuser",
+            password="testpass123",
+        )
+        self.old = create_patient(
+            self.staff, 40, "Male", 3, ("Positive", "High", "Fibrosis", 0.9)
+        )
+        HCVResult.objects.filter(pk=self.old.pk).update(
+            hcv_stage_probability={
+                "Blood Donors": 0.1,
+                "Hepatitis": 0.2,
+                "Fibrosis": 0.6,
+                "Cirrhosis": 0.1,
+            }
+        )
+        HCVPatient.objects.filter(pk=self.old.pk).update(symptoms=["fatigue"], alb=41.5)
+        self.recent = create_patient(
+            self.staff, 30, "Female", 1, ("Negative", "Low", "Blood donors", 0.8)
+        )
+        self.own = create_patient(
+            self.user, 55, "Male", 1, ("Negative", "Low", "Blood donors", 0.7)
+        )
+        for patient in (self.old, self.recent, self.own):
+            self._diagnosed_at(
+                patient, HCVPatient.objects.get(pk=patient.pk).created_at
+            )
+
+    def _diagnosed_at(self, patient, when):
+        HCVResult.objects.filter(pk=patient.pk).update(created_at=when)
+
+    def _export(self, user, **params):
+        self.client.force_authenticate(user=user)
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = b"".join(response.streaming_content)
+        return response, pq.read_table(BytesIO(content))
+
+    def test_typed_columns(self):
+        """Test lab values, categories and stage probabilities keep their types"""
+        _, table = self._export(self.staff)
+
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(table.schema.field("alp").type, pa.float32())
+        self.assertEqual(table.schema.field("confidence").type, pa.float32())
+        self.assertTrue(pa.types.is_dictionary(table.schema.field("sex").type))
+        self.assertTrue(pa.types.is_dictionary(table.schema.field("hcv_stage").type))
+
+        rows = {row["id"]: row for row in table.to_pylist()}
+        old = rows[self.old.pk]
+        self.assertEqual(old["hcv_status"], "Positive")
+        self.assertEqual(old["symptoms"], ["fatigue"])
+        self.assertEqual(old["alb"], 41.5)
+        self.assertAlmostEqual(old["stage_fibrosis_probability"], 0.6, places=6)
+        self.assertEqual(old["created_by"], "parquet-staff@example.com")
+
+        recent = rows[self.recent.pk]
+        self.assertEqual(recent["hcv_status"], "Negative")
+        self.assertIsNone(recent["stage_fibrosis_probability"])
+        self.assertIsNone(recent["alb"])
+
+    def test_regular_user_exports_own_records(self):
+        """Test a regular user only gets their own records"""
+        _, table = self._export(self.user)
+
+        self.assertEqual(table.column("id").to_pylist(), [self.own.pk])
+
+    def test_incremental_pull(self):
+        """Test the watermark of one pull selects only newer rows in the next"""
+        cutoff = timezone.now() - timedelta(days=2)
+        response, table = self._export(self.staff, date_to=cutoff.isoformat())
+        self.assertEqual(table.column("id").to_pylist(), [self.old.pk])
+
+        watermark = response["X-Export-Watermark"]
+        response, table = self._export(self.staff, since=watermark)
+        self.assertEqual(table.column("id").to_pylist(), [self.recent.pk, self.own.pk])
+
+        newer = response["X-Export-Watermark"]
+        _, table = self._export(self.staff, since=newer)
+        self.assertEqual(table.num_rows, 0)
+
+    def test_result_saved_after_pull(self):
+        """Test a patient still waiting for its result is exported once diagnosed"""
+        pending = create_patient(self.staff, 62, "Female", 2)
+        response, table = self._export(self.staff)
+        self.assertNotIn(pending.pk, table.column("id").to_pylist())
+
+        HCVResult.objects.create(
+            patient=pending,
+            hcv_status="Positive",
+            hcv_status_probability=0.8,
+            hcv_risk="High",
+            hcv_stage="Cirrhosis",
+            confidence=0.8,
+            hcv_stage_probability={},
+            recommendation="Follow up",
+        )
+        watermark = response["X-Export-Watermark"]
+
+        # Within the lag the new result is held back for a later pull
+        _, table = self._export(self.staff, since=watermark)
+        self.assertEqual(table.num_rows, 0)
+
+        self._diagnosed_at(pending, timezone.now() - timedelta(minutes=10))
+        _, table = self._export(self.staff, since=watermark)
+        self.assertEqual(table.column("id").to_pylist(), [pending.pk])
+
+    def test_invalid_date(self):
+        """Test an invalid date parameter is rejected"""
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(self.url, {"since": "yesterday"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_row_groups(self):
+        """Test rows are written one row group per chunk"""
+        for i in range(4):
+            create_patient(self.staff, 20 + i, "Male")
+
+        content = b"".join(
+            stream_parquet(HCVPatient.objects.order_by("id"), row_group_size=2)
+        )
+
+        parquet_file = pq.ParquetFile(BytesIO(content))
+        self.assertEqual(parquet_file.num_row_groups, 4)
+        self.assertEqual(parquet_file.metadata.num_rows, 7)
+
+    def test_command(self):
+        """Test the management command writes the same export to a file"""
+        path = os.path.join(tempfile.mkdtemp(), "records.parquet")
+        self.addCleanup(os.remove, path)
+        out = StringIO()
+
+        call_command(
+            "export_diagnosis_parquet", path, "--user-id", self.user.pk, stdout=out
+        )
+
+        self.assertIn("Exported 1 diagnosis records", out.getvalue())
+        self.assertIn("Watermark:", out.getvalue())
+        self.assertEqual(pq.read_table(path).column("id").to_pylist(), [self.own.pk])
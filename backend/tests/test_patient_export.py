@@ -0,0 +1,80 @@
+"""
+Tests for the streaming patient CSV export.
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from diagnosis.exports import stream_patients_csv
+from diagnosis.models import HCVPatient
+from diagnosis.resources import PatientWithResultResource
+from tests.test_diagnosis_analytics import create_patient
+
+User = get_user_model()
+
+
+class ExportPatientsCSVTests(TestCase):
+    """Test the CSV export streams the resource's layout in one query"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("diagnosis:export_csv")
+        self.staff = User.objects.create_user(
+            email="export-staff@example.com",
+            username="exportstaff",
+            password="testpass123",
+            is_staff=True,
+        )
+        self.user = User.objects.create_user(
+            email="export-user@example.com",
+            username="exportuser",
+            password="testpass123",
+        )
+
+        create_patient(self.staff, 40, "Male", 1, ("Positive", "High", "Fibrosis", 0.9))
+        create_patient(self.staff, 30, "Female", 2)
+        patient = create_patient(
+            self.user, 55, "Other", 0, ("Negative", "Low", "Hepatitis", 0.6)
+        )
+        # Quoting, JSON and optional lab values
+        HCVPatient.objects.filter(pk=patient.pk).update(
+            patient_name='Doe, "Jane"', symptoms=["fatigue", "jaundice"], alb=41.5
+        )
+
+    def _export(self, user):
+        self.client.force_authenticate(user=user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        return b"".join(response.streaming_content).decode()
+
+    def test_matches_resource_export(self):
+        """Test the streamed CSV is identical to the import-export resource's"""
+        queryset = HCVPatient.objects.select_related("hcv_result", "created_by")
+        expected = PatientWithResultResource().export(queryset).csv
+
+        self.assertEqual(self._export(self.staff), expected)
+
+    def test_regular_user_exports_own_records(self):
+        """Test a regular user only gets their own records"""
+        lines = self._export(self.user).splitlines()
+
+        self.assertEqual(len(lines), 2)
+        self.assertIn('"Doe, ""Jane"""', lines[1])
+        self.assertIn("export-user@example.com", lines[1])
+
+    def test_rows_are_read_in_one_query(self):
+        """Test the export reads every row, with results and users, in one query"""
+        for i in range(10):
+            create_patient(
+                self.staff, 20 + i, "Male", 0, ("Positive", "Low", "Fibrosis", 0.5)
+            )
+
+        with self.assertNumQueries(1):
+            lines = list(stream_patients_csv(HCVPatient.objects.all(), chunk_size=4))
+
+        self.assertEqual(len(lines), 14)
@@ -0,0 +1,213 @@
+"""
+Tests for page and cursor pagination of the patient search endpoints.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from diagnosis.models import HCVPatient
+from tests.test_diagnosis_analytics import ANALYTICS_CACHES, create_patient
+
+User = get_user_model()
+
+
+class PatientSearchPaginationTests(TestCase):
+    """Test the search views page by number or by cursor"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="search@example.com",
+            username="searchuser",
+            password="testpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("diagnosis:diagnosis_search")
+        self.admin_url = reverse("diagnosis:admin_diagnosis_search")
+
+        for i in range(23):
+            result = None
+            if i % 3:
+                result = ("Positive", "High", "Fibrosis", (i % 5) / 5)
+            # Repeated ages and confidences exercise the id tie-breaker
+            create_patient(self.user, 20 + i % 4, "Male", i % 7, result)
+
+    def _walk(self, url, **params):
+        """Follow next_cursor from the first page and return the patient ids."""
+        ids = []
+        params = {"pagination": "cursor", "page_size": 5, "count": "none", **params}
+        while True:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pagination = response.data["data"]["pagination"]
+            ids.extend(patient["id"] for patient in response.data["data"]["results"])
+            if not pagination["has_next"]:
+                self.assertIsNone(pagination["next_cursor"])
+                return ids
+            params["cursor"] = pagination["next_cursor"]
+
+    def test_page_mode_is_unchanged(self):
+        """Test the page/page_size contract still reports exact totals"""
+        response = self.client.get(self.url, {"page": 3, "page_size": 10})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["data"]["results"]), 3)
+        self.assertEqual(
+            response.data["data"]["pagination"],
+            {
+                "count": 23,
+                "page": 3,
+                "page_size": 10,
+                "has_next": False,
+                "has_previous": True,
+                "total_pages": 3,
+            },
+        )
+
+    def test_cursor_mode_returns_every_patient_once_in_order(self):
+        """Test cursor pages match the ordered results for every ordering"""
+        for order_by in [
+            "-created_at",
+            "age",
+            "-hcv_result__confidence",
+            "patient_name",
+        ]:
+            for url in [self.url, self.admin_url]:
+                ids = self._walk(url, order_by=order_by)
+
+                self.assertEqual(len(ids), 23)
+                self.assertEqual(len(set(ids)), 23)
+                if order_by == "age":
+                    ages = dict(HCVPatient.objects.values_list("id", "age"))
+                    self.assertEqual(
+                        [ages[i] for i in ids], sorted(ages[i] for i in ids)
+                    )
+
+    def test_cursor_mode_applies_filters(self):
+        """Test cursor pages only contain patients matching the filters"""
+        ids = self._walk(self.url, hcv_status="Positive")
+
+        self.assertEqual(
+            set(ids),
+            set(
+                HCVPatient.objects.filter(
+                    hcv_result__hcv_status="Positive"
+                ).values_list("id", flat=True)
+            ),
+        )
+
+    def test_skipping_the_count(self):
+        """Test count=none runs no COUNT query and still reports has_next"""
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.url, {"page": 2, "page_size": 10, "count": "none"}
+            )
+
+        pagination = response.data["data"]["pagination"]
+        self.assertIsNone(pagination["count"])
+        self.assertIsNone(pagination["total_pages"])
+        self.assertTrue(pagination["has_next"])
+        self.assertEqual(len(response.data["data"]["results"]), 10)
+
+    @override_settings(CACHES=ANALYTICS_CACHES, ANALYTICS_CACHE_ENABLED=True)
+    def test_cached_count_follows_diagnosis_changes(self):
+        """Test count=cached reuses the total until a diagnosis changes"""
+        caches["default"].clear()
+        params = {"count": "cached", "hcv_status": "Positive"}
+        self.client.get(self.url, params)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.data["data"]["pagination"]["count"], 15)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_patient(
+                self.user, 50, "Male", 0, ("Positive", "Low", "Hepatitis", 0.5)
+            )
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.data["data"]["pagination"]["count"], 16)
+
+    def test_invalid_pagination_parameters(self):
+        """Test malformed cursors, counts and page sizes are rejected"""
+        for params in [
+            {"cursor": "not-a-cursor"},
+            {"cursor": "WyJub3QtYS1kYXRlIiwgIjEiXQ"},  # ["not-a-date", "1"]
+            {"count": "approximate"},
+            {"page_size": 0},
+        ]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PatientSearchFilterTests(TestCase):
+    """Test the status and risk filters match choices like icontains did"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="filters@example.com",
+            username="filteruser",
+            password="testpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.positive_high = create_patient(
+            self.user, 40, "Male", 0, ("Positive", "High", "Cirrhosis", 0.9)
+        )
+        self.negative_low = create_patient(
+            self.user, 30, "Female", 0, ("Negative", "Low", "Blood Donors", 0.8)
+        )
+        self.inconclusive_medium = create_patient(
+            self.user, 50, "Male", 0, ("Inconclusive", "Medium", "Hepatitis", 0.4)
+        )
+        create_patient(self.user, 60, "Female", 0)
+
+    def _search_ids(self, url_name, **params):
+        response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {patient["id"] for patient in response.data["data"]["results"]}
+
+    def test_exact_and_partial_values(self):
+        """Test exact, lowercase and partial values select the same records"""
+        for url_name in [
+            "diagnosis:diagnosis_search",
+            "diagnosis:admin_diagnosis_search",
+        ]:
+            with self.subTest(url_name=url_name):
+                self.assertEqual(
+                    self._search_ids(url_name, hcv_status="Positive"),
+                    {self.positive_high.id},
+                )
+                self.assertEqual(
+                    self._search_ids(url_name, hcv_status="negative"),
+                    {self.negative_low.id},
+                )
+                # "neg" is only contained in Negative, "ive" in every status
+                self.assertEqual(
+                    self._search_ids(url_name, hcv_status="neg"),
+                    {self.negative_low.id},
+                )
+                self.assertEqual(
+                    self._search_ids(url_name, hcv_status="ive"),
+                    {
+                        self.positive_high.id,
+                        self.negative_low.id,
+                        self.inconclusive_medium.id,
+                    },
+                )
+                self.assertEqual(
+                    self._search_ids(url_name, hcv_risk="med", hcv_status="in"),
+                    {self.inconclusive_medium.id},
+                )
+
+    def test_unknown_value_matches_nothing(self):
+        """Test a value matching no choice returns no records"""
+        self.assertEqual(
+            self._search_ids("diagnosis:diagnosis_search", hcv_risk="Severe"), set()
+        )
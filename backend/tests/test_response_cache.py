@@ -0,0 +1,204 @@
+"""
+Tests for the assistant response cache, against a stubbed Gemini client.
+"""
+
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from aiassistant.AiModels.Gemini import GeminiAIAssistant
+from aiassistant.AiModels.response_cache import ResponseCache, normalize_prompt
+from aiassistant.models import Chat, UserProfile
+
+User = get_user_model()
+
+LRU_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "ai_responses": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "ai-responses-lru-test",
+        "OPTIONS": {"MAX_ENTRIES": 2, "CULL_FREQUENCY": 2},
+    },
+}
+
+
+def make_assistant(response_cache=None):
+    """Build a real assistant whose Gemini model is a stub."""
+    with mock.patch.object(GeminiAIAssistant, "_load_hcv_resource"):
+        assistant = GeminiAIAssistant(api_key="test-key", response_cache=response_cache)
+    assistant.model = mock.Mock()
+    assistant.model.generate_content.side_effect = lambda content: mock.Mock(
+        text=f"Answer #{assistant.model.generate_content.call_count}",
+        usage_metadata=mock.Mock(prompt_token_count=10, candidates_token_count=5),
+    )
+    assistant.model.start_chat.return_value.send_message.side_effect = (
+        assistant.model.generate_content.side_effect
+    )
+    return assistant
+
+
+class ResponseCacheTests(TestCase):
+    """Test caching of repeated assistant questions"""
+
+    def setUp(self):
+        caches["ai_responses"].clear()
+        self.response_cache = ResponseCache()
+        self.assistant = make_assistant(self.response_cache)
+
+    def test_normalize_prompt(self):
+        """Test case, punctuation and spacing do not change the prompt"""
+        self.assertEqual(normalize_prompt("  How many   STAGES?"), "how many stages")
+        self.assertEqual(
+            normalize_prompt("What is ALT?"), normalize_prompt("what is alt")
+        )
+
+    def test_repeated_question_served_from_cache(self):
+        """Test a repeated question does not call Gemini again"""
+        first = self.assistant.get_response("How many stages?")
+        second = self.assistant.get_response("how many stages")
+
+        self.assertEqual(first["cache"], "miss")
+        self.assertEqual(second["cache"], "hit")
+        self.assertEqual(second["response"], first["response"])
+        self.assertEqual(second["prompt_tokens"], 10)
+        self.assertEqual(second["response_tokens"], 5)
+        self.assertEqual(self.assistant.model.generate_content.call_count, 1)
+
+    def test_short_history_is_cached(self):
+        """Test questions with a short history are cached with that history"""
+        history = [{"role": "user", "content": "Hi"}]
+
+        self.assistant.get_response("What is ALT?", chat_history=history)
+        cached = self.assistant.get_response("What is ALT?", chat_history=history)
+        other = self.assistant.get_response("What is ALT?")
+
+        self.assertEqual(cached["cache"], "hit")
+        self.assertEqual(other["cache"], "miss")
+
+    def test_long_history_is_not_cached(self):
+        """Test conversations longer than the limit always call Gemini"""
+        history = [
+            {"role": "user", "content": "Hi"},
+            {"role": "assistant", "content": "Hello!"},
+            {"role": "user", "content": "I have questions"},
+        ]
+
+        first = self.assistant.get_response("What is ALT?", chat_history=history)
+        second = self.assistant.get_response("What is ALT?", chat_history=history)
+
+        self.assertIsNone(first["cache"])
+        self.assertIsNone(second["cache"])
+        self.assertEqual(
+            self.assistant.model.start_chat.return_value.send_message.call_count, 2
+        )
+
+    def test_cache_is_scoped_to_assistant_version(self):
+        """Test answers are not shared across models or system prompts"""
+        self.assistant.get_response("How many stages?")
+
+        same = make_assistant(self.response_cache)
+        other = make_assistant(self.response_cache)
+        other.version = "new-system-prompt"
+
+        self.assertEqual(same.version, self.assistant.version)
+        self.assertEqual(same.get_response("How many stages?")["cache"], "hit")
+        self.assertEqual(other.get_response("How many stages?")["cache"], "miss")
+
+    def test_failed_response_is_not_cached(self):
+        """Test Gemini errors are not stored"""
+        self.assistant.model.generate_content.side_effect = RuntimeError("quota")
+
+        failed = self.assistant.get_response("How many stages?")
+
+        self.assertFalse(failed["success"])
+        key = self.response_cache.make_key(
+            "How many stages?", None, self.assistant.version
+        )
+        self.assertIsNone(self.response_cache.get(key))
+
+    def test_entries_expire_after_ttl(self):
+        """Test cached answers expire after the configured TTL"""
+        response_cache = ResponseCache(timeout=60)
+        assistant = make_assistant(response_cache)
+        assistant.get_response("How many stages?")
+
+        with mock.patch(
+            "django.core.cache.backends.locmem.time.time",
+            return_value=time.time() + 61,
+        ):
+            expired = assistant.get_response("How many stages?")
+
+        self.assertEqual(expired["cache"], "miss")
+
+    @override_settings(CACHES=LRU_CACHES)
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test the cache evicts the least recently used answer when full"""
+        assistant = make_assistant(ResponseCache())
+        assistant.get_response("What is ALT?")
+        assistant.get_response("What is AST?")
+        assistant.get_response("What is ALT?")  # ALT is now most recently used
+        assistant.get_response("What is GGT?")  # Evicts AST
+
+        self.assertEqual(assistant.get_response("What is ALT?")["cache"], "hit")
+        self.assertEqual(assistant.get_response("What is AST?")["cache"], "miss")
+
+    def test_disabled_cache(self):
+        """Test the assistant works without a response cache"""
+        assistant = make_assistant()
+
+        assistant.get_response("How many stages?")
+        response = assistant.get_response("How many stages?")
+
+        self.assertIsNone(response["cache"])
+        self.assertEqual(assistant.model.generate_content.call_count, 2)
+
+
+class ResponseCacheStatsTests(TestCase):
+    """Test hit, miss and tokens-saved counters on the user profile"""
+
+    def setUp(self):
+        caches["ai_responses"].clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="faq@example.com", username="faquser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        patcher = mock.patch(
+            "aiassistant.views.get_gemini_assistant",
+            return_value=make_assistant(ResponseCache()),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _ask(self, message):
+        chat = Chat.objects.create(user=self.user)
+        return self.client.post(
+            reverse("aiassistant:chat-message", args=[chat.id]),
+            {"message": message},
+            format="json",
+        )
+
+    def test_profile_counts_hits_misses_and_tokens_saved(self):
+        """Test cached answers are counted as saved, not used, tokens"""
+        first = self._ask("How many stages?")
+        second = self._ask("How many stages?")
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            second.data["ai_message"]["content"], first.data["ai_message"]["content"]
+        )
+
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual(profile.cache_misses, 1)
+        self.assertEqual(profile.cache_hits, 1)
+        self.assertEqual(profile.total_tokens_used, 15)
+        self.assertEqual(profile.tokens_saved, 15)
+        self.assertEqual(profile.daily_message_count, 2)
@@ -2,6 +2,7 @@
 Comprehensive test suite for security and performance utilities.
 """
 
+import re
 import unittest
 from unittest.mock import patch, Mock, MagicMock
 from django.test import TestCase, RequestFactory
@@ -54,6 +55,84 @@ class SecurityValidatorTests(TestCase):
         with self.assertRaises(ValidationError):
             SecurityValidator.validate_input(sql_input)
 
+    def _matches_patterns(self, value):
+        """Check ``value`` against each pattern in turn, as validation used to"""
+        patterns = SecurityValidator.XSS_PATTERNS + SecurityValidator.SQL_PATTERNS
+        return any(re.search(pattern, value, re.IGNORECASE) for pattern in patterns)
+
+    def test_scanner_matches_patterns(self):
+        """Test the combined scanner flags exactly the inputs the patterns do"""
+        samples = [
+            "This is clean text",
+            "<SCRIPT src=x></script>",
+            "<script>never closed",
+            "<iframe src=x></IFRAME>",
+            "<object data=x></object><embed src=x></embed>",
+            "<script>mismatched</iframe>",
+            "JavaScript:alert(1)",
+            "<img onerror =alert(1)>",
+            "button=1",
+            "go on = home",
+            "Drop the table",
+            "dropped tables",
+            "ſelect",
+            "this or that and these\nx = 1",
+            "this or that, x = 1",
+            "a\nb and c < d",
+            "mandatory > optional",
+            "one - two",
+            "one -- two",
+            "I'm fine",
+            "fatigue and pain or discomfort " * 300,
+        ]
+        for value in samples:
+            with self.subTest(value=value[:40]):
+                self.assertEqual(
+                    SecurityValidator.INPUT_SCANNER.search(value) is not None,
+                    self._matches_patterns(value),
+                )
+
+    def test_validate_input_data_nested(self):
+        """Test nested objects and lists are validated too"""
+        self.assertTrue(
+            SecurityValidator.validate_input_data(
+                {"symptoms": ["fatigue", {"notes": "mild pain"}], "age": 45}
+            )
+        )
+        self.assertFalse(
+            SecurityValidator.validate_input_data(
+                {"symptoms": ["fatigue", {"notes": "<script>x</script>"}]}
+            )
+        )
+
+        nested = "clean"
+        for _ in range(5000):
+            nested = [nested]
+        self.assertTrue(SecurityValidator.validate_input_data({"deep": nested}))
+
+    def test_scanner_matches_patterns_on_long_messages(self):
+        """Test long messages, on one line or many, get the same verdict"""
+        text = "patient reports fatigue and pain or discomfort " * 220
+        messages = [
+            text,
+            text + "x = 1",
+            text.replace("discomfort ", "discomfort\n"),
+            text.replace("discomfort ", "discomfort\n") + "and x = 1",
+            "x = 1\n" + text,
+        ]
+        for message in messages:
+            with self.subTest(message=message[-20:]):
+                expected = self._matches_patterns(message)
+                self.assertEqual(
+                    SecurityValidator.validate_input_data({"message": message}),
+                    not expected,
+                )
+        # Only the ones with a comparison after an "or"/"and" are flagged
+        self.assertEqual(
+            [self._matches_patterns(message) for message in messages],
+            [False, True, False, True, False],
+        )
+
     def test_validate_patient_data_valid(self):
         """Test patient data validation with valid data"""
         valid_data = {
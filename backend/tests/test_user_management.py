@@ -0,0 +1,256 @@
+"""
+Tests for the paginated user management list, its statistics and the CSV
+export.
+"""
+
+import csv
+import gzip
+import io
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from tests.test_diagnosis_analytics import ANALYTICS_CACHES
+from users.exports import USER_EXPORT_COLUMNS, stream_users_csv
+
+User = get_user_model()
+
+
+class UserManagementListTests(TestCase):
+    """Test the user list is paginated, filtered and counted in one query"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("get-all-users")
+        self.admin = User.objects.create_user(
+            email="admin@example.com",
+            username="admin",
+            password="testpass123",
+            is_staff=True,
+            is_superuser=True,
+        )
+        self.client.force_authenticate(user=self.admin)
+
+        for i in range(12):
+            User.objects.create_user(
+                email=f"member{i}@example.com",
+                username=f"member{i}",
+                password="testpass123",
+                is_active=i % 4 != 0,
+                is_staff=i == 5,
+            )
+        User.objects.create_user(
+            email="google@example.com",
+            username="googleuser",
+            password="testpass123",
+            is_social_user=True,
+            social_provider="google",
+        )
+        # Join dates 20 to 7 days ago, later accounts joining later
+        for offset, user in enumerate(User.objects.order_by("id")):
+            User.objects.filter(pk=user.pk).update(
+                date_joined=timezone.now() - timedelta(days=20 - offset)
+            )
+
+    def _get(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_pages(self):
+        """Test users are paged newest first with page metadata"""
+        first = self._get(page_size=5)
+        last = self._get(page_size=5, page=3)
+
+        self.assertEqual(len(first["data"]), 5)
+        self.assertEqual(first["data"][0]["email"], "google@example.com")
+        self.assertEqual(
+            first["pagination"],
+            {
+                "page": 1,
+                "page_size": 5,
+                "count": 14,
+                "total_pages": 3,
+                "has_next": True,
+                "has_previous": False,
+            },
+        )
+        self.assertEqual(len(last["data"]), 4)
+        self.assertFalse(last["pagination"]["has_next"])
+        self.assertEqual(last["data"][-1]["email"], "admin@example.com")
+
+    def test_row_columns(self):
+        """Test each row holds the listed columns with a display name"""
+        row = self._get(search="member3")["data"][0]
+
+        self.assertEqual(row["full_name"], "member3")
+        self.assertIn("login_count", row)
+        self.assertNotIn("password", row)
+
+    def test_filters(self):
+        """Test the status, role, provider and search filters"""
+        self.assertEqual(self._get(is_active="false")["pagination"]["count"], 3)
+        self.assertEqual(self._get(is_staff="true")["pagination"]["count"], 2)
+        self.assertEqual(
+            self._get(is_staff="true", is_superuser="false")["pagination"]["count"], 1
+        )
+        self.assertEqual(
+            [row["email"] for row in self._get(social_provider="google")["data"]],
+            ["google@example.com"],
+        )
+        self.assertEqual(self._get(search="MEMBER1")["pagination"]["count"], 3)
+
+        # Statistics are global, not filtered
+        self.assertEqual(self._get(search="member1")["statistics"]["total_users"], 14)
+
+    def test_invalid_parameters(self):
+        """Test invalid filters and page sizes are rejected"""
+        for params in [{"is_active": "maybe"}, {"page_size": 0}, {"page": 0}]:
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_statistics(self):
+        """Test the statistics come from one aggregate"""
+        User.objects.filter(email="member1@example.com").update(
+            last_login=timezone.now(), date_joined=timezone.now()
+        )
+
+        statistics = self._get()["statistics"]
+
+        self.assertEqual(
+            statistics,
+            {
+                "total_users": 14,
+                "active_users": 11,
+                "staff_users": 2,
+                "super_users": 1,
+                "new_users_this_week": 1,
+                "recent_logins": 1,
+            },
+        )
+
+    def test_query_budget(self):
+        """Test a page costs a count, a page query and the statistics"""
+        with self.assertNumQueries(3):
+            self._get(page_size=5)
+
+    def test_regular_user_forbidden(self):
+        """Test non-staff users cannot list users"""
+        self.client.force_authenticate(
+            user=User.objects.get(email="member1@example.com")
+        )
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(ANALYTICS_CACHE_ENABLED=True, CACHES=ANALYTICS_CACHES)
+class UserStatisticsCacheTests(TestCase):
+    """Test the statistics are cached and invalidated by permission changes"""
+
+    def setUp(self):
+        caches["default"].clear()
+        self.client = APIClient()
+        self.url = reverse("get-all-users")
+        self.admin = User.objects.create_user(
+            email="cache-admin@example.com",
+            username="cacheadmin",
+            password="testpass123",
+            is_staff=True,
+            is_superuser=True,
+        )
+        self.member = User.objects.create_user(
+            email="cache-member@example.com",
+            username="cachemember",
+            password="testpass123",
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_cached_until_permissions_change(self):
+        self.assertEqual(self.client.get(self.url).data["statistics"]["staff_users"], 1)
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("user-management-detail", args=[self.member.pk]),
+                {"action": "promote_to_staff"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.client.get(self.url).data["statistics"]["staff_users"], 2)
+
+
+class UserExportTests(TestCase):
+    """Test the user CSV export is streamed, optionally gzip-compressed"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("get-all-users")
+        self.admin = User.objects.create_user(
+            email="export-admin@example.com",
+            username="exportadmin",
+            password="testpass123",
+            is_staff=True,
+        )
+        self.member = User.objects.create_user(
+            email="export-member@example.com",
+            username="exportmember",
+            password="testpass123",
+            full_name="Export, Member",
+            country="Egypt",
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def _expected_csv(self):
+        """The export as written from model instances"""
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow([header for header, _ in USER_EXPORT_COLUMNS])
+        for user in User.objects.order_by("-date_joined", "-id"):
+            writer.writerow([getattr(user, field) for _, field in USER_EXPORT_COLUMNS])
+        return output.getvalue()
+
+    def test_csv(self):
+        """Test the CSV is streamed with the same content as the model rows"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"export": "csv"})
+            content = b"".join(response.streaming_content).decode()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="users_export.csv"', response["Content-Disposition"])
+        self.assertEqual(content, self._expected_csv())
+        self.assertIn('"Export, Member"', content)
+
+    def test_gzip(self):
+        """Test the gzip variant decompresses to the same CSV"""
+        response = self.client.get(self.url, {"export": "csv.gz"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn('filename="users_export.csv.gz"', response["Content-Disposition"])
+        content = gzip.decompress(b"".join(response.streaming_content)).decode()
+        self.assertEqual(content, self._expected_csv())
+
+    def test_chunked(self):
+        """Test the rows are the same whatever the chunk size"""
+        self.assertEqual("".join(stream_users_csv(chunk_size=1)), self._expected_csv())
+
+    def test_regular_user_forbidden(self):
+        """Test non-staff users are refused before any export work"""
+        self.client.force_authenticate(user=self.member)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {"export": "csv"})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
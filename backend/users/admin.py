@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CustomUser
+from .models import CustomUser, EmailOutbox
 
 # Register your models here.
 
@@ -14,3 +14,14 @@ class CustomUserAdmin(admin.ModelAdmin):
 
 
 admin.site.register(CustomUser, CustomUserAdmin)
+
+
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "subject", "status", "attempts", "created_at", "sent_at")
+    search_fields = ("subject",)
+    list_filter = ("status",)
+    ordering = ("-created_at",)
+    readonly_fields = ("created_at", "sent_at", "last_error")
+
+
+admin.site.register(EmailOutbox, EmailOutboxAdmin)
@@ -0,0 +1,88 @@
+"""
+JWT authentication with a cached user lookup.
+
+``JWTAuthentication`` loads the user from the database on every request.
+``CachedJWTAuthentication`` reads it from the cache instead, under a key tied
+to the user's tag generation (see ``utils.cache.TaggedCache``). Saving or
+deleting a user bumps that generation once the transaction commits (see
+``users.signals``), so permission, status and password changes take effect
+on the next request. Writes made with ``QuerySet.update()``, such as login
+tracking, do not invalidate the entry and show up once it expires.
+
+The cache is only enabled by default with Redis: with a per-process cache,
+an invalidation would not reach the other workers until the entry expires.
+"""
+
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from utils.cache import TaggedCache
+
+
+def user_tag(user_id) -> str:
+    return f"auth:user:{user_id}"
+
+
+def get_auth_user_cache() -> Optional[TaggedCache]:
+    """Return the authenticated user cache, or None when it is disabled."""
+    if not getattr(settings, "AUTH_USER_CACHE_ENABLED", False):
+        return None
+    return TaggedCache(
+        alias=getattr(settings, "AUTH_USER_CACHE_ALIAS", "default"),
+        prefix="auth",
+        timeout=getattr(settings, "AUTH_USER_CACHE_TTL", 60),
+    )
+
+
+def invalidate_cached_user(user_id):
+    """Invalidate the cached user ``user_id`` once the transaction commits."""
+    auth_user_cache = get_auth_user_cache()
+    if auth_user_cache is None or user_id is None:
+        return
+    transaction.on_commit(lambda: auth_user_cache.invalidate(user_tag(user_id)))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that resolves the token's user from the cache."""
+
+    def get_user(self, validated_token):
+        auth_user_cache = get_auth_user_cache()
+        if auth_user_cache is None:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user, _cached = auth_user_cache.get_or_compute(
+                "user",
+                [user_tag(user_id)],
+                lambda: self.user_model.objects.get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                ),
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        # The same checks as JWTAuthentication, on the cached user
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
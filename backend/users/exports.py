@@ -0,0 +1,47 @@
+"""
+Streaming CSV export of user accounts for the user management page.
+
+Users are read as ``values_list()`` tuples, iterated in chunks, so memory
+stays bounded by the chunk size however many accounts there are. Values are
+written exactly as ``csv.writer`` renders the model attributes.
+"""
+
+import csv
+
+from django.contrib.auth import get_user_model
+
+from utils.downloads import EXPORT_CHUNK_SIZE, Echo
+
+# (header, field) of each exported column
+USER_EXPORT_COLUMNS = [
+    ("ID", "id"),
+    ("Email", "email"),
+    ("Full Name", "full_name"),
+    ("First Name", "first_name"),
+    ("Last Name", "last_name"),
+    ("Username", "username"),
+    ("Is Staff", "is_staff"),
+    ("Is Superuser", "is_superuser"),
+    ("Is Active", "is_active"),
+    ("Verified Email", "verified_email"),
+    ("Is Social User", "is_social_user"),
+    ("Social Provider", "social_provider"),
+    ("Date Joined", "date_joined"),
+    ("Last Login", "last_login"),
+    ("Phone Number", "phone_number"),
+    ("Country", "country"),
+    ("City", "city"),
+    ("Timezone", "timezone"),
+    ("Login Count", "login_count"),
+]
+
+
+def stream_users_csv(queryset=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the CSV export of ``queryset`` (all users) one line at a time."""
+    if queryset is None:
+        queryset = get_user_model().objects.order_by("-date_joined", "-id")
+    writer = csv.writer(Echo())
+    yield writer.writerow([header for header, _ in USER_EXPORT_COLUMNS])
+    rows = queryset.values_list(*(field for _, field in USER_EXPORT_COLUMNS))
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield writer.writerow(row)
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.outbox import drain_outbox, purge_sent_emails
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the due emails in the outbox, including retries, and delete old "
+        "sent ones. Run it periodically, or keep it running with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, help="Emails claimed and sent per batch"
+        )
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep draining until interrupted"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=30,
+            help="Seconds between drains with --loop (default 30)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            totals = drain_outbox(batch_size=options["batch_size"])
+            purged = purge_sent_emails()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Sent {totals['sent']} emails, {totals['retrying']} to retry, "
+                    f"{totals['failed']} failed; purged {purged} old sent emails"
+                )
+            )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
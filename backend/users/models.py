@@ -178,6 +178,9 @@ class CustomUser(AbstractUser):
 
     objects = CustomUserManager()
 
+    # Login bookkeeping fields; saves touching only these skip validation
+    TRACKING_FIELDS = frozenset({"last_login", "last_login_ip", "login_count"})
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
@@ -190,6 +193,8 @@ class CustomUser(AbstractUser):
             models.Index(fields=["username"]),
             models.Index(fields=["social_provider"]),
             models.Index(fields=["created_at"]),
+            # User management list, newest first
+            models.Index(fields=["-date_joined", "-id"], name="user_date_joined_idx"),
         ]
         constraints = [
             models.CheckConstraint(
@@ -261,6 +266,26 @@ class CustomUser(AbstractUser):
         """Return the user's short name"""
         return self.first_name or self.username or self.email.split("@")[0]
 
+    def record_login(self, ip_address=None):
+        """
+        Record a successful login with one atomic UPDATE.
+
+        The counter is incremented in the database, so concurrent logins are
+        all counted, and no validation queries are run. The last login IP is
+        kept when ``ip_address`` is not given.
+        """
+        now = timezone.now()
+        updates = {"login_count": models.F("login_count") + 1, "last_login": now}
+        if ip_address:
+            updates["last_login_ip"] = ip_address
+        type(self).objects.filter(pk=self.pk).update(**updates)
+
+        # Keep this instance in step without reading the row back
+        self.login_count = (self.login_count or 0) + 1
+        self.last_login = now
+        if ip_address:
+            self.last_login_ip = ip_address
+
     def increment_login_count(self, ip_address=None):
         """Increment login count and update last login IP"""
         self.login_count += 1
@@ -305,6 +330,13 @@ class CustomUser(AbstractUser):
             )
 
     def save(self, *args, **kwargs):
+        # Login tracking changes no validated or derived field, so skip the
+        # name sync and the validation queries of full_clean()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and self.TRACKING_FIELDS.issuperset(update_fields):
+            super().save(*args, **kwargs)
+            return
+
         # Handle bidirectional relationship between full_name, first_name, and last_name
         self._sync_name_fields()
 
@@ -384,3 +416,53 @@ class CustomUser(AbstractUser):
             name_parts.append(self.last_name)
 
         self.full_name = " ".join(name_parts)
+
+
+class EmailOutbox(models.Model):
+    """
+    An email waiting to be sent, or sent, by ``users.outbox``.
+
+    Request handlers only create these rows; a background drain sends them
+    in batches over one SMTP connection and retries failures with backoff.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField(help_text="Plain text body")
+    html_body = models.TextField(blank=True, help_text="Optional HTML alternative")
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list, blank=True)
+
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # When a pending email is next due; while sending, when the claim lapses
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "users_email_outbox"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"], name="email_outbox_due_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.to)} ({self.status})"
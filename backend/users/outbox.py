@@ -0,0 +1,231 @@
+"""
+Email outbox.
+
+Sending mail inline made registration, password reset and contact requests
+wait on the SMTP handshake, often 1-3 seconds with Gmail. Handlers now call
+``enqueue_email()``, which only stores an ``EmailOutbox`` row. Once the
+transaction commits, a background thread in the same process drains the
+outbox: it claims due emails in batches and sends them all over one SMTP
+connection. A failed email is retried with exponential backoff until it has
+been tried ``EMAIL_OUTBOX_MAX_ATTEMPTS`` times, then marked failed.
+
+Claims are leases: an email stays ``sending`` only until
+``EMAIL_OUTBOX_LEASE`` seconds have passed, after which any drain may claim
+it again, so emails held by a worker that died are not lost. Retries are
+sent by the next drain after they become due, started by a later enqueue or
+by the ``send_outbox_emails`` command, which should run periodically (or
+with ``--loop``) so retries do not wait for new mail.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Return this process's outbox thread, created on first use.
+
+    One thread is enough: a drain sends everything due, so drains queued
+    behind it find little left to do. It is created again after a fork.
+    """
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="email-outbox"
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def enqueue_email(subject, body, to, from_email=None, html_body="", reply_to=None):
+    """
+    Queue an email for the background drain and return its outbox row.
+
+    Takes the arguments of ``EmailMultiAlternatives``, with ``html_body``
+    attached as the text/html alternative when given.
+    """
+    email = EmailOutbox.objects.create(
+        subject=subject,
+        body=body,
+        html_body=html_body or "",
+        from_email=from_email or "",
+        to=list(to),
+        reply_to=list(reply_to or []),
+    )
+    if getattr(settings, "EMAIL_OUTBOX_SEND_ON_COMMIT", True):
+        # The drain thread uses its own connection, so start it only once
+        # the row is committed
+        transaction.on_commit(lambda: get_executor().submit(_drain_in_thread))
+    return email
+
+
+def _drain_in_thread():
+    try:
+        drain_outbox()
+    except Exception:
+        logger.exception("Email outbox drain failed")
+    finally:
+        # Connections are per thread; don't leave this one open
+        connections.close_all()
+
+
+def retry_delay(attempts) -> timedelta:
+    """Delay before retrying an email that has failed ``attempts`` times."""
+    base = getattr(settings, "EMAIL_OUTBOX_RETRY_DELAY", 60)
+    cap = getattr(settings, "EMAIL_OUTBOX_MAX_RETRY_DELAY", 60 * 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+
+def claim_batch(batch_size):
+    """Claim up to ``batch_size`` due emails for this drain and return them."""
+    now = timezone.now()
+    due = EmailOutbox.objects.filter(
+        status__in=[EmailOutbox.STATUS_PENDING, EmailOutbox.STATUS_SENDING],
+        next_attempt_at__lte=now,
+    )
+    ids = list(
+        due.order_by("next_attempt_at", "id").values_list("id", flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+
+    # The lease expiry doubles as this claim's token: rows another drain
+    # claimed first are no longer due, so the update skips them
+    lease = now + timedelta(seconds=getattr(settings, "EMAIL_OUTBOX_LEASE", 300))
+    due.filter(pk__in=ids).update(
+        status=EmailOutbox.STATUS_SENDING, next_attempt_at=lease
+    )
+    return list(
+        EmailOutbox.objects.filter(
+            pk__in=ids, status=EmailOutbox.STATUS_SENDING, next_attempt_at=lease
+        ).order_by("id")
+    )
+
+
+def _message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email or None,
+        to=email.to,
+        reply_to=email.reply_to or None,
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, "text/html")
+    return message
+
+
+def _record_sent(email):
+    EmailOutbox.objects.filter(pk=email.pk).update(
+        status=EmailOutbox.STATUS_SENT,
+        attempts=email.attempts + 1,
+        sent_at=timezone.now(),
+        last_error="",
+    )
+
+
+def _record_failure(email, error):
+    """Schedule a retry of ``email``, or fail it; return the outcome."""
+    attempts = email.attempts + 1
+    if attempts >= getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5):
+        status, outcome = EmailOutbox.STATUS_FAILED, "failed"
+        next_attempt_at = timezone.now()
+    else:
+        status, outcome = EmailOutbox.STATUS_PENDING, "retrying"
+        next_attempt_at = timezone.now() + retry_delay(attempts)
+
+    EmailOutbox.objects.filter(pk=email.pk).update(
+        status=status,
+        attempts=attempts,
+        next_attempt_at=next_attempt_at,
+        last_error=str(error),
+    )
+    logger.warning(
+        f"Email {email.pk} to {email.to} failed (attempt {attempts}, "
+        f"{outcome}): {error}"
+    )
+    return outcome
+
+
+def _send_batch(emails, connection, totals):
+    """
+    Send ``emails`` over ``connection``, adding their outcomes to ``totals``.
+
+    Returns False when the mail server cannot be reached, after scheduling a
+    retry of the emails not yet sent.
+    """
+    for index, email in enumerate(emails):
+        try:
+            # Reopens the connection if an earlier error closed it
+            connection.open()
+        except Exception as e:
+            for unsent in emails[index:]:
+                totals[_record_failure(unsent, e)] += 1
+            return False
+
+        try:
+            if not _message(email, connection).send():
+                raise RuntimeError("The mail backend did not send the email")
+        except Exception as e:
+            # The SMTP session may be unusable after an error
+            connection.close()
+            totals[_record_failure(email, e)] += 1
+        else:
+            _record_sent(email)
+            totals["sent"] += 1
+    return True
+
+
+def drain_outbox(batch_size=None):
+    """
+    Send every due email, a batch at a time, over one mail connection.
+
+    Stops early when the mail server cannot be reached. Returns the number
+    of emails sent, scheduled for a retry and failed for good.
+    """
+    batch_size = batch_size or getattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 50)
+    totals = {"sent": 0, "retrying": 0, "failed": 0}
+    connection = get_connection()
+    try:
+        while True:
+            emails = claim_batch(batch_size)
+            if not emails or not _send_batch(emails, connection, totals):
+                break
+    finally:
+        connection.close()
+
+    if any(totals.values()):
+        logger.info(
+            f"Email outbox drained: {totals['sent']} sent, "
+            f"{totals['retrying']} to retry, {totals['failed']} failed"
+        )
+    return totals
+
+
+def purge_sent_emails():
+    """Delete sent emails older than ``EMAIL_OUTBOX_KEEP_DAYS``; return how many."""
+    cutoff = timezone.now() - timedelta(
+        days=getattr(settings, "EMAIL_OUTBOX_KEEP_DAYS", 30)
+    )
+    deleted, _ = EmailOutbox.objects.filter(
+        status=EmailOutbox.STATUS_SENT, sent_at__lt=cutoff
+    ).delete()
+    return deleted
@@ -2,11 +2,14 @@
 from django.conf import settings
 from django.dispatch import receiver
 from django.template.loader import render_to_string
-from django.core.mail import EmailMultiAlternatives
 from django.utils.html import strip_tags
 from django_rest_passwordreset.signals import reset_password_token_created
+from django.contrib.auth import get_user_model
 from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save
 from utils.url_utils import URLBuilder
+from .authentication import invalidate_cached_user
+from .outbox import enqueue_email
 from dotenv import load_dotenv
 import os
 import logging
@@ -31,19 +34,17 @@ def password_reset_token_created(reset_password_token, *args, **kwargs):
     html_message = render_to_string("backend/email.html", context=context)
     plain_message = strip_tags(html_message)
 
-    msg = EmailMultiAlternatives(
+    enqueue_email(
         subject="Request for resetting password for {title}".format(
             title=reset_password_token.user.email
         ),
         body=plain_message,
         from_email=f"HepatoCAI Team <{settings.EMAIL_HOST_USER}>",
         to=[reset_password_token.user.email],
+        html_body=html_message,
     )
 
-    msg.attach_alternative(html_message, "text/html")
-    msg.send()
-
-    logger.info(f"Password reset email sent to: {reset_password_token.user.email}")
+    logger.info(f"Password reset email queued for: {reset_password_token.user.email}")
 
 
 @receiver(user_logged_in)
@@ -74,3 +75,16 @@ def generate_jwt_on_login(request, user, **kwargs):
         logger.info(f"Login tracking updated for social auth user: {user.email}")
 
     logger.info(f"JWT generated for user login: {user.email}")
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_authenticated_user(sender, instance, raw=False, **kwargs):
+    """
+    Drop the cached copy JWT authentication keeps of a user whenever it is
+    saved or deleted, so status, permission and password changes apply to
+    the user's next request.
+    """
+    if raw:
+        return
+    invalidate_cached_user(instance.pk)
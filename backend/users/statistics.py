@@ -0,0 +1,67 @@
+"""
+Account statistics for the user management dashboard.
+
+All the counts come from one conditional aggregate over the user table. When
+the analytics cache is enabled (see ``diagnosis.analytics_cache``) the result
+is cached for ``USER_STATISTICS_CACHE_TTL`` seconds; permission changes made
+through the user management API invalidate it straight away, while sign-ups
+and logins show up once the entry expires.
+"""
+
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from utils.cache import TaggedCache
+
+USERS_TAG = "users:all"
+
+
+def get_statistics_cache() -> Optional[TaggedCache]:
+    """Return the statistics cache, or None when caching is disabled."""
+    if not getattr(settings, "ANALYTICS_CACHE_ENABLED", False):
+        return None
+    return TaggedCache(
+        alias=getattr(settings, "ANALYTICS_CACHE_ALIAS", "default"),
+        prefix="users",
+        timeout=getattr(settings, "USER_STATISTICS_CACHE_TTL", 60),
+    )
+
+
+def compute_user_statistics() -> dict:
+    """Count users by status, role and recent activity in one query."""
+    now = timezone.now()
+    return get_user_model().objects.aggregate(
+        total_users=Count("pk"),
+        active_users=Count("pk", filter=Q(is_active=True)),
+        staff_users=Count("pk", filter=Q(is_staff=True)),
+        super_users=Count("pk", filter=Q(is_superuser=True)),
+        new_users_this_week=Count(
+            "pk", filter=Q(date_joined__gte=now - timedelta(days=7))
+        ),
+        recent_logins=Count("pk", filter=Q(last_login__gte=now - timedelta(days=1))),
+    )
+
+
+def get_user_statistics() -> dict:
+    """Return the user statistics, from the cache when it is enabled."""
+    statistics_cache = get_statistics_cache()
+    if statistics_cache is None:
+        return compute_user_statistics()
+    value, _ = statistics_cache.get_or_compute(
+        "statistics", [USERS_TAG], compute_user_statistics
+    )
+    return value
+
+
+def invalidate_user_statistics():
+    """Invalidate the cached statistics once the current transaction commits."""
+    statistics_cache = get_statistics_cache()
+    if statistics_cache is None:
+        return
+    transaction.on_commit(lambda: statistics_cache.invalidate(USERS_TAG))
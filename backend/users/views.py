@@ -4,6 +4,7 @@ from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import viewsets, permissions, status
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.exceptions import (
@@ -19,14 +20,19 @@ from django.contrib.auth import get_user_model, logout, authenticate
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.utils import timezone
-from django.core.mail import send_mail, EmailMultiAlternatives
 from django.views import View
-from django.http import HttpResponse, JsonResponse, HttpResponseRedirect
+from django.http import (
+    HttpResponse,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.contrib import messages
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.shortcuts import render, redirect
 from django.conf import settings
+from django.db.models import Q
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 
@@ -40,10 +46,15 @@ from .serializers import (
     CustomTokenObtainPairSerializer,
     ContactFormSerializer,
 )
+from .exports import stream_users_csv
+from .outbox import enqueue_email
+from .statistics import get_user_statistics, invalidate_user_statistics
 from utils.responses import StandardResponse, handle_exceptions
 from utils.security import SecurityValidator, RateLimitManager, AuditLogger
 from utils.ip_utils import update_user_login_tracking
 from utils.url_utils import URLBuilder
+from utils.pagination import parse_limit
+from utils.downloads import GZIP_CONTENT_TYPE, gzip_chunks
 
 import json
 import logging
@@ -60,22 +71,23 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
     def post(self, request, *args, **kwargs):
-        # Call the parent post method to handle authentication
-        response = super().post(request, *args, **kwargs)
+        # Authenticate once; the same user mints the tokens and is tracked,
+        # rather than validating the credentials (and hashing the password)
+        # a second time to find the user again
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
 
-        # If authentication was successful, update login tracking
-        if response.status_code == 200:
-            # Extract user from the serializer
-            serializer = self.get_serializer(data=request.data)
-            if serializer.is_valid():
-                user = serializer.user
-                # Update login tracking for email/password authentication
-                update_user_login_tracking(user, request)
-                logger.info(
-                    f"Login tracking updated for user {user.email} via /accounts/token/"
-                )
+        user = serializer.user
+        # Update login tracking for email/password authentication
+        update_user_login_tracking(user, request)
+        logger.info(
+            f"Login tracking updated for user {user.email} via /accounts/token/"
+        )
 
-        return response
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
 def verificationMail(name, verification_link, email):
@@ -88,16 +100,14 @@ def verificationMail(name, verification_link, email):
     html_message = render_to_string("backend/emailConfirm.html", context=context)
     plain_message = strip_tags(html_message)
 
-    msg = EmailMultiAlternatives(
+    enqueue_email(
         subject="Request for Confirm your email {title}".format(title=email),
         body=plain_message,
         from_email=f"HepatoCAI Team <{settings.EMAIL_HOST_USER}>",
         to=[email],
+        html_body=html_message,
     )
 
-    msg.attach_alternative(html_message, "text/html")
-    msg.send()
-
 
 def SendVerificationEmail(user):
     token = default_token_generator.make_token(user)
@@ -349,6 +359,88 @@ class ProfileViewSet(viewsets.ViewSet):
             )
 
 
+USER_PAGE_SIZE = 50
+USER_MAX_PAGE_SIZE = 200
+
+# Columns of the user management list
+USER_LIST_FIELDS = [
+    "id",
+    "email",
+    "full_name",
+    "first_name",
+    "last_name",
+    "username",
+    "is_staff",
+    "is_superuser",
+    "is_active",
+    "verified_email",
+    "is_social_user",
+    "social_provider",
+    "date_joined",
+    "last_login",
+    "profile_picture",
+    # Contact & Location Information
+    "phone_number",
+    "country",
+    "city",
+    "timezone",
+    # Activity Tracking
+    "last_login_ip",
+    "login_count",
+    "phone_verified_at",
+    "terms_accepted_at",
+    "terms_version",
+]
+
+
+def _bool_param(params, name):
+    """Parse an optional true/false query parameter."""
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    if value.lower() in ("true", "1", "yes"):
+        return True
+    if value.lower() in ("false", "0", "no"):
+        return False
+    raise ValueError(f"{name} must be true or false")
+
+
+def _filter_users(queryset, params):
+    """
+    Apply the user management list filters.
+
+    Raises:
+        ValueError: If a filter value is invalid
+    """
+    for name in ("is_active", "is_staff", "is_superuser"):
+        value = _bool_param(params, name)
+        if value is not None:
+            queryset = queryset.filter(**{name: value})
+
+    social_provider = params.get("social_provider")
+    if social_provider:
+        queryset = queryset.filter(social_provider=social_provider)
+
+    search = params.get("search", "").strip()
+    if search:
+        queryset = queryset.filter(
+            Q(email__icontains=search)
+            | Q(full_name__icontains=search)
+            | Q(username__icontains=search)
+        )
+    return queryset
+
+
+def _user_list_item(row):
+    """Complete a ``values()`` row of the user list for the response."""
+    row["full_name"] = (
+        row["full_name"]
+        or f"{row['first_name']} {row['last_name']}".strip()
+        or row["username"]
+    )
+    return row
+
+
 class UserManagementView(APIView):
     """
     Unified API endpoints for user management - accessible by staff, modifiable by superusers only
@@ -359,9 +451,45 @@ class UserManagementView(APIView):
     @extend_schema(
         operation_id="user_management_list",
         summary="List all users",
-        description="Get comprehensive list of all users for admin management. Accessible by staff, only superusers can modify.",
+        description="Get a page of users for admin management, with account statistics. Accessible by staff, only superusers can modify.",
+        parameters=[
+            OpenApiParameter("page", OpenApiTypes.INT, description="Page number"),
+            OpenApiParameter(
+                "page_size",
+                OpenApiTypes.INT,
+                description=f"Users per page (default {USER_PAGE_SIZE}, max {USER_MAX_PAGE_SIZE})",
+            ),
+            OpenApiParameter(
+                "search",
+                OpenApiTypes.STR,
+                description="Filter by email, name or username (partial match)",
+            ),
+            OpenApiParameter(
+                "is_active", OpenApiTypes.BOOL, description="Filter by active status"
+            ),
+            OpenApiParameter(
+                "is_staff", OpenApiTypes.BOOL, description="Filter by staff status"
+            ),
+            OpenApiParameter(
+                "is_superuser",
+                OpenApiTypes.BOOL,
+                description="Filter by superuser status",
+            ),
+            OpenApiParameter(
+                "social_provider",
+                OpenApiTypes.STR,
+                description="Filter by social login provider (e.g. google)",
+            ),
+            OpenApiParameter(
+                "export",
+                OpenApiTypes.STR,
+                description="Set to 'csv' to download all users as CSV instead, "
+                "or 'csv.gz' for a gzip-compressed CSV",
+            ),
+        ],
         responses={
             200: OpenApiResponse(description="Users retrieved successfully"),
+            400: OpenApiResponse(description="Invalid filter or pagination parameter"),
             403: OpenApiResponse(description="Permission denied - staff required"),
             500: OpenApiResponse(description="Internal server error"),
         },
@@ -369,7 +497,7 @@ class UserManagementView(APIView):
     )
     @handle_exceptions
     def get(self, request):
-        """Get list of all users for management"""
+        """Get a page of users for management"""
         logger.info(f"UserManagementView - request.user: {request.user}")
         logger.info(
             f"UserManagementView - request.user.is_authenticated: {request.user.is_authenticated}"
@@ -382,81 +510,53 @@ class UserManagementView(APIView):
         )
 
         try:
-            # Check for export parameter
-            export_format = request.GET.get("export")
-            if export_format == "csv":
-                return self.export_users(request)
-
             # Allow access to staff members, but only superusers can modify
             if not request.user.is_staff:
                 return StandardResponse.permission_denied(
                     "Only staff members can access user management"
                 )
 
-            users = User.objects.all().order_by("-date_joined")
-            user_data = []
-
-            # Calculate statistics
-            total_users = users.count()
-            active_users = users.filter(is_active=True).count()
-            staff_users = users.filter(is_staff=True).count()
-            super_users = users.filter(is_superuser=True).count()
-
-            # Get new users this week
-            from datetime import datetime, timedelta
-
-            week_ago = datetime.now() - timedelta(days=7)
-            new_users_this_week = users.filter(date_joined__gte=week_ago).count()
-
-            # Get recent logins (last 24 hours)
-            day_ago = datetime.now() - timedelta(days=1)
-            recent_logins = users.filter(last_login__gte=day_ago).count()
-
-            for user in users:
-                user_data.append(
-                    {
-                        "id": user.id,
-                        "email": user.email,
-                        "full_name": user.full_name
-                        or f"{user.first_name} {user.last_name}".strip()
-                        or user.username,
-                        "first_name": user.first_name,
-                        "last_name": user.last_name,
-                        "username": user.username,
-                        "is_staff": user.is_staff,
-                        "is_superuser": user.is_superuser,
-                        "is_active": user.is_active,
-                        "verified_email": user.verified_email,
-                        "is_social_user": user.is_social_user,
-                        "social_provider": user.social_provider,
-                        "date_joined": user.date_joined,
-                        "last_login": user.last_login,
-                        "profile_picture": user.profile_picture,
-                        # Contact & Location Information
-                        "phone_number": user.phone_number,
-                        "country": user.country,
-                        "city": user.city,
-                        "timezone": user.timezone,
-                        # Activity Tracking
-                        "last_login_ip": user.last_login_ip,
-                        "login_count": user.login_count,
-                        "phone_verified_at": user.phone_verified_at,
-                        "terms_accepted_at": user.terms_accepted_at,
-                        "terms_version": user.terms_version,
-                    }
+            # Check for export parameter
+            export_format = request.GET.get("export")
+            if export_format in ("csv", "csv.gz"):
+                return self.export_users(request, compress=export_format == "csv.gz")
+
+            params = request.query_params
+            try:
+                users = _filter_users(User.objects.all(), params)
+                page = int(params.get("page", 1))
+                if page < 1:
+                    raise ValueError("Page must be positive")
+                page_size = parse_limit(
+                    params.get("page_size"), USER_PAGE_SIZE, USER_MAX_PAGE_SIZE
                 )
+            except ValueError as e:
+                return StandardResponse.error(
+                    f"Invalid parameter: {str(e)}", status.HTTP_400_BAD_REQUEST
+                )
+
+            count = users.count()
+            start = (page - 1) * page_size
+            # Only the listed columns, as dicts rather than model instances
+            rows = users.order_by("-date_joined", "-id").values(*USER_LIST_FIELDS)[
+                start : start + page_size
+            ]
+            user_data = [_user_list_item(row) for row in rows]
+
+            statistics = get_user_statistics()
 
             return StandardResponse.success(
                 data=user_data,
                 message="Users retrieved successfully",
-                total_users=total_users,
-                statistics={
-                    "total_users": total_users,
-                    "active_users": active_users,
-                    "staff_users": staff_users,
-                    "super_users": super_users,
-                    "new_users_this_week": new_users_this_week,
-                    "recent_logins": recent_logins,
+                total_users=statistics["total_users"],
+                statistics=statistics,
+                pagination={
+                    "page": page,
+                    "page_size": page_size,
+                    "count": count,
+                    "total_pages": (count + page_size - 1) // page_size,
+                    "has_next": start + page_size < count,
+                    "has_previous": page > 1,
                 },
                 permissions={
                     "can_view_users": request.user.is_staff,
@@ -612,6 +712,7 @@ class UserManagementView(APIView):
                     user_to_update.is_active = request.data["is_active"]
 
             user_to_update.save()
+            invalidate_user_statistics()
 
             logger.info(
                 f"User permissions updated for {user_to_update.email} by {request.user.email}. "
@@ -638,72 +739,24 @@ class UserManagementView(APIView):
             logger.error(f"Error in UserManagementView.patch: {str(e)}")
             return StandardResponse.server_error("Failed to update user permissions", e)
 
-    def export_users(self, request):
-        """Export users data as CSV"""
+    def export_users(self, request, compress=False):
+        """Stream users data as CSV, gzip-compressed when ``compress`` is set"""
         try:
             if not request.user.is_staff:
                 return StandardResponse.permission_denied(
                     "Only staff members can export user data"
                 )
 
-            users = User.objects.all().order_by("-date_joined")
-
-            import csv
-            from django.http import HttpResponse
-
-            response = HttpResponse(content_type="text/csv")
-            response["Content-Disposition"] = 'attachment; filename="users_export.csv"'
-
-            writer = csv.writer(response)
-            writer.writerow(
-                [
-                    "ID",
-                    "Email",
-                    "Full Name",
-                    "First Name",
-                    "Last Name",
-                    "Username",
-                    "Is Staff",
-                    "Is Superuser",
-                    "Is Active",
-                    "Verified Email",
-                    "Is Social User",
-                    "Social Provider",
-                    "Date Joined",
-                    "Last Login",
-                    "Phone Number",
-                    "Country",
-                    "City",
-                    "Timezone",
-                    "Login Count",
-                ]
-            )
-
-            for user in users:
-                writer.writerow(
-                    [
-                        user.id,
-                        user.email,
-                        user.full_name,
-                        user.first_name,
-                        user.last_name,
-                        user.username,
-                        user.is_staff,
-                        user.is_superuser,
-                        user.is_active,
-                        user.verified_email,
-                        user.is_social_user,
-                        user.social_provider,
-                        user.date_joined,
-                        user.last_login,
-                        user.phone_number,
-                        user.country,
-                        user.city,
-                        user.timezone,
-                        user.login_count,
-                    ]
-                )
+            content = stream_users_csv()
+            filename = "users_export.csv"
+            content_type = "text/csv"
+            if compress:
+                content = gzip_chunks(content)
+                filename += ".gz"
+                content_type = GZIP_CONTENT_TYPE
 
+            response = StreamingHttpResponse(content, content_type=content_type)
+            response["Content-Disposition"] = f'attachment; filename="{filename}"'
             return response
 
         except Exception as e:
@@ -820,19 +873,17 @@ class ContactMeView(APIView):
                 Reply directly to this email to respond to the sender.
                 """
 
-                # Send email
-                msg = EmailMultiAlternatives(
+                # Queue the email; it is sent in the background
+                enqueue_email(
                     subject=f"[HepatoCAI Contact] {subject}",
                     body=plain_message,
                     from_email=f"HepatoCAI Contact <{settings.EMAIL_HOST_USER}>",
                     to=[admin_email],
+                    html_body=html_message,
                     reply_to=[email],  # Set reply-to as the sender's email
                 )
 
-                msg.attach_alternative(html_message, "text/html")
-                msg.send()
-
-                logger.info(f"Contact email sent successfully from {name} ({email})")
+                logger.info(f"Contact email queued from {name} ({email})")
 
                 # Optional: Send confirmation email to sender
                 try:
@@ -867,21 +918,19 @@ class ContactMeView(APIView):
                     The HepatoCAI Team
                     """
 
-                    confirmation_msg = EmailMultiAlternatives(
+                    enqueue_email(
                         subject="Thank you for contacting HepatoCAI",
                         body=confirmation_plain,
                         from_email=f"HepatoCAI Team <{settings.EMAIL_HOST_USER}>",
                         to=[email],
+                        html_body=confirmation_html,
                     )
 
-                    confirmation_msg.attach_alternative(confirmation_html, "text/html")
-                    confirmation_msg.send()
-
-                    logger.info(f"Confirmation email sent to {email}")
+                    logger.info(f"Confirmation email queued for {email}")
 
                 except Exception as conf_e:
                     logger.warning(
-                        f"Failed to send confirmation email to {email}: {str(conf_e)}"
+                        f"Failed to queue confirmation email to {email}: {str(conf_e)}"
                     )
                     # Don't fail the main request if confirmation email fails
                     return StandardResponse.success(
@@ -0,0 +1,132 @@
+"""
+Tag-invalidated caching utilities for HepatoCAI application.
+
+Cached values are stored under keys that embed the current generation of
+each of their tags. Invalidating a tag bumps its generation, so every key
+built from the old generation stops being read at once, without having to
+find and delete the entries (they simply expire).
+
+Generations start from a time-based value rather than 1. If a generation key
+is evicted, its new generation can never match one used by older entries.
+"""
+
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+def _new_generation() -> int:
+    return time.time_ns()
+
+
+class TaggedCache:
+    """Cache of computed values invalidated by tag, with stampede protection."""
+
+    def __init__(
+        self,
+        alias: str = "default",
+        prefix: str = "tagged",
+        timeout: Optional[int] = 300,
+        lock_timeout: int = 30,
+        wait_timeout: float = 10.0,
+        poll_interval: float = 0.05,
+    ):
+        self.alias = alias
+        self.prefix = prefix
+        self.timeout = timeout
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    def generations(self, tags: Iterable[str]) -> list:
+        """Return the current generation of each tag, creating missing ones."""
+        tags = list(tags)
+        keys = [self._tag_key(tag) for tag in tags]
+        found = self.cache.get_many(keys)
+        generations = []
+        for key in keys:
+            if key not in found:
+                # add() keeps a generation set concurrently by another process
+                self.cache.add(key, _new_generation(), None)
+                found[key] = self.cache.get(key)
+            generations.append(found[key])
+        return generations
+
+    def invalidate(self, *tags: str):
+        """Bump the generation of ``tags``, orphaning every entry built on them."""
+        for tag in tags:
+            key = self._tag_key(tag)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                # No generation yet, so nothing is cached under this tag
+                self.cache.set(key, _new_generation(), None)
+
+    def make_key(self, name: str, tags: Iterable[str], parts: Any = None) -> str:
+        """Return the key of ``name`` for the current generations of ``tags``."""
+        tags = sorted(tags)
+        payload = json.dumps(
+            [list(zip(tags, self.generations(tags))), parts],
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha256(payload.encode()).hexdigest()
+        return f"{self.prefix}:{name}:{digest}"
+
+    def get_or_compute(
+        self,
+        name: str,
+        tags: Iterable[str],
+        compute: Callable[[], Any],
+        parts: Any = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Return the cached value of ``name`` or compute and cache it.
+
+        On a miss, only the caller that takes the recompute lock runs
+        ``compute``. Concurrent callers wait for its result and only compute
+        themselves if it does not arrive within ``wait_timeout``.
+
+        Returns:
+            The value and whether it came from the cache
+        """
+        key = self.make_key(name, tags, parts)
+        value = self.cache.get(key)
+        if value is not None:
+            return value, True
+
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        if not self.cache.add(lock_key, token, self.lock_timeout):
+            deadline = time.monotonic() + self.wait_timeout
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                value = self.cache.get(key)
+                if value is not None:
+                    return value, True
+                if self.cache.get(lock_key) is None:
+                    break
+            logger.warning(f"Recomputing {name} without the lock for {key}")
+            return compute(), False
+
+        try:
+            value = compute()
+            self.cache.set(key, value, self.timeout)
+            return value, False
+        finally:
+            if self.cache.get(lock_key) == token:
+                self.cache.delete(lock_key)
@@ -0,0 +1,125 @@
+"""
+File downloads with HTTP Range support, so large exports can be resumed, and
+helpers for streamed downloads: a CSV pseudo-buffer and on-the-fly
+compression.
+"""
+
+import os
+import re
+import zlib
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+BLOCK_SIZE = 64 * 1024
+
+GZIP_CONTENT_TYPE = "application/gzip"
+
+# Rows fetched from the database per round trip by streamed exports
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object that returns what is written, for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def parse_range_header(header, size):
+    """
+    Return the inclusive ``(start, end)`` byte range requested by a Range
+    header for a file of ``size`` bytes.
+
+    Returns None when the whole file should be sent: no header, a header
+    that is not a single byte range (multipart ranges are not supported),
+    or a range covering the whole file. Raises ValueError when the range
+    cannot be satisfied.
+    """
+    match = RANGE_PATTERN.match((header or "").strip())
+    if not match:
+        return None
+    first, last = match.groups()
+
+    if not first:
+        # Suffix range: the last N bytes
+        if not last or int(last) == 0:
+            raise ValueError("Unsatisfiable range")
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size or start > end:
+            raise ValueError("Unsatisfiable range")
+
+    if start == 0 and end == size - 1:
+        return None
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            block = f.read(min(BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def ranged_file_response(request, path, filename, content_type):
+    """
+    Serve ``path`` as an attachment, honouring a single-range Range header.
+
+    Files served this way must not change once written, since an If-Range
+    validator is not checked before a partial response is sent.
+    """
+    size = os.path.getsize(path)
+    try:
+        byte_range = parse_range_header(request.headers.get("Range"), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        response = FileResponse(
+            open(path, "rb"),
+            as_attachment=True,
+            filename=filename,
+            content_type=content_type,
+        )
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _read_range(path, start, length), status=206, content_type=content_type
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(length)
+        response["Content-Disposition"] = content_disposition_header(
+            as_attachment=True, filename=filename
+        )
+
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def gzip_chunks(chunks, level=6):
+    """
+    Compress an iterable of str or bytes chunks into a gzip stream.
+
+    Only the compressor's window is held in memory, so this can wrap a
+    streamed export of any size.
+    """
+    # wbits=31 writes the gzip header and trailer rather than raw zlib
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
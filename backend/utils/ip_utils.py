@@ -3,7 +3,6 @@ IP address utility functions for consistent IP address extraction.
 """
 
 import logging
-from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
@@ -86,21 +85,17 @@ def update_user_login_tracking(user, request):
     """
     Update user login tracking fields.
 
+    The login count, last login time and IP are written in one atomic
+    UPDATE (see ``CustomUser.record_login``), without model validation.
+
     Args:
         user: User instance to update
         request: Django HttpRequest object
     """
     try:
-        # Extract client IP
+        # Extract client IP; keep the previous one when it cannot be found
         client_ip = get_client_ip(request)
-
-        # Update login tracking fields
-        user.last_login_ip = client_ip
-        user.login_count = (user.login_count or 0) + 1
-        user.last_login = timezone.now()
-
-        # Save the user with updated login tracking
-        user.save(update_fields=["last_login_ip", "login_count", "last_login"])
+        user.record_login(client_ip if _is_valid_ip(client_ip) else None)
 
         logger.info(
             f"Login tracking updated for user {user.email}: IP={client_ip}, Count={user.login_count}"
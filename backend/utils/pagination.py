@@ -0,0 +1,137 @@
+"""
+Keyset (cursor) pagination utilities for HepatoCAI application.
+
+Offset pagination makes the database walk past every row before the page,
+so deep pages get slower as a table grows. Keyset pagination continues right
+after the last row already returned, using a unique, indexed ordering, so
+every page costs the same. The position is handed to clients as an opaque
+cursor string.
+"""
+
+import base64
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode ordering values as an opaque, URL-safe cursor."""
+    payload = json.dumps(
+        [
+            value.isoformat() if hasattr(value, "isoformat") else str(value)
+            for value in values
+        ]
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[str]:
+    """
+    Decode a cursor created by ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(isinstance(value, str) for value in values)
+    ):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def cursor_values(queryset, ordering: Sequence[str], values: Sequence[str]) -> list:
+    """
+    Convert decoded cursor values to the types of the fields they order by.
+
+    A tampered cursor would otherwise only fail when the page query runs.
+
+    Raises:
+        ValueError: If a value is not valid for its field
+    """
+    converted = []
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        annotation = queryset.query.annotations.get(name)
+        try:
+            if annotation is not None:
+                model_field = annotation.output_field
+            else:
+                model_field = queryset.model._meta.get_field(name)
+            converted.append(model_field.to_python(value))
+        except (FieldDoesNotExist, ValidationError, TypeError) as e:
+            raise ValueError("Invalid cursor") from e
+    return converted
+
+
+def keyset_filter(ordering: Sequence[str], values: Sequence[Any]) -> Q:
+    """
+    Return a filter selecting the rows that come after ``values`` in ``ordering``.
+
+    For ``("-updated_at", "-id")`` this is
+    ``updated_at < v0 OR (updated_at = v0 AND id < v1)``.
+    """
+    condition = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        step = Q(**{f"{name}__{lookup}": values[index]})
+        for previous, value in zip(ordering[:index], values[:index]):
+            step &= Q(**{previous.lstrip("-"): value})
+        condition |= step
+    return condition
+
+
+def parse_limit(value: Optional[str], default: int, maximum: int) -> int:
+    """
+    Parse a page size query parameter, capped at ``maximum``.
+
+    Raises:
+        ValueError: If the value is not a positive integer
+    """
+    if value in (None, ""):
+        return default
+    limit = int(value)
+    if limit < 1:
+        raise ValueError("Limit must be positive")
+    return min(limit, maximum)
+
+
+def paginate_keyset(
+    queryset, ordering: Sequence[str], cursor: Optional[str], limit: int
+) -> Tuple[list, Optional[str]]:
+    """
+    Return one page of ``queryset`` and the cursor of the next page.
+
+    ``ordering`` must end with a unique field so that every row has a distinct
+    position. The queryset may return model instances or ``values()`` dicts.
+    One query is run per page, whatever the page or table size.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = cursor_values(queryset, ordering, decode_cursor(cursor, len(ordering)))
+        queryset = queryset.filter(keyset_filter(ordering, values))
+
+    rows = list(queryset[: limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    names = [field.lstrip("-") for field in ordering]
+    if isinstance(last, dict):
+        next_values = [last[name] for name in names]
+    else:
+        next_values = [getattr(last, name) for name in names]
+    return rows, encode_cursor(next_values)
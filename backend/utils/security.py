@@ -35,23 +35,46 @@ class SecurityValidator:
         r"(\b(OR|AND)\b.*[=<>])",
     ]
 
+    # XSS_PATTERNS and SQL_PATTERNS as one expression, so a string is scanned
+    # once and the scan stops at the first match. It matches the same inputs
+    # (the tests check both agree), but:
+    # - every branch but the last starts with a character of the leading
+    #   lookahead, which turns most positions away with a single test;
+    # - the OR/AND rule only looks at the first OR/AND of each line. ".*"
+    #   rescanned the rest of the line from every "or" and "and", which took
+    #   20 ms on a 10 KB message with no line breaks.
+    INPUT_SCANNER = re.compile(
+        r"(?=[<jo'\";*|&\-siudcae])(?:"
+        r"(?P<xss><(?P<tag>script|iframe|object|embed)\b"
+        r"[^<]*(?:(?!<\/(?P=tag)>)<[^<]*)*<\/(?P=tag)>"
+        r"|javascript:|on\w+\s*=)"
+        r"|\b(?:SELECT|INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|EXEC|UNION)\b"
+        r"|[\'\";*|&]|--"
+        r")"
+        r"|^(?>[^\n]*?\b(?:OR|AND)\b)[^=<>\n]*+[=<>]",
+        re.IGNORECASE | re.MULTILINE,
+    )
+
+    @classmethod
+    def check_input(cls, data, field_name="input"):
+        """Raise ValidationError if a string matches an XSS or SQL pattern"""
+        match = cls.INPUT_SCANNER.search(data)
+        if match is None:
+            return
+
+        if match.group("xss") is not None:
+            logger.warning(f"XSS attempt detected in {field_name}: {data[:100]}")
+        else:
+            logger.warning(f"SQL injection attempt in {field_name}: {data[:100]}")
+        raise ValidationError(f"Invalid characters detected in {field_name}")
+
     @classmethod
     def validate_input(cls, data, field_name="input"):
         """Validate and sanitize user input"""
         if not isinstance(data, str):
             return data
 
-        # Check for XSS patterns
-        for pattern in cls.XSS_PATTERNS:
-            if re.search(pattern, data, re.IGNORECASE):
-                logger.warning(f"XSS attempt detected in {field_name}: {data[:100]}")
-                raise ValidationError(f"Invalid characters detected in {field_name}")
-
-        # Check for SQL injection patterns
-        for pattern in cls.SQL_PATTERNS:
-            if re.search(pattern, data, re.IGNORECASE):
-                logger.warning(f"SQL injection attempt in {field_name}: {data[:100]}")
-                raise ValidationError(f"Invalid characters detected in {field_name}")
+        cls.check_input(data, field_name)
 
         # Sanitize HTML
         sanitized = html.escape(data)
@@ -59,14 +82,23 @@ class SecurityValidator:
 
     @classmethod
     def validate_input_data(cls, data):
-        """Validate entire request data for security"""
+        """Validate entire request data, including nested objects and lists"""
         if not isinstance(data, dict):
             return False
 
+        # Walked with a stack rather than recursion, so deeply nested JSON
+        # cannot exhaust the recursion limit. Strings are reported under the
+        # top-level field holding them.
+        pending = list(data.items())
         try:
-            for key, value in data.items():
+            while pending:
+                key, value = pending.pop()
                 if isinstance(value, str):
-                    cls.validate_input(value, key)
+                    cls.check_input(value, key)
+                elif isinstance(value, dict):
+                    pending.extend((key, item) for item in value.values())
+                elif isinstance(value, (list, tuple)):
+                    pending.extend((key, item) for item in value)
             return True
         except ValidationError:
             return False
@@ -1,5 +1,5 @@
 import { useRef, useEffect } from "react";
-import { Box, Typography, Skeleton } from "@mui/material";
+import { Box, Typography, Skeleton, Button } from "@mui/material";
 import PropTypes from "prop-types";
 import MessageBubble from "./MessageBubble";
 
@@ -7,15 +7,25 @@ const ChatMessages = ({
   messages,
   isLoading = false,
   loadingMessage = false,
+  hasEarlier = false,
+  onLoadEarlier = () => {},
+  isLoadingEarlier = false,
 }) => {
   const messagesEndRef = useRef(null);
+  const lastMessageIdRef = useRef(null);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
   };
 
+  // Only follow the conversation when a newer message arrives, so that
+  // prepending earlier history keeps the reader where they were
   useEffect(() => {
-    scrollToBottom();
+    const lastMessageId = messages[messages.length - 1]?.id ?? null;
+    if (isLoading || lastMessageId !== lastMessageIdRef.current) {
+      scrollToBottom();
+    }
+    lastMessageIdRef.current = lastMessageId;
   }, [messages, isLoading]);
 
   // Loading skeleton component
@@ -288,6 +298,19 @@ const ChatMessages = ({
         </Box>
       ) : (
         <>
+          {hasEarlier && (
+            <Box sx={{ display: "flex", justifyContent: "center", mb: 2 }}>
+              <Button
+                size="small"
+                onClick={onLoadEarlier}
+                disabled={isLoadingEarlier}
+                sx={{ textTransform: "none", fontWeight: 600 }}
+              >
+                {isLoadingEarlier ? "Loading..." : "Load earlier messages"}
+              </Button>
+            </Box>
+          )}
+
           {messages.map((message) => (
             <MessageBubble key={message.id} message={message} />
           ))}
@@ -322,6 +345,9 @@ ChatMessages.propTypes = {
   ).isRequired,
   isLoading: PropTypes.bool,
   loadingMessage: PropTypes.bool,
+  hasEarlier: PropTypes.bool,
+  onLoadEarlier: PropTypes.func,
+  isLoadingEarlier: PropTypes.bool,
 };
 
 export default ChatMessages;
@@ -34,6 +34,9 @@ const ChatSidebar = ({
   onEditChat,
   onArchiveChat,
   isLoading = false,
+  hasMore = false,
+  onLoadMore,
+  isLoadingMore = false,
 }) => {
   const [anchorEl, setAnchorEl] = React.useState(null);
   const [selectedChatId, setSelectedChatId] = React.useState(null);
@@ -498,6 +501,31 @@ const ChatSidebar = ({
                   </ListItemButton>
                 </ListItem>
               ))}{" "}
+            {hasMore && (
+              <ListItem
+                disablePadding
+                sx={{ justifyContent: "center", py: 1 }}
+              >
+                <Button
+                  size="small"
+                  onClick={onLoadMore}
+                  disabled={isLoadingMore}
+                  startIcon={
+                    isLoadingMore ? (
+                      <CircularProgress size={14} color="inherit" />
+                    ) : null
+                  }
+                  sx={{
+                    textTransform: "none",
+                    fontWeight: 600,
+                    borderRadius: "12px",
+                    color: theme.colors.primary[600],
+                  }}
+                >
+                  {isLoadingMore ? "Loading..." : "Load more chats"}
+                </Button>
+              </ListItem>
+            )}
           </List>
         )}{" "}
         {/* Action Menu */}
@@ -635,6 +663,9 @@ ChatSidebar.propTypes = {
   onEditChat: PropTypes.func,
   onArchiveChat: PropTypes.func,
   isLoading: PropTypes.bool,
+  hasMore: PropTypes.bool,
+  onLoadMore: PropTypes.func,
+  isLoadingMore: PropTypes.bool,
 };
 
 ChatSidebar.defaultProps = {
@@ -643,6 +674,9 @@ ChatSidebar.defaultProps = {
   onEditChat: () => {},
   onArchiveChat: () => {},
   isLoading: false,
+  hasMore: false,
+  onLoadMore: () => {},
+  isLoadingMore: false,
 };
 
 export default ChatSidebar;
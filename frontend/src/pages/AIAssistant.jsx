@@ -34,7 +34,12 @@ function AIAssistant() {
   const [isLoading, setIsLoading] = useState(false);
   const [messageLoading, setmessageLoading] = useState(false);
   const [sidebarLoading, setSidebarLoading] = useState(false);
+  const [chatsCursor, setChatsCursor] = useState(null);
+  const [hasMoreChats, setHasMoreChats] = useState(false);
+  const [loadingMoreChats, setLoadingMoreChats] = useState(false);
   const [chatMessageLoading, setChatMessageLoading] = useState(false);
+  const [hasEarlierMessages, setHasEarlierMessages] = useState(false);
+  const [loadingEarlierMessages, setLoadingEarlierMessages] = useState(false);
   const [sidebarOpen, setSidebarOpen] = useState(!isMobile);
   const [error, setError] = useState(null);
 
@@ -51,9 +56,12 @@ function AIAssistant() {
       console.log("API response getchats:", response);
       if (response.success) {
         setChats(response.data);
+        setChatsCursor(response.nextCursor);
+        setHasMoreChats(response.hasMore);
       } else {
         console.warn("API not available");
         setChats([]);
+        setHasMoreChats(false);
         setError("Unable to load chats. Please check your connection.");
       }
     } catch (error) {
@@ -67,6 +75,33 @@ function AIAssistant() {
       setIsLoading(false);
     }
   };
+
+  const loadMoreChats = async () => {
+    if (!hasMoreChats || loadingMoreChats) return;
+    setLoadingMoreChats(true);
+    try {
+      const response = await aiAssistantService.getChats({
+        cursor: chatsCursor,
+      });
+      if (response.success) {
+        setChats((prev) => [
+          ...prev,
+          ...response.data.filter(
+            (chat) => !prev.some((existing) => existing.id === chat.id)
+          ),
+        ]);
+        setChatsCursor(response.nextCursor);
+        setHasMoreChats(response.hasMore);
+      } else {
+        setError("Unable to load more chats.");
+      }
+    } catch (error) {
+      console.error("Error loading more chats:", error);
+      setError("Unable to load more chats.");
+    } finally {
+      setLoadingMoreChats(false);
+    }
+  };
   const handleNewChat = useCallback(async () => {
     try {
       setSidebarLoading(true);
@@ -78,6 +113,7 @@ function AIAssistant() {
         setChats((prev) => [newChat, ...prev]);
         setCurrentChatId(newChat.id);
         setMessages([]);
+        setHasEarlierMessages(false);
         console.log("New chat created:", newChat);
         if (isMobile) setSidebarOpen(false);
       } else {
@@ -99,6 +135,7 @@ function AIAssistant() {
       setChatMessageLoading(true);
       setIsLoading(true);
       setMessages([]);
+      setHasEarlierMessages(false);
 
       const response = await aiAssistantService.getChatDetails(chatId);
       console.log("API response getChatDetails:", response);
@@ -108,6 +145,7 @@ function AIAssistant() {
         const messages = chatData.chat?.messages;
         console.log("Loading messages for chat:", chatId, messages);
         setMessages(messages);
+        setHasEarlierMessages(response.hasMore);
       } else {
         console.warn(
           "Could not load chat from backend:",
@@ -129,6 +167,30 @@ function AIAssistant() {
     }
   };
 
+  const loadEarlierMessages = async () => {
+    if (!hasEarlierMessages || loadingEarlierMessages || !messages.length) {
+      return;
+    }
+    setLoadingEarlierMessages(true);
+    try {
+      const response = await aiAssistantService.getChatDetails(currentChatId, {
+        before: messages[0].id,
+      });
+      if (response.success && response.data) {
+        const earlier = response.data.chat?.messages || [];
+        setMessages((prev) => [...earlier, ...prev]);
+        setHasEarlierMessages(response.hasMore);
+      } else {
+        setError("Failed to load earlier messages");
+      }
+    } catch (error) {
+      console.error("Error loading earlier messages:", error);
+      setError("Failed to load earlier messages");
+    } finally {
+      setLoadingEarlierMessages(false);
+    }
+  };
+
   const handleSendMessage = async (messageContent) => {
     let chatId = currentChatId;
     setmessageLoading(true);
@@ -223,6 +285,7 @@ function AIAssistant() {
         if (currentChatId === chatIdToDelete) {
           setCurrentChatId(null);
           setMessages([]);
+          setHasEarlierMessages(false);
         }
       } else {
         setError(response.error || "Failed to delete chat");
@@ -389,6 +452,9 @@ function AIAssistant() {
               onDeleteChat={handleDeleteChat}
               onEditChat={handleEditTitle}
               isLoading={sidebarLoading}
+              hasMore={hasMoreChats}
+              onLoadMore={loadMoreChats}
+              isLoadingMore={loadingMoreChats}
             />
           </Drawer>
         ) : (
@@ -417,6 +483,9 @@ function AIAssistant() {
               onDeleteChat={handleDeleteChat}
               onEditChat={handleEditTitle}
               isLoading={sidebarLoading}
+              hasMore={hasMoreChats}
+              onLoadMore={loadMoreChats}
+              isLoadingMore={loadingMoreChats}
             />
           </Box>
         )}
@@ -450,6 +519,9 @@ function AIAssistant() {
                 messages={messages}
                 isLoading={chatMessageLoading}
                 loadingMessage={messageLoading}
+                hasEarlier={hasEarlierMessages}
+                onLoadEarlier={loadEarlierMessages}
+                isLoadingEarlier={loadingEarlierMessages}
               />
               <ChatInput
                 onSendMessage={handleSendMessage}
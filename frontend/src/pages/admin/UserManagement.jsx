@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback, useMemo } from "react";
+import { useState, useEffect, useCallback } from "react";
 import {
   Box,
   Card,
@@ -228,9 +228,18 @@ StatCard.propTypes = {
 function UserManagement() {
   const { user: currentUser } = useAuth();
   const [users, setUsers] = useState([]);
-  const [filteredUsers, setFilteredUsers] = useState([]);
+  const [totalCount, setTotalCount] = useState(0);
+  const [stats, setStats] = useState({
+    totalUsers: 0,
+    activeUsers: 0,
+    staffUsers: 0,
+    superUsers: 0,
+    newUsersThisWeek: 0,
+    recentLogins: 0,
+  });
   const [loading, setLoading] = useState(false);
   const [searchTerm, setSearchTerm] = useState("");
+  const [debouncedSearch, setDebouncedSearch] = useState("");
   const [filterRole, setFilterRole] = useState("all");
   const [filterStatus, setFilterStatus] = useState("all");
   const [page, setPage] = useState(1);
@@ -251,65 +260,38 @@ function UserManagement() {
     user: null,
   });
 
-  // Memoize stats calculation to prevent unnecessary re-renders - only recalculate when users change
-  const calculatedStats = useMemo(() => {
-    if (users.length === 0) {
-      return {
-        totalUsers: 0,
-        activeUsers: 0,
-        staffUsers: 0,
-        superUsers: 0,
-        newUsersThisWeek: 0,
-        recentLogins: 0,
-      };
+  // Filters are applied on the server; map the role/status selects to its params
+  const buildUserParams = useCallback(() => {
+    const params = { page, page_size: rowsPerPage };
+    if (debouncedSearch) params.search = debouncedSearch;
+    if (filterRole === "superuser") params.is_superuser = true;
+    if (filterRole === "staff") {
+      params.is_staff = true;
+      params.is_superuser = false;
     }
-
-    const totalUsers = users.length;
-    const activeUsers = users.filter((u) => u.is_active).length;
-    const staffUsers = users.filter(
-      (u) => u.is_staff && !u.is_superuser
-    ).length;
-    const superUsers = users.filter((u) => u.is_superuser).length;
-
-    // Calculate users joined this week
-    const oneWeekAgo = new Date();
-    oneWeekAgo.setDate(oneWeekAgo.getDate() - 7);
-    const newUsersThisWeek = users.filter(
-      (u) => new Date(u.date_joined) > oneWeekAgo
-    ).length;
-
-    // Calculate recent logins (last 24 hours)
-    const oneDayAgo = new Date();
-    oneDayAgo.setDate(oneDayAgo.getDate() - 1);
-    const recentLogins = users.filter(
-      (u) => u.last_login && new Date(u.last_login) > oneDayAgo
-    ).length;
-
-    return {
-      totalUsers,
-      activeUsers,
-      staffUsers,
-      superUsers,
-      newUsersThisWeek,
-      recentLogins,
-    };
-  }, [users]);
-
-  // Paginated users for table display
-  const paginatedUsers = filteredUsers.slice(
-    (page - 1) * rowsPerPage,
-    page * rowsPerPage
-  );
+    if (filterRole === "user") params.is_staff = false;
+    if (filterStatus !== "all") params.is_active = filterStatus === "active";
+    return params;
+  }, [page, rowsPerPage, debouncedSearch, filterRole, filterStatus]);
 
   const fetchUsers = useCallback(async () => {
     setLoading(true);
     try {
       const endpoint = "/users/admin/users/";
-      const response = await api.get(endpoint);
+      const response = await api.get(endpoint, { params: buildUserParams() });
 
       if (response.data.status === "success") {
-        const userData = response.data.data;
-        setUsers(userData);
+        const statistics = response.data.statistics || {};
+        setUsers(response.data.data);
+        setTotalCount(response.data.pagination?.count ?? 0);
+        setStats({
+          totalUsers: statistics.total_users ?? 0,
+          activeUsers: statistics.active_users ?? 0,
+          staffUsers: statistics.staff_users ?? 0,
+          superUsers: statistics.super_users ?? 0,
+          newUsersThisWeek: statistics.new_users_this_week ?? 0,
+          recentLogins: statistics.recent_logins ?? 0,
+        });
         setPermissions(response.data.permissions || {});
       }
     } catch (error) {
@@ -319,43 +301,23 @@ function UserManagement() {
     } finally {
       setLoading(false);
     }
-  }, []);
+  }, [buildUserParams]);
 
-  const filterUsers = useCallback(() => {
-    let filtered = users.filter((user) => {
-      const matchesSearch =
-        user.email.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        user.full_name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        user.username?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        `${user.first_name} ${user.last_name}`
-          .toLowerCase()
-          .includes(searchTerm.toLowerCase());
-
-      const matchesRole =
-        filterRole === "all" ||
-        (filterRole === "superuser" && user.is_superuser) ||
-        (filterRole === "staff" && user.is_staff && !user.is_superuser) ||
-        (filterRole === "user" && !user.is_staff);
-
-      const matchesStatus =
-        filterStatus === "all" ||
-        (filterStatus === "active" && user.is_active) ||
-        (filterStatus === "inactive" && !user.is_active);
+  // Wait for typing to pause before searching
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedSearch(searchTerm.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
 
-      return matchesSearch && matchesRole && matchesStatus;
-    });
-    setFilteredUsers(filtered);
+  // Go back to the first page whenever the filters change
+  useEffect(() => {
     setPage(1);
-  }, [users, searchTerm, filterRole, filterStatus]);
+  }, [debouncedSearch, filterRole, filterStatus]);
 
   useEffect(() => {
     fetchUsers();
   }, [fetchUsers]);
 
-  useEffect(() => {
-    filterUsers();
-  }, [filterUsers]);
-
   const handleUserPermissionChange = async (userId, action) => {
     const targetUser = users.find((u) => u.id === userId);
     if (!targetUser) return;
@@ -706,13 +668,13 @@ function UserManagement() {
             <Grid item xs={12} sm={6} md={2}>
               <StatCard
                 title="Total Users"
-                value={calculatedStats.totalUsers}
+                value={stats.totalUsers}
                 icon={Group}
                 color="#667eea"
                 subtitle="All registered users"
                 trend={
-                  calculatedStats.newUsersThisWeek > 0
-                    ? `+${calculatedStats.newUsersThisWeek} this week`
+                  stats.newUsersThisWeek > 0
+                    ? `+${stats.newUsersThisWeek} this week`
                     : null
                 }
               />
@@ -720,13 +682,13 @@ function UserManagement() {
             <Grid item xs={12} sm={6} md={2}>
               <StatCard
                 title="Active Users"
-                value={calculatedStats.activeUsers}
+                value={stats.activeUsers}
                 icon={CheckCircle}
                 color="#10b981"
                 subtitle="Currently active accounts"
                 trend={`${
                   Math.round(
-                    (calculatedStats.activeUsers / calculatedStats.totalUsers) *
+                    (stats.activeUsers / stats.totalUsers) *
                       100
                   ) || 0
                 }% active`}
@@ -735,7 +697,7 @@ function UserManagement() {
             <Grid item xs={12} sm={6} md={2}>
               <StatCard
                 title="Staff Members"
-                value={calculatedStats.staffUsers}
+                value={stats.staffUsers}
                 icon={SupervisorAccount}
                 color="#f093fb"
                 subtitle="Staff level access"
@@ -744,7 +706,7 @@ function UserManagement() {
             <Grid item xs={12} sm={6} md={2}>
               <StatCard
                 title="Administrators"
-                value={calculatedStats.superUsers}
+                value={stats.superUsers}
                 icon={AdminPanelSettings}
                 color="#ff6b6b"
                 subtitle="Superuser privileges"
@@ -753,7 +715,7 @@ function UserManagement() {
             <Grid item xs={12} sm={6} md={2}>
               <StatCard
                 title="New Users"
-                value={calculatedStats.newUsersThisWeek}
+                value={stats.newUsersThisWeek}
                 icon={TrendingUp}
                 color="#f59e0b"
                 subtitle="Joined this week"
@@ -762,7 +724,7 @@ function UserManagement() {
             <Grid item xs={12} sm={6} md={2}>
               <StatCard
                 title="Recent Logins"
-                value={calculatedStats.recentLogins}
+                value={stats.recentLogins}
                 icon={LoginRounded}
                 color="#8b5cf6"
                 subtitle="Last 24 hours"
@@ -936,7 +898,7 @@ function UserManagement() {
                       </TableHead>
                       <TableBody>
                         {" "}
-                        {paginatedUsers.map((user, index) => (
+                        {users.map((user, index) => (
                           <Fade
                             key={user.id}
                             in={true}
@@ -1139,12 +1101,12 @@ function UserManagement() {
                   </TableContainer>
 
                   {/* Pagination */}
-                  {filteredUsers.length > rowsPerPage && (
+                  {totalCount > rowsPerPage && (
                     <Box
                       sx={{ display: "flex", justifyContent: "center", p: 3 }}
                     >
                       <Pagination
-                        count={Math.ceil(filteredUsers.length / rowsPerPage)}
+                        count={Math.ceil(totalCount / rowsPerPage)}
                         page={page}
                         onChange={(e, newPage) => setPage(newPage)}
                         color="primary"
@@ -1159,7 +1121,7 @@ function UserManagement() {
                   )}
 
                   {/* No users found */}
-                  {filteredUsers.length === 0 && !loading && (
+                  {users.length === 0 && !loading && (
                     <Box sx={{ textAlign: "center", py: 6 }}>
                       <People sx={{ fontSize: 80, color: "grey.300", mb: 2 }} />
                       <Typography
@@ -3,13 +3,19 @@ import api from './api';
 // AI Assistant API service
 export const aiAssistantService = {
   // Chat management
-  async getChats() {
+  // Chats are cursor-paginated: pass the previous nextCursor to load more
+  async getChats({ cursor = null, limit = null } = {}) {
     try {
-      const response = await api.get('/aiassistant/chats/');
+      const params = {};
+      if (cursor) params.cursor = cursor;
+      if (limit) params.limit = limit;
+      const response = await api.get('/aiassistant/chats/', { params });
       return {
         success: true,
         data: response.data.chats || [],
-        total: response.data.total || 0
+        total: response.data.total || 0,
+        nextCursor: response.data.next_cursor || null,
+        hasMore: Boolean(response.data.has_more)
       };
     } catch (error) {
       console.error('Error fetching chats:', error);
@@ -39,12 +45,19 @@ export const aiAssistantService = {
     }
   },
 
-  async getChatDetails(chatId) {
+  // Returns the latest messages; pass before (oldest shown message id) to load
+  // earlier history, or after (newest shown message id) to poll for new ones
+  async getChatDetails(chatId, { before = null, after = null, limit = null } = {}) {
     try {
-      const response = await api.get(`/aiassistant/chats/${chatId}/`);
+      const params = {};
+      if (before) params.before = before;
+      if (after) params.after = after;
+      if (limit) params.limit = limit;
+      const response = await api.get(`/aiassistant/chats/${chatId}/`, { params });
       return {
         success: response.data.success,
-        data: response.data
+        data: response.data,
+        hasMore: Boolean(response.data.has_more)
       };
     } catch (error) {
       console.error('Error fetching chat details:', error);